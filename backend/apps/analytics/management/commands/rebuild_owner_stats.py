@@ -0,0 +1,29 @@
+"""
+Django команда для полного пересчёта OwnerStats и TradeBucket
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from apps.analytics.rollups import rebuild_owner_stats
+from apps.analytics.timeseries import rebuild_trade_buckets
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводную статистику и тренды сделок владельцев'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, action='append', help='id пользователя (можно несколько)')
+
+    def handle(self, *args, **options):
+        owners = User.objects.order_by('id')
+        if options['owner']:
+            owners = owners.filter(id__in=options['owner'])
+
+        count = 0
+        for owner_id in owners.values_list('id', flat=True).iterator():
+            rebuild_owner_stats(owner_id)
+            rebuild_trade_buckets(owner_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Пересчитана статистика {count} пользователей'))
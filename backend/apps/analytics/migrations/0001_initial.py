@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('owned_cards', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.PositiveIntegerField(default=0)),
+                ('collection_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rarity_counts', models.JSONField(default=dict)),
+                ('series_counts', models.JSONField(default=dict)),
+                ('trades_count', models.PositiveIntegerField(default=0)),
+                ('spent_rub', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('earned_rub', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fees_rub', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradeBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('month', 'Month'), ('week', 'Week')], max_length=5)),
+                ('start', models.DateField()),
+                ('buy_count', models.PositiveIntegerField(default=0)),
+                ('buy_quantity', models.PositiveIntegerField(default=0)),
+                ('spent_rub', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sell_count', models.PositiveIntegerField(default=0)),
+                ('sell_quantity', models.PositiveIntegerField(default=0)),
+                ('earned_rub', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fees_rub', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trade_buckets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['owner', 'period', 'start'],
+                'unique_together': {('owner', 'period', 'start')},
+            },
+        ),
+    ]
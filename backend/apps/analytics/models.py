@@ -1,3 +1,66 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class OwnerStats(models.Model):
+    """
+    Сводная статистика владельца
+
+    Обновляется дельтами из сигналов InventoryItem/Trade/Card
+    (apps/analytics/rollups.py), полностью пересчитывается командой
+    rebuild_owner_stats.
+    """
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="stats", primary_key=True
+    )
+    # Карточки, которые есть в коллекции (has_card=True)
+    owned_cards = models.PositiveIntegerField(default=0)
+    total_quantity = models.PositiveIntegerField(default=0)
+    # Стоимость коллекции по базовым ценам: sum(quantity * base_price_rub)
+    collection_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # {rarity: количество карточек}, {series_id: количество карточек}
+    rarity_counts = models.JSONField(default=dict)
+    series_counts = models.JSONField(default=dict)
+    trades_count = models.PositiveIntegerField(default=0)
+    spent_rub = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    earned_rub = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fees_rub = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats {self.owner_id}: {self.owned_cards} cards"
+
+
+class TradeBucket(models.Model):
+    """
+    Сделки владельца, сгруппированные по месяцам и неделям
+
+    Обновляется дельтами из сигналов Trade (apps/analytics/timeseries.py),
+    поэтому тренд за любой период читается за время, пропорциональное
+    числу периодов, а не сделок.
+    """
+
+    PERIOD_CHOICES = [
+        ("month", "Month"),
+        ("week", "Week"),
+    ]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="trade_buckets")
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    # Первый день периода (для недели — понедельник)
+    start = models.DateField()
+    buy_count = models.PositiveIntegerField(default=0)
+    buy_quantity = models.PositiveIntegerField(default=0)
+    spent_rub = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sell_count = models.PositiveIntegerField(default=0)
+    sell_quantity = models.PositiveIntegerField(default=0)
+    earned_rub = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fees_rub = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("owner", "period", "start")
+        ordering = ["owner", "period", "start"]
+
+    def __str__(self):
+        return f"{self.owner_id} {self.period} {self.start}"
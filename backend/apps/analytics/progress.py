@@ -0,0 +1,54 @@
+"""
+Прогресс коллекции по сериям
+
+Число карточек в сериях берётся из одного сгруппированного запроса,
+кэшированного по версии каталога, а число собранных — из OwnerStats
+владельца, которая поддерживается дельтами (см. rollups.py).
+"""
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from apps.cards.models import Series
+from apps.cards.snapshot import get_catalog_version
+
+
+CACHE_KEY = 'analytics:series_totals:{catalog_version}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_series_totals():
+    rows = Series.objects.annotate(
+        total=Count('cards'),
+    ).values('id', 'title', 'number', 'total').order_by('number', 'id')
+    return [row for row in rows if row['total']]
+
+
+def get_series_totals():
+    """Серии каталога с числом карточек: [{id, title, number, total}]"""
+    key = CACHE_KEY.format(catalog_version=get_catalog_version())
+    result = cache.get(key)
+    if result is None:
+        result = build_series_totals()
+        cache.set(key, result, timeout=CACHE_TIMEOUT)
+    return result
+
+
+def get_series_progress(stats):
+    """
+    Args:
+        stats: OwnerStats владельца или None
+    """
+    series_counts = stats.series_counts if stats else {}
+    progress = []
+    for row in get_series_totals():
+        owned = series_counts.get(str(row['id']), 0)
+        progress.append({
+            'series_id': row['id'],
+            'series_title': row['title'],
+            'series_number': row['number'],
+            'total': row['total'],
+            'owned': owned,
+            'percentage': round(owned / row['total'] * 100, 1),
+        })
+    return progress
@@ -0,0 +1,234 @@
+"""
+Инкрементальное обновление OwnerStats
+
+Сигналы передают сюда состояние строки "до" и "после" записи, а здесь
+из них собирается дельта и одним UPDATE применяется к строке владельца.
+Если строки статистики ещё нет, дельта пропускается: строка будет
+пересчитана целиком при первом чтении (get_owner_stats).
+"""
+
+from collections import Counter, defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from apps.cards.models import Card
+from apps.finance.models import Trade
+from apps.inventory.models import InventoryItem
+from .models import OwnerStats
+
+
+ZERO = Decimal('0')
+
+# Вклад строки инвентаря в статистику
+ItemState = namedtuple('ItemState', 'owner_id has_card quantity rarity series_id base_price')
+# Вклад сделки в статистику
+TradeState = namedtuple('TradeState', 'owner_id trade_type price_rub fees_rub date quantity')
+
+
+class StatsDelta:
+    """Изменения статистики одного владельца"""
+
+    def __init__(self):
+        self.owned_cards = 0
+        self.total_quantity = 0
+        self.collection_value = ZERO
+        self.rarity_counts = Counter()
+        self.series_counts = Counter()
+        self.trades_count = 0
+        self.spent_rub = ZERO
+        self.earned_rub = ZERO
+        self.fees_rub = ZERO
+
+    def add_item(self, state, sign=1):
+        if state is None or not state.has_card:
+            return
+        self.owned_cards += sign
+        self.total_quantity += sign * state.quantity
+        self.collection_value += sign * state.quantity * (state.base_price or ZERO)
+        self.rarity_counts[state.rarity] += sign
+        self.series_counts[str(state.series_id)] += sign
+
+    def add_trade(self, state, sign=1):
+        if state is None:
+            return
+        self.trades_count += sign
+        if state.trade_type == 'buy':
+            self.spent_rub += sign * state.price_rub
+        elif state.trade_type == 'sell':
+            self.earned_rub += sign * state.price_rub
+        self.fees_rub += sign * (state.fees_rub or ZERO)
+
+    def apply_to(self, stats):
+        stats.owned_cards += self.owned_cards
+        stats.total_quantity += self.total_quantity
+        stats.collection_value += self.collection_value
+        stats.rarity_counts = merge_counts(stats.rarity_counts, self.rarity_counts)
+        stats.series_counts = merge_counts(stats.series_counts, self.series_counts)
+        stats.trades_count += self.trades_count
+        stats.spent_rub += self.spent_rub
+        stats.earned_rub += self.earned_rub
+        stats.fees_rub += self.fees_rub
+
+
+def merge_counts(current, delta):
+    merged = Counter(current)
+    merged.update(delta)
+    return {key: value for key, value in merged.items() if value}
+
+
+def apply_deltas(deltas):
+    """
+    Args:
+        deltas: {owner_id: StatsDelta}
+    """
+    with transaction.atomic():
+        for owner_id, delta in deltas.items():
+            if owner_id is None:
+                continue
+            stats = OwnerStats.objects.select_for_update().filter(owner_id=owner_id).first()
+            if stats is None:
+                continue
+            delta.apply_to(stats)
+            stats.save()
+
+
+def apply_change(add, before, after):
+    """Применяет разницу между состояниями "до" и "после" одной строки"""
+    deltas = defaultdict(StatsDelta)
+    if before is not None:
+        add(deltas[before.owner_id], before, -1)
+    if after is not None:
+        add(deltas[after.owner_id], after, 1)
+    apply_deltas(deltas)
+
+
+def load_item_state(pk):
+    row = InventoryItem.objects.filter(pk=pk).values_list(
+        'owner_id', 'has_card', 'quantity', 'card__rarity', 'card__series_id', 'card__base_price_rub',
+    ).first()
+    return ItemState(*row) if row else None
+
+
+def item_state(instance):
+    card = Card.objects.filter(pk=instance.card_id).values_list(
+        'rarity', 'series_id', 'base_price_rub',
+    ).first()
+    if card is None:
+        return None
+    return ItemState(instance.owner_id, instance.has_card, instance.quantity, *card)
+
+
+def load_trade_state(pk):
+    row = Trade.objects.filter(pk=pk).values_list(
+        'owner_id', 'trade_type', 'price_rub', 'fees_rub', 'date', 'quantity',
+    ).first()
+    return TradeState(*row) if row else None
+
+
+def trade_state(instance):
+    return TradeState(
+        instance.owner_id, instance.trade_type,
+        Decimal(str(instance.price_rub)), Decimal(str(instance.fees_rub or 0)),
+        Trade._meta.get_field('date').to_python(instance.date), instance.quantity,
+    )
+
+
+def apply_item_change(before, after):
+    apply_change(StatsDelta.add_item, before, after)
+
+
+def apply_trade_change(before, after):
+    apply_change(StatsDelta.add_trade, before, after)
+
+
+def apply_bulk_item_changes(owner_id, before, after):
+    """
+    Дельта для массового upsert инвентаря (bulk_create не шлёт post_save)
+
+    Args:
+        before: {card_id: (has_card, quantity)} существовавших строк
+        after: {card_id: (has_card, quantity)} всех записанных строк
+    """
+    if not OwnerStats.objects.filter(owner_id=owner_id).exists():
+        return
+    cards = {
+        card_id: (rarity, series_id, price)
+        for card_id, rarity, series_id, price in Card.objects.filter(
+            id__in=list(after)
+        ).values_list('id', 'rarity', 'series_id', 'base_price_rub')
+    }
+    delta = StatsDelta()
+    for card_id, (has_card, quantity) in after.items():
+        if card_id not in cards:
+            continue
+        if card_id in before:
+            delta.add_item(ItemState(owner_id, *before[card_id], *cards[card_id]), -1)
+        delta.add_item(ItemState(owner_id, has_card, quantity, *cards[card_id]), 1)
+    apply_deltas({owner_id: delta})
+
+
+def apply_card_change(card_id, before, after):
+    """
+    Изменение редкости, серии или цены карточки у всех владельцев
+
+    Args:
+        before, after: (rarity, series_id, base_price_rub)
+    """
+    if before is None or before == after:
+        return
+    deltas = defaultdict(StatsDelta)
+    holders = InventoryItem.objects.filter(card_id=card_id, has_card=True).values_list('owner_id', 'quantity')
+    for owner_id, quantity in holders:
+        deltas[owner_id].add_item(ItemState(owner_id, True, quantity, *before), -1)
+        deltas[owner_id].add_item(ItemState(owner_id, True, quantity, *after), 1)
+    apply_deltas(deltas)
+
+
+def rebuild_owner_stats(owner_id):
+    """Полный пересчёт статистики владельца из исходных таблиц"""
+    items = InventoryItem.objects.filter(owner_id=owner_id, has_card=True)
+    totals = items.aggregate(
+        owned_cards=Count('id'),
+        total_quantity=Sum('quantity'),
+        collection_value=Sum(F('quantity') * F('card__base_price_rub')),
+    )
+    rarity_counts = {
+        row['card__rarity']: row['count']
+        for row in items.values('card__rarity').annotate(count=Count('id')).order_by()
+    }
+    series_counts = {
+        str(row['card__series_id']): row['count']
+        for row in items.values('card__series_id').annotate(count=Count('id')).order_by()
+    }
+    trades = Trade.objects.filter(owner_id=owner_id).aggregate(
+        trades_count=Count('id'),
+        spent_rub=Sum('price_rub', filter=Q(trade_type='buy')),
+        earned_rub=Sum('price_rub', filter=Q(trade_type='sell')),
+        fees_rub=Sum('fees_rub'),
+    )
+
+    stats, _ = OwnerStats.objects.update_or_create(
+        owner_id=owner_id,
+        defaults={
+            'owned_cards': totals['owned_cards'],
+            'total_quantity': totals['total_quantity'] or 0,
+            'collection_value': totals['collection_value'] or ZERO,
+            'rarity_counts': rarity_counts,
+            'series_counts': series_counts,
+            'trades_count': trades['trades_count'],
+            'spent_rub': trades['spent_rub'] or ZERO,
+            'earned_rub': trades['earned_rub'] or ZERO,
+            'fees_rub': trades['fees_rub'] or ZERO,
+        },
+    )
+    return stats
+
+
+def get_owner_stats(owner_id):
+    """Строка статистики владельца; при отсутствии считается целиком"""
+    stats = OwnerStats.objects.filter(owner_id=owner_id).first()
+    if stats is None:
+        stats = rebuild_owner_stats(owner_id)
+    return stats
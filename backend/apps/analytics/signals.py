@@ -0,0 +1,91 @@
+"""
+Сигналы аналитики: записи инвентаря, сделок и карточек
+обновляют OwnerStats и TradeBucket дельтами (см. rollups.py, timeseries.py)
+"""
+
+from decimal import Decimal
+
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.cards.models import Card
+from apps.cards.signals import cards_bulk_updated
+from apps.finance.models import Trade
+from apps.inventory.models import InventoryItem
+from apps.inventory.signals import items_bulk_upserted
+from . import rollups, timeseries
+
+
+def _previous(instance, load):
+    """Состояние строки в базе до сохранения"""
+    if instance._state.adding or instance.pk is None:
+        return None
+    return load(instance.pk)
+
+
+@receiver(pre_save, sender=InventoryItem)
+def remember_inventory_item(sender, instance, **kwargs):
+    instance._stats_before = _previous(instance, rollups.load_item_state)
+
+
+@receiver(post_save, sender=InventoryItem)
+def on_inventory_item_saved(sender, instance, **kwargs):
+    rollups.apply_item_change(
+        getattr(instance, '_stats_before', None), rollups.item_state(instance)
+    )
+
+
+@receiver(pre_delete, sender=InventoryItem)
+def on_inventory_item_deleted(sender, instance, **kwargs):
+    # pre_delete: карточка ещё существует при каскадном удалении
+    rollups.apply_item_change(rollups.load_item_state(instance.pk), None)
+
+
+@receiver(items_bulk_upserted)
+def on_inventory_bulk_upsert(sender, owner_id, before, after, **kwargs):
+    rollups.apply_bulk_item_changes(owner_id, before, after)
+
+
+@receiver(pre_save, sender=Trade)
+def remember_trade(sender, instance, **kwargs):
+    instance._stats_before = _previous(instance, rollups.load_trade_state)
+
+
+@receiver(post_save, sender=Trade)
+def on_trade_saved(sender, instance, **kwargs):
+    before, after = getattr(instance, '_stats_before', None), rollups.trade_state(instance)
+    rollups.apply_trade_change(before, after)
+    timeseries.apply_trade_change(before, after)
+
+
+@receiver(pre_delete, sender=Trade)
+def on_trade_deleted(sender, instance, **kwargs):
+    before = rollups.load_trade_state(instance.pk)
+    rollups.apply_trade_change(before, None)
+    timeseries.apply_trade_change(before, None)
+
+
+def _card_state(card):
+    return (card.rarity, card.series_id, Decimal(str(card.base_price_rub)))
+
+
+@receiver(pre_save, sender=Card)
+def remember_card(sender, instance, **kwargs):
+    instance._stats_before = _previous(
+        instance,
+        lambda pk: Card.objects.filter(pk=pk).values_list('rarity', 'series_id', 'base_price_rub').first(),
+    )
+
+
+@receiver(post_save, sender=Card)
+def on_card_saved(sender, instance, created, **kwargs):
+    if not created:
+        rollups.apply_card_change(
+            instance.pk, getattr(instance, '_stats_before', None), _card_state(instance)
+        )
+
+
+@receiver(cards_bulk_updated)
+def on_cards_bulk_updated(sender, changes, **kwargs):
+    for card_id, (before, after) in changes.items():
+        rollups.apply_card_change(card_id, before, after)
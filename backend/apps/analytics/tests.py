@@ -1,3 +1,248 @@
+"""
+Тесты аналитики
+"""
+
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.cards.models import Series, Card
+from apps.core.owners import TEST_USERNAME
+from apps.finance.models import Trade
+from apps.inventory.models import InventoryItem
+from .models import OwnerStats, TradeBucket
+from .rollups import rebuild_owner_stats
+from .timeseries import rebuild_trade_buckets
+
+
+class AnalyticsProgressTest(TestCase):
+    """Тесты прогресса по сериям"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="collector")
+        other = User.objects.create(username="other")
+        self.cards = []
+        for series_number in (1, 2, 3):
+            series = Series.objects.create(number=series_number, title=f"Series {series_number}")
+            for number in range(1, 5):
+                self.cards.append(Card.objects.create(
+                    title=f"Card {series_number}-{number}", number=number, rarity="o", series=series
+                ))
+        for card in self.cards[:3] + self.cards[4:5]:
+            InventoryItem.objects.create(card=card, owner=self.user, has_card=True, quantity=1)
+        InventoryItem.objects.create(card=self.cards[3], owner=self.user, has_card=False)
+        InventoryItem.objects.create(card=self.cards[8], owner=other, has_card=True, quantity=1)
+
+    def get_progress(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/analytics/progress/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['series_progress']
+
+    def test_progress_by_series(self):
+        progress = self.get_progress()
+
+        self.assertEqual(
+            [(row['series_number'], row['total'], row['owned'], row['percentage']) for row in progress],
+            [(1, 4, 3, 75.0), (2, 4, 1, 25.0), (3, 4, 0, 0)],
+        )
+
+    def test_reads_owner_stats(self):
+        """Повторный запрос читает только строку OwnerStats, итоги каталога в кэше"""
+        self.get_progress()
+        with self.assertNumQueries(1):
+            self.get_progress()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryItem.objects.create(card=self.cards[11], owner=self.user, has_card=True, quantity=1)
+        self.assertEqual(self.get_progress()[2]['owned'], 1)
+
+
+class OwnerStatsTest(TestCase):
+    """Инкрементальные обновления OwnerStats совпадают с полным пересчётом"""
+
+    fields = [
+        'owned_cards', 'total_quantity', 'collection_value', 'rarity_counts', 'series_counts',
+        'trades_count', 'spent_rub', 'earned_rub', 'fees_rub',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="collector")
+        self.series = [
+            Series.objects.create(number=number, title=f"Series {number}") for number in (1, 2)
+        ]
+        self.cards = [
+            Card.objects.create(
+                title=f"Card {index}", number=index, rarity="o" if index % 2 else "ск",
+                series=self.series[index % 2], base_price_rub=Decimal("10.50") * index,
+            )
+            for index in range(1, 7)
+        ]
+        # Строка статистики существует, дальше она живёт только на дельтах
+        rebuild_owner_stats(self.user.id)
+
+    def snapshot(self, stats):
+        return {field: getattr(stats, field) for field in self.fields}
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot(OwnerStats.objects.get(owner=self.user))
+        self.assertEqual(incremental, self.snapshot(rebuild_owner_stats(self.user.id)))
+        return incremental
+
+    def test_incremental_matches_rebuild(self):
+        first = InventoryItem.objects.create(card=self.cards[0], owner=self.user, has_card=True, quantity=2)
+        second = InventoryItem.objects.create(card=self.cards[1], owner=self.user, has_card=True, quantity=1)
+        InventoryItem.objects.create(card=self.cards[2], owner=self.user, has_card=False)
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats['owned_cards'], 2)
+        self.assertEqual(stats['collection_value'], Decimal("42.00"))
+
+        first.quantity = 5
+        first.save()
+        second.has_card = False
+        second.save()
+        self.assertMatchesRebuild()
+
+        card = self.cards[0]
+        card.base_price_rub = Decimal("100")
+        card.rarity = "р"
+        card.series = self.series[0]
+        card.save()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats['rarity_counts'], {"р": 1})
+
+        first.delete()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats['owned_cards'], 0)
+
+    def test_trades(self):
+        trade = Trade.objects.create(
+            card=self.cards[0], owner=self.user, trade_type="buy",
+            price_rub=Decimal("100"), fees_rub=Decimal("5"), date=date(2024, 1, 1),
+        )
+        Trade.objects.create(
+            card=self.cards[1], owner=self.user, trade_type="sell",
+            price_rub=Decimal("40"), date=date(2024, 2, 1),
+        )
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['spent_rub'], stats['earned_rub'], stats['fees_rub']), (100, 40, 5))
+
+        trade.trade_type = "sell"
+        trade.save()
+        self.assertMatchesRebuild()
+        trade.delete()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats['trades_count'], 1)
+
+    def test_bulk_upsert(self):
+        InventoryItem.objects.create(card=self.cards[0], owner=self.user, has_card=True, quantity=1)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/inventory/items/bulk/', [
+            {'card_id': self.cards[0].id, 'quantity': 3},
+            {'card_id': self.cards[3].id, 'has_card': True, 'quantity': 2},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats['total_quantity'], 5)
+
+
+class TradeTrendTest(TestCase):
+    """Тренд сделок по корзинам месяцев и недель"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="collector")
+        other = User.objects.create(username="other")
+        series = Series.objects.create(number=1, title="Series 1")
+        self.card = Card.objects.create(title="Card", number=1, rarity="o", series=series)
+        self.trades = [
+            self.trade(self.user, "buy", "100", date(2024, 1, 3)),
+            self.trade(self.user, "buy", "50", date(2024, 1, 29)),
+            self.trade(self.user, "sell", "80", date(2024, 2, 1)),
+            self.trade(self.user, "buy", "30", date(2024, 3, 15)),
+            self.trade(other, "buy", "999", date(2024, 1, 10)),
+        ]
+        self.client.force_authenticate(self.user)
+
+    def trade(self, owner, trade_type, price, day):
+        return Trade.objects.create(
+            card=self.card, owner=owner, trade_type=trade_type,
+            price_rub=Decimal(price), fees_rub=Decimal("1"), date=day,
+        )
+
+    def get_trend(self, **params):
+        response = self.client.get('/api/analytics/value-trend/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['value_trend']
+
+    def buckets(self):
+        return list(TradeBucket.objects.filter(owner=self.user).order_by('period', 'start').values(
+            'period', 'start', 'buy_count', 'buy_quantity', 'spent_rub',
+            'sell_count', 'sell_quantity', 'earned_rub', 'fees_rub',
+        ))
+
+    def test_monthly_trend(self):
+        with self.assertNumQueries(1):
+            trend = self.get_trend()
+
+        self.assertEqual(
+            [(row['month'], row['total_spent'], row['avg_price'], row['total_earned']) for row in trend],
+            [
+                (date(2024, 1, 1), Decimal("150"), Decimal("75.00"), 0),
+                (date(2024, 2, 1), 0, 0, Decimal("80")),
+                (date(2024, 3, 1), Decimal("30"), Decimal("30.00"), 0),
+            ],
+        )
+
+    def test_weekly_range(self):
+        trend = self.get_trend(period="week", **{"from": "2024-01-04", "to": "2024-02-28"})
+        # 2024-01-03 попадает в неделю с понедельника 2024-01-01
+        self.assertEqual(
+            [row['week'] for row in trend],
+            [date(2024, 1, 1), date(2024, 1, 29)],
+        )
+
+    def test_incremental_matches_rebuild(self):
+        trade = self.trades[0]
+        trade.date = date(2024, 2, 20)
+        trade.trade_type = "sell"
+        trade.save()
+        self.trades[3].delete()
+
+        incremental = self.buckets()
+        rebuild_trade_buckets(self.user.id)
+        self.assertEqual(incremental, self.buckets())
+        self.assertFalse(TradeBucket.objects.filter(owner=self.user, start=date(2024, 3, 1)).exists())
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get('/api/analytics/value-trend/', {'period': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/value-trend/', {'from': '2024-13-01'}).status_code, 400)
+
+    def test_legacy_trades_backfilled(self):
+        """Сделки без владельца (до поля owner) достаются тестовому пользователю"""
+        backfill = import_module('apps.finance.migrations.0004_backfill_trade_owner')
+        legacy = [self.trade(None, "buy", "40", date(2023, 12, 5)), self.trade(None, "sell", "60", date(2024, 1, 7))]
+
+        # Пользователей несколько, тестового нет — владельца не угадать
+        backfill.assign_legacy_trades(apps, None)
+        self.assertEqual(Trade.objects.filter(owner__isnull=True).count(), 2)
+
+        test_user = User.objects.create(username=TEST_USERNAME)
+        backfill.assign_legacy_trades(apps, None)
+        self.assertEqual({trade.owner_id for trade in Trade.objects.filter(id__in=[t.id for t in legacy])}, {test_user.id})
 
-# Create your tests here.
+        self.client.force_authenticate(None)
+        self.assertEqual([row['month'] for row in self.get_trend()], [date(2023, 12, 1), date(2024, 1, 1)])
+        stats = OwnerStats.objects.get(owner=test_user)
+        self.assertEqual((stats.trades_count, stats.spent_rub, stats.earned_rub), (2, Decimal("40"), Decimal("60")))
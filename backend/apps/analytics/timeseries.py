@@ -0,0 +1,144 @@
+"""
+Тренды сделок по месяцам и неделям
+
+Сделки владельца сворачиваются в TradeBucket: на каждую запись Trade
+меняются две строки (месяц и неделя) атомарным UPDATE ... SET x = x + d.
+Полный пересчёт группирует сделки через TruncMonth/TruncWeek и работает
+на любой базе (в отличие от DATE_TRUNC через .extra()).
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from apps.finance.models import Trade
+from .models import TradeBucket
+
+
+PERIODS = {
+    'month': TruncMonth,
+    'week': TruncWeek,
+}
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+
+
+def period_start(period, day):
+    """Первый день периода, как у TruncMonth/TruncWeek (неделя с понедельника)"""
+    if period == 'month':
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
+
+def trade_counters(state, sign):
+    """Вклад сделки в счётчики корзины"""
+    counters = {'fees_rub': sign * (state.fees_rub or ZERO)}
+    if state.trade_type == 'buy':
+        counters.update(buy_count=sign, buy_quantity=sign * state.quantity, spent_rub=sign * state.price_rub)
+    elif state.trade_type == 'sell':
+        counters.update(sell_count=sign, sell_quantity=sign * state.quantity, earned_rub=sign * state.price_rub)
+    return counters
+
+
+def apply_trade_change(before, after):
+    """
+    Args:
+        before, after: rollups.TradeState или None
+    """
+    deltas = defaultdict(Counter)
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None or state.owner_id is None:
+            continue
+        for period in PERIODS:
+            key = (state.owner_id, period, period_start(period, state.date))
+            deltas[key].update(trade_counters(state, sign))
+
+    with transaction.atomic():
+        for (owner_id, period, start), delta in deltas.items():
+            changes = {field: value for field, value in delta.items() if value}
+            if not changes:
+                continue
+            bucket = TradeBucket.objects.filter(owner_id=owner_id, period=period, start=start)
+            increments = {field: F(field) + value for field, value in changes.items()}
+            if bucket.update(**increments):
+                bucket.filter(buy_count=0, sell_count=0).delete()
+                continue
+            if any(value < 0 for value in changes.values()):
+                # Корзины нет, а сделку убирают: данные разошлись, чинит пересчёт
+                continue
+            try:
+                with transaction.atomic():
+                    TradeBucket.objects.create(owner_id=owner_id, period=period, start=start, **changes)
+            except IntegrityError:
+                # Корзину успели создать параллельно
+                bucket.update(**increments)
+
+
+def rebuild_trade_buckets(owner_id):
+    """Полный пересчёт корзин владельца из сделок"""
+    trades = Trade.objects.filter(owner_id=owner_id)
+    buy = Q(trade_type='buy')
+    sell = Q(trade_type='sell')
+    buckets = []
+    for period, trunc in PERIODS.items():
+        rows = trades.annotate(start=trunc('date')).values('start').annotate(
+            buy_count=Count('id', filter=buy),
+            buy_quantity=Sum('quantity', filter=buy),
+            spent_rub=Sum('price_rub', filter=buy),
+            sell_count=Count('id', filter=sell),
+            sell_quantity=Sum('quantity', filter=sell),
+            earned_rub=Sum('price_rub', filter=sell),
+            fees_rub=Sum('fees_rub'),
+        ).order_by()
+        buckets.extend(
+            TradeBucket(
+                owner_id=owner_id,
+                period=period,
+                start=row['start'],
+                buy_count=row['buy_count'],
+                buy_quantity=row['buy_quantity'] or 0,
+                spent_rub=row['spent_rub'] or ZERO,
+                sell_count=row['sell_count'],
+                sell_quantity=row['sell_quantity'] or 0,
+                earned_rub=row['earned_rub'] or ZERO,
+                fees_rub=row['fees_rub'] or ZERO,
+            )
+            for row in rows
+        )
+
+    with transaction.atomic():
+        TradeBucket.objects.filter(owner_id=owner_id).delete()
+        TradeBucket.objects.bulk_create(buckets)
+    return buckets
+
+
+def get_trade_trend(owner_id, period='month', date_from=None, date_to=None):
+    """
+    Тренд сделок за период: одна строка на месяц/неделю
+
+    Args:
+        date_from, date_to: границы по дате сделки (включительно)
+    """
+    buckets = TradeBucket.objects.filter(owner_id=owner_id, period=period)
+    if date_from:
+        buckets = buckets.filter(start__gte=period_start(period, date_from))
+    if date_to:
+        buckets = buckets.filter(start__lte=date_to)
+
+    return [
+        {
+            period: bucket.start,
+            'total_spent': bucket.spent_rub,
+            'avg_price': (bucket.spent_rub / bucket.buy_count).quantize(CENT) if bucket.buy_count else ZERO,
+            'buy_count': bucket.buy_count,
+            'total_earned': bucket.earned_rub,
+            'sell_count': bucket.sell_count,
+            'fees': bucket.fees_rub,
+        }
+        for bucket in buckets.order_by('start')
+    ]
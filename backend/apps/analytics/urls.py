@@ -5,5 +5,6 @@ urlpatterns = [
     path('overview/', views.AnalyticsOverviewView.as_view(), name='analytics-overview'),
     path('distribution/', views.AnalyticsDistributionView.as_view(), name='analytics-distribution'),
     path('progress/', views.AnalyticsProgressView.as_view(), name='analytics-progress'),
+    path('valuation/', views.AnalyticsValuationView.as_view(), name='analytics-valuation'),
     path('value-trend/', views.AnalyticsValueTrendView.as_view(), name='analytics-value-trend'),
 ]
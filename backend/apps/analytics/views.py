@@ -1,38 +1,55 @@
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Avg, Q
-from apps.cards.models import Card
-from apps.inventory.models import InventoryItem
-from apps.finance.models import Trade, PriceRecord
+from django.utils.dateparse import parse_date
+from apps.finance.models import Trade
+from apps.finance.valuation import value_inventory
+from apps.core.owners import get_request_owner
+from .progress import get_series_progress, get_series_totals
+from .rollups import get_owner_stats
+from .timeseries import PERIODS, get_trade_trend
+
+
+def date_param(request, name):
+    """Дата из query-параметра YYYY-MM-DD или None"""
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: 'Expected a date in YYYY-MM-DD format'})
+    return value
+
+
+def get_stats(request):
+    """OwnerStats текущего пользователя (без авторизации — тестового)"""
+    owner = get_request_owner(request)
+    return get_owner_stats(owner.id) if owner else None
 
 
 class AnalyticsOverviewView(APIView):
     def get(self, request):
-        # For now, get the first user for testing
-        from django.contrib.auth.models import User
-        user = User.objects.first()
+        stats = get_stats(request)
         
         # Общее количество карточек
-        total_cards = Card.objects.count()
+        total_cards = sum(row['total'] for row in get_series_totals())
         
         # Карточки в коллекции
-        owned_cards = InventoryItem.objects.filter(
-            owner=user, has_card=True
-        ).count()
+        owned_cards = stats.owned_cards if stats else 0
         
         # Процент заполнения коллекции
         completion_percentage = (owned_cards / total_cards * 100) if total_cards > 0 else 0
         
-        # Общая стоимость коллекции (по базовым ценам)
-        total_value = InventoryItem.objects.filter(
-            owner=user, has_card=True
-        ).aggregate(
-            total=Sum('quantity')
-        )['total'] or 0
+        # Общая стоимость коллекции: по последним ценам, без них — по базовым
+        total_value = float(value_inventory(stats.owner_id)['total']) if stats else 0
         
         # Последние покупки
         recent_trades = Trade.objects.filter(
-            trade_type='buy'
+            owner_id=stats.owner_id if stats else None, trade_type='buy'
         ).select_related('card').order_by('-date')[:5]
         
         return Response({
@@ -40,6 +57,8 @@ class AnalyticsOverviewView(APIView):
             'owned_cards': owned_cards,
             'completion_percentage': round(completion_percentage, 1),
             'total_value': total_value,
+            'base_value': float(stats.collection_value) if stats else 0,
+            'total_quantity': stats.total_quantity if stats else 0,
             'recent_trades': [
                 {
                     'card_title': trade.card.title,
@@ -54,74 +73,75 @@ class AnalyticsOverviewView(APIView):
 
 class AnalyticsDistributionView(APIView):
     def get(self, request):
-        # For now, get the first user for testing
-        from django.contrib.auth.models import User
-        user = User.objects.first()
+        stats = get_stats(request)
+        rarity_counts = stats.rarity_counts if stats else {}
+        series_counts = stats.series_counts if stats else {}
         
         # Распределение по редкости
-        rarity_distribution = InventoryItem.objects.filter(
-            owner=user, has_card=True
-        ).values('card__rarity').annotate(
-            count=Count('id')
-        ).order_by('card__rarity')
+        rarity_distribution = [
+            {'card__rarity': rarity, 'count': rarity_counts[rarity]}
+            for rarity in sorted(rarity_counts)
+        ]
         
         # Распределение по сериям
-        series_distribution = InventoryItem.objects.filter(
-            owner=user, has_card=True
-        ).values(
-            'card__series__number', 'card__series__title'
-        ).annotate(
-            count=Count('id')
-        ).order_by('card__series__number')
+        series_distribution = [
+            {
+                'card__series__number': row['number'],
+                'card__series__title': row['title'],
+                'count': series_counts[str(row['id'])],
+            }
+            for row in get_series_totals()
+            if str(row['id']) in series_counts
+        ]
         
         return Response({
-            'rarity': list(rarity_distribution),
-            'series': list(series_distribution)
+            'rarity': rarity_distribution,
+            'series': series_distribution
         })
 
 
 class AnalyticsProgressView(APIView):
     def get(self, request):
-        # For now, get the first user for testing
-        from django.contrib.auth.models import User
-        user = User.objects.first()
-        
-        # Прогресс по сериям
-        series_progress = []
-        for series in Card.objects.values('series__id', 'series__title', 'series__number').distinct():
-            total_in_series = Card.objects.filter(series_id=series['series__id']).count()
-            owned_in_series = InventoryItem.objects.filter(
-                owner=user, has_card=True, card__series_id=series['series__id']
-            ).count()
-            
-            series_progress.append({
-                'series_id': series['series__id'],
-                'series_title': series['series__title'],
-                'series_number': series['series__number'],
-                'total': total_in_series,
-                'owned': owned_in_series,
-                'percentage': round((owned_in_series / total_in_series * 100) if total_in_series > 0 else 0, 1)
-            })
+        # Прогресс по сериям: итоги каталога из кэша + счётчики OwnerStats
+        series_progress = get_series_progress(get_stats(request))
         
         return Response({'series_progress': series_progress})
 
 
-class AnalyticsValueTrendView(APIView):
+class AnalyticsValuationView(APIView):
     def get(self, request):
-        # For now, get the first user for testing
-        from django.contrib.auth.models import User
-        user = User.objects.first()
+        """
+        Стоимость коллекции текущего пользователя
+
+        GET /api/analytics/valuation/?at=2024-06-30 — оценка по ценам на дату
+        """
+        at = date_param(request, 'at')
+
+        owner = get_request_owner(request)
+        valuation = value_inventory(owner.id, at) if owner else {'total': 0, 'cards': 0, 'priced_cards': 0}
         
-        # Тренд стоимости по месяцам
-        trades = Trade.objects.filter(
-            trade_type='buy'
-        ).extra(
-            select={'month': "DATE_TRUNC('month', date)"}
-        ).values('month').annotate(
-            total_spent=Sum('price_rub'),
-            avg_price=Avg('price_rub')
-        ).order_by('month')
+        return Response({'at': at, **valuation})
+
+
+class AnalyticsValueTrendView(APIView):
+    def get(self, request):
+        """
+        Тренд сделок текущего пользователя по месяцам или неделям
+
+        GET /api/analytics/value-trend/?period=week&from=2024-01-01&to=2024-06-30
+        """
+        period = request.query_params.get('period', 'month')
+        if period not in PERIODS:
+            return Response(
+                {'error': f"period must be one of: {', '.join(PERIODS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        date_from = date_param(request, 'from')
+        date_to = date_param(request, 'to')
+
+        owner = get_request_owner(request)
+        trend = get_trade_trend(owner.id, period, date_from, date_to) if owner else []
         
         return Response({
-            'value_trend': list(trades)
-        })
\ No newline at end of file
+            'value_trend': trend
+        })
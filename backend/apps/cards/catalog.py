@@ -0,0 +1,342 @@
+"""
+Массовая запись каталога
+
+Общий код для загрузки фикстур каталога (load_catalog) и синхронизации
+с таблицей: CatalogPlan тремя запросами читает текущее состояние серий,
+карточек и их тегов, умеет показать разницу (dry-run) и применить её
+пачкой — upsert карточек по (series, number) и дифф связей CardTag.
+Тот же дифф связей (assign_tags) используется при смене тегов через API.
+"""
+
+import json
+from collections import namedtuple
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from .models import Series, Card, Tag, CardTag
+# Модуль целиком: signals → snapshot → serializers → catalog замыкают цикл импорта
+from . import signals
+
+try:
+    import yaml
+except ImportError:  # YAML-фикстуры необязательны, JSON читается всегда
+    yaml = None
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'catalog'
+FIXTURE_SUFFIXES = ('.json', '.yaml', '.yml')
+
+# id в одном IN: ниже лимита переменных SQLite (999 у старых сборок)
+IDS_PER_QUERY = 900
+
+# Поля карточки, которые пишет каталог (остальные не трогаются)
+CARD_FIELDS = ('title', 'rarity', 'base_price_rub', 'notes')
+
+# price и notes = None — оставить как есть (для новой карточки — по умолчанию),
+# tags = None — не трогать теги карточки
+CatalogRow = namedtuple(
+    'CatalogRow', 'series series_title number title rarity price tags notes',
+    defaults=(None, None, None),
+)
+
+
+class CatalogFixtureError(Exception):
+    """Файл фикстуры нельзя прочитать или он не проходит проверку"""
+
+
+def fixture_paths(paths=None):
+    """Файлы фикстур: переданные пути (файлы или папки) или FIXTURES_DIR"""
+    result = []
+    for path in map(Path, paths or [FIXTURES_DIR]):
+        if path.is_dir():
+            result.extend(sorted(p for p in path.iterdir() if p.suffix in FIXTURE_SUFFIXES))
+        else:
+            result.append(path)
+    return result
+
+
+def read_fixture(path):
+    """
+    Фикстура серии:
+        {"version": 1, "series": {"number": 1, "title": "..."},
+         "cards": [{"number": 1, "title": "...", "rarity": "o", "price": "52.50",
+                    "tags": ["Герой"], "notes": "..."}]}
+
+    Returns:
+        (version, список CatalogRow)
+    """
+    path = Path(path)
+    try:
+        with open(path, encoding='utf-8') as f:
+            if path.suffix == '.json':
+                data = json.load(f)
+            elif yaml is not None:
+                data = yaml.safe_load(f)
+            else:
+                raise CatalogFixtureError(f'{path}: YAML fixtures require PyYAML')
+    except (OSError, ValueError) as e:
+        raise CatalogFixtureError(f'{path}: {e}')
+
+    rarities = {code for code, _ in Card.RARITY_CHOICES}
+    try:
+        version = data['version']
+        series = data['series']
+        rows = []
+        for card in data['cards']:
+            if card['rarity'] not in rarities:
+                raise CatalogFixtureError(f"{path}: card {card['number']}: unknown rarity {card['rarity']!r}")
+            price = card.get('price')
+            rows.append(CatalogRow(
+                series=int(series['number']),
+                series_title=series.get('title', ''),
+                number=int(card['number']),
+                title=card['title'],
+                rarity=card['rarity'],
+                price=Decimal(str(price)).quantize(Decimal('0.01')) if price is not None else None,
+                tags=tuple(sorted(set(card.get('tags', ())))),
+                notes=card.get('notes', ''),
+            ))
+    except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+        raise CatalogFixtureError(f'{path}: invalid fixture ({e!r})')
+
+    numbers = [row.number for row in rows]
+    if len(numbers) != len(set(numbers)):
+        raise CatalogFixtureError(f'{path}: duplicate card numbers')
+    return version, rows
+
+
+class CatalogPlan:
+    """
+    Разница между строками каталога и базой
+
+    Использование:
+        plan = CatalogPlan(rows)
+        plan.diff()    # что изменится
+        plan.apply()   # записать (внутри транзакции)
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        numbers = {row.series for row in rows}
+        self.series = {series.number: series for series in Series.objects.filter(number__in=numbers)}
+        self.cards = {
+            (card['series__number'], card['number']): card
+            for card in Card.objects.filter(series__number__in=numbers).values(
+                'id', 'series_id', 'series__number', 'number', *CARD_FIELDS
+            )
+        }
+        self.tags = {}
+        if any(row.tags is not None for row in rows):
+            for card_id, name in CardTag.objects.filter(
+                card__series__number__in=numbers
+            ).values_list('card_id', 'tag__name'):
+                self.tags.setdefault(card_id, set()).add(name)
+
+    def series_titles(self):
+        titles = {}
+        for row in self.rows:
+            if row.series_title or row.series not in titles:
+                titles[row.series] = row.series_title
+        return titles
+
+    def card_values(self, row):
+        """Значения полей карточки после записи"""
+        current = self.cards.get((row.series, row.number))
+        values = {'title': row.title, 'rarity': row.rarity}
+        values['base_price_rub'] = (
+            row.price if row.price is not None
+            else current['base_price_rub'] if current else Decimal('0')
+        )
+        values['notes'] = row.notes if row.notes is not None else current['notes'] if current else ''
+        return values
+
+    def diff(self):
+        """
+        Returns:
+            {'series_created', 'series_renamed', 'cards_created', 'cards_updated', 'cards_unchanged'}
+            где cards_updated — [{'series', 'number', 'changes': {поле: [было, станет]}}]
+        """
+        titles = self.series_titles()
+        result = {
+            'series_created': sorted(number for number in titles if number not in self.series),
+            'series_renamed': sorted(
+                number for number, title in titles.items()
+                if number in self.series and title and self.series[number].title != title
+            ),
+            'cards_created': [],
+            'cards_updated': [],
+            'cards_unchanged': 0,
+        }
+        for row in self.rows:
+            current = self.cards.get((row.series, row.number))
+            if current is None:
+                result['cards_created'].append({'series': row.series, 'number': row.number})
+                continue
+            changes = {
+                field: [current[field], value]
+                for field, value in self.card_values(row).items()
+                if current[field] != value
+            }
+            if row.tags is not None:
+                tags = sorted(self.tags.get(current['id'], ()))
+                if tags != list(row.tags):
+                    changes['tags'] = [tags, list(row.tags)]
+            if changes:
+                result['cards_updated'].append({'series': row.series, 'number': row.number, 'changes': changes})
+            else:
+                result['cards_unchanged'] += 1
+        return result
+
+    @transaction.atomic
+    def apply(self):
+        """
+        Записывает строки каталога
+
+        Returns:
+            {(номер серии, номер карточки): card_id}
+        """
+        series_ids = self.apply_series()
+        card_ids = self.apply_cards(series_ids)
+        self.apply_tags(card_ids)
+        signals.catalog_changed()
+        return card_ids
+
+    def apply_series(self):
+        titles = self.series_titles()
+        created = [
+            Series(number=number, title=title or f'Series {number}')
+            for number, title in titles.items() if number not in self.series
+        ]
+        renamed = []
+        for number, title in titles.items():
+            series = self.series.get(number)
+            if series is not None and title and series.title != title:
+                series.title = title
+                renamed.append(series)
+
+        if created:
+            Series.objects.bulk_create(created)
+            self.series.update({
+                series.number: series for series in Series.objects.filter(number__in=titles)
+            })
+        if renamed:
+            Series.objects.bulk_update(renamed, ['title'])
+        return {number: series.id for number, series in self.series.items()}
+
+    def apply_cards(self, series_ids):
+        cards = [
+            Card(series_id=series_ids[row.series], number=row.number, **self.card_values(row))
+            for row in self.rows
+        ]
+        Card.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=['series', 'number'],
+            update_fields=list(CARD_FIELDS),
+        )
+
+        ids = {
+            (series_number, number): card_id
+            for card_id, series_number, number in Card.objects.filter(
+                series_id__in=set(series_ids.values()), number__in={row.number for row in self.rows}
+            ).values_list('id', 'series__number', 'number')
+        }
+        # bulk_create не шлёт post_save: сообщаем об изменениях существовавших карточек
+        changes = {}
+        for row, card in zip(self.rows, cards):
+            current = self.cards.get((row.series, row.number))
+            if current is not None:
+                before = (current['rarity'], current['series_id'], current['base_price_rub'])
+                changes[current['id']] = (before, (card.rarity, card.series_id, card.base_price_rub))
+        signals.cards_bulk_updated.send(sender=Card, changes=changes)
+
+        return {(row.series, row.number): ids[(row.series, row.number)] for row in self.rows}
+
+    def apply_tags(self, card_ids):
+        rows = [row for row in self.rows if row.tags is not None]
+        if not rows:
+            return
+        names = {name for row in rows for name in row.tags}
+        tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        if names - set(tags):
+            Tag.objects.bulk_create([Tag(name=name) for name in names - set(tags)], ignore_conflicts=True)
+            tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+
+        wanted = {card_ids[(row.series, row.number)]: set() for row in rows}
+        for row in rows:
+            wanted[card_ids[(row.series, row.number)]].update(tags[name] for name in row.tags)
+        assign_tags(wanted)
+
+
+TAG_MODES = ('set', 'add', 'remove')
+
+
+def chunked(ids, size=None):
+    """Режет список id на части для IN (по IDS_PER_QUERY)"""
+    ids = list(ids)
+    size = size or IDS_PER_QUERY
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def delete_links(link_ids):
+    """
+    Удаляет связи CardTag по id прямым DELETE
+
+    QuerySet.delete() выбрал бы строки и послал post_delete на каждую,
+    а каждый сигнал — сброс версии каталога. На CardTag никто не
+    ссылается, так что каскадов нет; версию сбрасывает вызывающий.
+    """
+    table = connection.ops.quote_name(CardTag._meta.db_table)
+    with connection.cursor() as cursor:
+        for chunk in chunked(link_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', chunk)
+
+
+def assign_tags(card_tags, mode='set'):
+    """
+    Пакетная смена тегов карточек: один запрос текущих связей, одно
+    удаление лишних и один bulk_create недостающих. Связи, которые не
+    меняются, остаются на месте. Id должны быть проверены заранее.
+    Посвязных сигналов нет — версия каталога сдвигается один раз.
+
+    Args:
+        card_tags: {card_id: набор tag_id}
+        mode: set — заменить теги карточки, add — добавить, remove — снять
+
+    Returns:
+        (добавлено связей, удалено связей)
+    """
+    if mode not in TAG_MODES:
+        raise ValueError(f'Unknown tag mode: {mode}')
+    if not card_tags:
+        return 0, 0
+
+    current = {
+        (card_id, tag_id): link_id
+        for chunk in chunked(list(card_tags))
+        for link_id, card_id, tag_id in CardTag.objects.filter(
+            card_id__in=chunk
+        ).values_list('id', 'card_id', 'tag_id')
+    }
+    requested = {(card_id, tag_id) for card_id, tag_ids in card_tags.items() for tag_id in tag_ids}
+
+    if mode == 'set':
+        stale = [link_id for pair, link_id in current.items() if pair not in requested]
+    elif mode == 'remove':
+        stale = [link_id for pair, link_id in current.items() if pair in requested]
+    else:
+        stale = []
+    added = [] if mode == 'remove' else [
+        CardTag(card_id=card_id, tag_id=tag_id) for card_id, tag_id in requested - set(current)
+    ]
+
+    with transaction.atomic(savepoint=False):
+        delete_links(stale)
+        if added:
+            CardTag.objects.bulk_create(added, ignore_conflicts=True)
+        if stale or added:
+            signals.catalog_changed()
+    return len(added), len(stale)
@@ -0,0 +1,137 @@
+"""
+Фасетный просмотр каталога
+
+Инвертированный индекс в памяти процесса: для каждого тега, редкости и
+серии хранится битовое множество карточек (int, бит = позиция карточки
+в порядке каталога). Фильтр — пересечение битовых множеств, счётчики
+фасетов — popcount пересечений, без JOIN по CardTag и COUNT на каждый тег.
+
+Как и поисковый индекс, он пересобирается при смене версии каталога:
+любая запись в Card/Series/Tag/CardTag сдвигает версию во всех процессах.
+Пересборка целиком, а не по дельтам: дельта (cards_bulk_updated) есть
+только в процессе, который писал, а остальные видят лишь новую версию.
+На каталоге ~800 карточек с 5 тегами это 4 запроса и ~8 мс один раз
+на процесс после правки каталога.
+"""
+
+from apps.core.versioning import VersionedIndex
+from .models import Series, Card, Tag, CardTag
+from .snapshot import VERSION_KEY
+
+
+def iter_bits(bits):
+    """Позиции установленных битов по возрастанию"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class FacetIndex:
+    """
+    Битовые множества карточек по тегам, редкости и серии
+
+    Внутри измерения выбранные значения объединяются через ИЛИ (редкость,
+    серия), теги — через И: карточка должна иметь все выбранные теги.
+    """
+
+    def __init__(self, cards, card_tags, tags, series):
+        """
+        Args:
+            cards: (id, rarity, series_id) в порядке каталога
+            card_tags: (card_id, tag_id)
+            tags: (id, name)
+            series: (id, number, title)
+        """
+        self.ids = []
+        self.positions = positions = {}
+        self.rarity = {}
+        self.series = {}
+        for position, (card_id, rarity, series_id) in enumerate(cards):
+            self.ids.append(card_id)
+            positions[card_id] = position
+            bit = 1 << position
+            self.rarity[rarity] = self.rarity.get(rarity, 0) | bit
+            self.series[series_id] = self.series.get(series_id, 0) | bit
+        self.all = (1 << len(self.ids)) - 1
+
+        self.tags = {}
+        for card_id, tag_id in card_tags:
+            if card_id in positions:
+                self.tags[tag_id] = self.tags.get(tag_id, 0) | (1 << positions[card_id])
+
+        self.tag_names = dict(tags)
+        self.series_info = {series_id: (number, title) for series_id, number, title in series}
+
+    def _union(self, index, values):
+        bits = 0
+        for value in values:
+            bits |= index.get(value, 0)
+        return bits
+
+    def _match(self, tags=(), rarity=(), series=(), base=None):
+        bits = self.all if base is None else base
+        for tag_id in tags:
+            bits &= self.tags.get(tag_id, 0)
+        if rarity:
+            bits &= self._union(self.rarity, rarity)
+        if series:
+            bits &= self._union(self.series, series)
+        return bits
+
+    def mask(self, card_ids):
+        """Битовое множество для набора id (например, результата поиска)"""
+        bits = 0
+        for card_id in card_ids:
+            if card_id in self.positions:
+                bits |= 1 << self.positions[card_id]
+        return bits
+
+    def select(self, tags=(), rarity=(), series=(), base=None):
+        """
+        Args:
+            base: ограничить выборку битовым множеством (mask)
+
+        Returns:
+            (число карточек, битовое множество, счётчики фасетов)
+            Счётчик редкости и серии считается без фильтра своего
+            измерения (сколько станет при добавлении значения),
+            счётчик тега — сколько карточек выборки его имеют.
+        """
+        bits = self._match(tags, rarity, series, base)
+        without_rarity = self._match(tags, (), series, base)
+        without_series = self._match(tags, rarity, (), base)
+        facets = {
+            'tags': {tag_id: (bits & tag_bits).bit_count() for tag_id, tag_bits in self.tags.items()},
+            'rarity': {code: (without_rarity & code_bits).bit_count() for code, code_bits in self.rarity.items()},
+            'series': {series_id: (without_series & series_bits).bit_count() for series_id, series_bits in self.series.items()},
+        }
+        return bits.bit_count(), bits, facets
+
+    def page(self, bits, offset=0, limit=None):
+        """id карточек выборки в порядке каталога"""
+        result = []
+        for i, position in enumerate(iter_bits(bits)):
+            if i < offset:
+                continue
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self.ids[position])
+        return result
+
+
+def build_facet_index():
+    return FacetIndex(
+        Card.objects.order_by('series__number', 'number').values_list('id', 'rarity', 'series_id'),
+        CardTag.objects.values_list('card_id', 'tag_id'),
+        Tag.objects.values_list('id', 'name'),
+        Series.objects.values_list('id', 'number', 'title'),
+    )
+
+
+_index = VersionedIndex(VERSION_KEY, build_facet_index)
+
+
+def get_facet_index():
+    """Возвращает индекс для текущей версии каталога, пересобирая при смене"""
+    return _index.get()
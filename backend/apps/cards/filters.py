@@ -0,0 +1,25 @@
+from django.db.models import Q
+from rest_framework import filters
+
+from .search import matching_cards_subquery
+
+
+class CardIndexSearchFilter(filters.SearchFilter):
+    """
+    ?search= через поисковый индекс каталога вместо ILIKE '%q%'
+
+    ViewSet указывает search_card_field — путь до id карточки
+    ('id' для Card, 'card_id' для инвентаря), и при необходимости
+    search_extra_fields, которые ищутся обычным icontains.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        card_field = getattr(view, 'search_card_field', 'id')
+        condition = Q(**{f'{card_field}__in': matching_cards_subquery(query)})
+        for field in getattr(view, 'search_extra_fields', []):
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
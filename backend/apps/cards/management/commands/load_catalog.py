@@ -0,0 +1,62 @@
+"""
+Django команда для загрузки каталога из фикстур серий
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.cards.catalog import CatalogFixtureError, CatalogPlan, fixture_paths, read_fixture
+
+
+class Command(BaseCommand):
+    help = 'Загружает серии и карточки из фикстур (JSON/YAML) одним upsert'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы или папки с фикстурами (по умолчанию apps/cards/fixtures/catalog)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать разницу с базой')
+        parser.add_argument('--diff-limit', type=int, default=20, help='Сколько изменённых карточек показать')
+
+    def handle(self, *args, **options):
+        rows = []
+        paths = fixture_paths(options['paths'])
+        if not paths:
+            raise CommandError('Фикстуры не найдены')
+        try:
+            for path in paths:
+                version, fixture_rows = read_fixture(path)
+                self.stdout.write(f'📄 {path.name}: версия {version}, карточек {len(fixture_rows)}')
+                rows.extend(fixture_rows)
+        except CatalogFixtureError as e:
+            raise CommandError(str(e))
+
+        with CaptureQueriesContext(connection) as queries:
+            plan = CatalogPlan(rows)
+            diff = plan.diff()
+            self.print_diff(diff, options['diff_limit'])
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING('Dry run: изменения не записаны'))
+                return
+            if diff['series_created'] or diff['series_renamed'] or diff['cards_created'] or diff['cards_updated']:
+                plan.apply()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Каталог загружен: {len(rows)} карточек, {len(queries)} запросов к базе'
+        ))
+
+    def print_diff(self, diff, limit):
+        self.stdout.write(
+            f"Серий новых: {len(diff['series_created'])}, переименовано: {len(diff['series_renamed'])}; "
+            f"карточек новых: {len(diff['cards_created'])}, изменено: {len(diff['cards_updated'])}, "
+            f"без изменений: {diff['cards_unchanged']}"
+        )
+        for card in diff['cards_updated'][:limit]:
+            changes = json.dumps(card['changes'], ensure_ascii=False, default=str)
+            self.stdout.write(f"  ~ {card['series']}/{card['number']}: {changes}")
+        if len(diff['cards_updated']) > limit:
+            self.stdout.write(f"  … ещё {len(diff['cards_updated']) - limit}")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='cards', through='cards.CardTag', to='cards.tag'),
+        ),
+    ]
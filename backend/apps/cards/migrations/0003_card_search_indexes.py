@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# Выражение tsvector совпадает с тем, что строит SearchVector('title', config='russian'),
+# иначе планировщик не станет использовать индекс
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS cards_card_title_tsv_idx ON cards_card "
+    "USING gin (to_tsvector('russian'::regconfig, COALESCE((title)::text, ''::text)))",
+    "CREATE INDEX IF NOT EXISTS cards_card_title_trgm_idx ON cards_card "
+    "USING gin (title gin_trgm_ops)",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS cards_card_title_trgm_idx",
+    "DROP INDEX IF EXISTS cards_card_title_tsv_idx",
+]
+
+
+def run_on_postgres(statements):
+    def run(apps, schema_editor):
+        # На SQLite поиск идёт по индексу в памяти (apps/cards/search.py)
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0002_card_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgres(FORWARD_SQL), run_on_postgres(BACKWARD_SQL)),
+    ]
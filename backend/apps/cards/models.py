@@ -22,6 +22,7 @@ class Card(models.Model):
     series = models.ForeignKey(Series, on_delete=models.PROTECT, related_name="cards")
     base_price_rub = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     notes = models.TextField(blank=True)
+    tags = models.ManyToManyField("Tag", through="CardTag", related_name="cards", blank=True)
 
     class Meta:
         unique_together = ("series", "number")
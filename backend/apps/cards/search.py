@@ -0,0 +1,235 @@
+"""
+Поиск по каталогу карточек
+
+На PostgreSQL поиск идёт по GIN-индексам (tsvector с русской морфологией
+и pg_trgm для опечаток), см. миграцию 0003_card_search_indexes.
+На остальных базах (SQLite) используется триграммный индекс в памяти
+процесса, который пересобирается при смене версии каталога.
+"""
+
+import json
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from apps.core.versioning import VersionedIndex
+
+from .models import Card
+from .snapshot import VERSION_KEY
+
+
+SEARCH_CONFIG = 'russian'
+# Порог похожести как у pg_trgm.similarity_threshold
+TRIGRAM_THRESHOLD = 0.3
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    """Нижний регистр, ё -> е"""
+    return (text or '').lower().replace('ё', 'е')
+
+
+def tokenize(text):
+    return WORD_RE.findall(normalize(text))
+
+
+def trigrams(text):
+    """Триграммы в стиле pg_trgm: каждое слово дополняется пробелами"""
+    result = set()
+    for word in tokenize(text):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class TrigramIndex:
+    """
+    Триграммный индекс каталога в памяти
+
+    trigram -> множество id карточек, плюс отсортированный список слов
+    для автодополнения по префиксу и словарь номеров карточек.
+    """
+
+    def __init__(self, rows):
+        self.titles = {}
+        self.sizes = {}
+        self.postings = defaultdict(set)
+        self.numbers = defaultdict(list)
+        words = set()
+
+        for card_id, title, number in rows:
+            self.titles[card_id] = title
+            grams = trigrams(title)
+            self.sizes[card_id] = len(grams)
+            for gram in grams:
+                self.postings[gram].add(card_id)
+            self.numbers[number].append(card_id)
+            words.update((word, card_id) for word in tokenize(title))
+
+        self.words = sorted(words)
+
+    def search(self, query, limit=None):
+        """
+        Ранжированный поиск
+
+        Returns:
+            Список (card_id, score) по убыванию score
+        """
+        query_grams = trigrams(query)
+        query_words = tokenize(query)
+        scores = {}
+
+        if query_grams:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.postings.get(gram, ()))
+            for card_id, common in shared.items():
+                similarity = common / (len(query_grams) + self.sizes[card_id] - common)
+                coverage = common / len(query_grams)
+                if similarity >= TRIGRAM_THRESHOLD or coverage >= 0.8:
+                    scores[card_id] = similarity + coverage
+
+        for word in query_words:
+            for card_id in self._prefix_ids(word):
+                scores[card_id] = scores.get(card_id, 0) + 1.0
+            if word.isdigit():
+                for card_id in self.numbers.get(int(word), ()):
+                    scores[card_id] = scores.get(card_id, 0) + 2.0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def autocomplete(self, prefix, limit=10):
+        """Карточки, в названии которых есть слово с данным префиксом"""
+        words = tokenize(prefix)
+        if not words:
+            return []
+        # Все слова, кроме последнего, должны совпасть, последнее — префикс
+        candidates = None
+        for word in words[:-1]:
+            ids = set(self._word_ids(word))
+            candidates = ids if candidates is None else candidates & ids
+        result = []
+        for card_id in self._prefix_ids(words[-1]):
+            if candidates is None or card_id in candidates:
+                result.append(card_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def _word_ids(self, word):
+        for i in range(bisect_left(self.words, (word,)), len(self.words)):
+            w, card_id = self.words[i]
+            if w != word:
+                break
+            yield card_id
+
+    def _prefix_ids(self, prefix):
+        seen = set()
+        for i in range(bisect_left(self.words, (prefix,)), len(self.words)):
+            word, card_id = self.words[i]
+            if not word.startswith(prefix):
+                break
+            if card_id not in seen:
+                seen.add(card_id)
+                yield card_id
+
+
+_index = VersionedIndex(VERSION_KEY, lambda: TrigramIndex(Card.objects.values_list('id', 'title', 'number')))
+
+
+def get_memory_index():
+    """Возвращает индекс для текущей версии каталога, пересобирая при смене"""
+    return _index.get()
+
+
+def use_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def _prefix_tsquery(query):
+    """'челов паук' -> 'челов:* & паук:*' (только безопасные символы)"""
+    return ' & '.join(f'{word}:*' for word in tokenize(query))
+
+
+def postgres_search(query):
+    """Queryset найденных карточек с аннотацией score"""
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
+    )
+
+    vector = SearchVector('title', config=SEARCH_CONFIG)
+    condition = Q(title__trigram_similar=query)
+    rank = TrigramSimilarity('title', query)
+
+    raw = _prefix_tsquery(query)
+    if raw:
+        tsquery = SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+        condition |= Q(search_vector=tsquery)
+        rank = rank + SearchRank(vector, tsquery)
+    if query.strip().isdigit():
+        condition |= Q(number=int(query))
+
+    return Card.objects.annotate(
+        search_vector=vector,
+        score=rank,
+    ).filter(condition)
+
+
+def search_cards(query, limit=20):
+    """
+    Ранжированный поиск
+
+    Returns:
+        Список (card_id, score) по убыванию score
+    """
+    if not query.strip():
+        return []
+    if use_postgres():
+        rows = postgres_search(query).order_by(
+            F('score').desc(), 'series__number', 'number'
+        ).values_list('id', 'score')[:limit]
+        return list(rows)
+    return get_memory_index().search(query, limit)
+
+
+def autocomplete_cards(prefix, limit=10):
+    """Список id карточек для автодополнения"""
+    if not prefix.strip():
+        return []
+    if use_postgres():
+        raw = _prefix_tsquery(prefix)
+        if not raw:
+            return []
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+        tsquery = SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+        return list(
+            Card.objects.annotate(
+                search_vector=SearchVector('title', config=SEARCH_CONFIG)
+            ).filter(search_vector=tsquery).values_list('id', flat=True)[:limit]
+        )
+    return get_memory_index().autocomplete(prefix, limit)
+
+
+def matching_card_ids(query):
+    """Все подходящие id списком (для битовых множеств фасетов)"""
+    if use_postgres():
+        return list(postgres_search(query).values_list('id', flat=True))
+    return [card_id for card_id, _ in get_memory_index().search(query)]
+
+
+def matching_cards_subquery(query):
+    """
+    Подходящие id подзапросом для фильтрации querysets (field__in=...)
+
+    На SQLite id из индекса в памяти передаются одним JSON-параметром
+    через json_each: широкий запрос не упирается в лимит переменных.
+    """
+    if use_postgres():
+        return postgres_search(query).values('id')
+    return RawSQL('SELECT value FROM json_each(%s)', [json.dumps(matching_card_ids(query))])
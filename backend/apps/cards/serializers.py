@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Series, Card, Tag, CardTag
+from .catalog import TAG_MODES, assign_tags, chunked
+from .models import Series, Card, Tag
 
 
 class SeriesSerializer(serializers.ModelSerializer):
@@ -26,6 +28,18 @@ class CardSerializer(serializers.ModelSerializer):
         ]
 
 
+def validate_ids(model, ids, label):
+    """Проверяет все id (по запросу на IDS_PER_QUERY штук) и возвращает их множество"""
+    ids = set(ids)
+    found = set()
+    for chunk in chunked(ids):
+        found.update(model.objects.filter(id__in=chunk).values_list('id', flat=True))
+    missing = ids - found
+    if missing:
+        raise serializers.ValidationError(f"Unknown {label} ids: {sorted(missing)}")
+    return ids
+
+
 class CardDetailSerializer(CardSerializer):
     series = SeriesSerializer(read_only=True)
     tag_ids = serializers.ListField(
@@ -33,26 +47,50 @@ class CardDetailSerializer(CardSerializer):
         write_only=True,
         required=False
     )
+
+    class Meta(CardSerializer.Meta):
+        fields = CardSerializer.Meta.fields + ['tag_ids']
+
+    def validate_tag_ids(self, value):
+        return validate_ids(Tag, value, 'tag')
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         tag_ids = validated_data.pop('tag_ids', None)
         instance = super().update(instance, validated_data)
         
         if tag_ids is not None:
-            instance.tags.clear()
-            for tag_id in tag_ids:
-                tag = Tag.objects.get(id=tag_id)
-                CardTag.objects.get_or_create(card=instance, tag=tag)
+            assign_tags({instance.id: tag_ids})
         
         return instance
     
+    @transaction.atomic
     def create(self, validated_data):
         tag_ids = validated_data.pop('tag_ids', None)
         instance = super().create(validated_data)
         
         if tag_ids:
-            for tag_id in tag_ids:
-                tag = Tag.objects.get(id=tag_id)
-                CardTag.objects.get_or_create(card=instance, tag=tag)
+            assign_tags({instance.id: tag_ids}, mode='add')
         
         return instance
+
+
+class CardRetagSerializer(serializers.Serializer):
+    """Смена тегов у многих карточек одним запросом"""
+    card_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=5000)
+    tag_ids = serializers.ListField(child=serializers.IntegerField())
+    mode = serializers.ChoiceField(choices=TAG_MODES, default='set')
+
+    def validate_card_ids(self, value):
+        return validate_ids(Card, value, 'card')
+
+    def validate_tag_ids(self, value):
+        return validate_ids(Tag, value, 'tag')
+
+    def save(self):
+        tag_ids = self.validated_data['tag_ids']
+        added, removed = assign_tags(
+            {card_id: tag_ids for card_id in self.validated_data['card_ids']},
+            mode=self.validated_data['mode'],
+        )
+        return {'cards': len(self.validated_data['card_ids']), 'added': added, 'removed': removed}
@@ -0,0 +1,41 @@
+"""
+Сигналы каталога: любая запись в Card/Series/Tag/CardTag сбрасывает снимок
+
+Массовые записи (bulk_create/bulk_update) сигналов не шлют: такой код
+вызывает catalog_changed() сам и отправляет cards_bulk_updated.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import Signal, receiver
+
+from .models import Series, Card, Tag, CardTag
+from .snapshot import bump_catalog_version
+
+
+# Аргумент changes: {card_id: (before, after)}, где состояние —
+# (rarity, series_id, base_price_rub) существовавшей карточки
+cards_bulk_updated = Signal()
+
+
+def catalog_changed():
+    """Сбрасывает версию каталога после коммита транзакции"""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Series)
+@receiver(post_save, sender=Card)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=CardTag)
+@receiver(post_delete, sender=Series)
+@receiver(post_delete, sender=Card)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=CardTag)
+def on_catalog_write(sender, **kwargs):
+    catalog_changed()
+
+
+@receiver(m2m_changed, sender=Card.tags.through)
+def on_card_tags_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        catalog_changed()
@@ -0,0 +1,91 @@
+"""
+Снимок каталога карточек
+
+Каталог меняется только когда админ редактирует карточки, поэтому полный
+сериализованный список собирается один раз на версию каталога и хранится
+в кэше уже сжатым (gzip и, если доступен модуль brotli, br).
+Версия сбрасывается сигналами при записи Card/Series/Tag/CardTag.
+"""
+
+import gzip
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.versioning import bump_version, get_version
+
+from .models import Card
+from .serializers import CardSerializer
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, отдаём gzip
+    brotli = None
+
+
+VERSION_KEY = 'cards:catalog:version'
+SNAPSHOT_KEY = 'cards:catalog:snapshot:{version}'
+# Устаревшие снимки просто истекают, их ключи больше никто не читает
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def get_catalog_version():
+    """Возвращает текущую версию каталога"""
+    return get_version(VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Сбрасывает снимок: следующий запрос соберёт его заново"""
+    bump_version(VERSION_KEY)
+
+
+def build_snapshot(version):
+    """
+    Собирает снимок каталога
+
+    Returns:
+        Dict с телом ответа в разных кодировках и ETag
+    """
+    queryset = Card.objects.select_related('series').prefetch_related('tags')
+    results = CardSerializer(queryset, many=True).data
+    body = json.dumps(
+        {'version': version, 'count': len(results), 'results': results},
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+    snapshot = {
+        'version': version,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9),
+    }
+    if brotli is not None:
+        snapshot['br'] = brotli.compress(body, quality=11)
+    return snapshot
+
+
+def get_snapshot():
+    """Возвращает снимок для текущей версии каталога, собирая его при промахе"""
+    version = get_catalog_version()
+    key = SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(version)
+        cache.set(key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def pick_encoding(snapshot, accept_encoding):
+    """Выбирает лучшую кодировку из тех, что принимает клиент"""
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in (accept_encoding or '').split(',')
+    }
+    for encoding in ('br', 'gzip'):
+        if encoding in accepted and encoding in snapshot:
+            return encoding
+    return 'identity'
@@ -1,3 +1,411 @@
+"""
+Тесты каталога карточек
+"""
+
+import base64
+import gzip
+import io
+import json
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.cards.catalog import FIXTURES_DIR, CatalogPlan, read_fixture
+from apps.cards.models import Series, Card, Tag, CardTag
+
+
+class CatalogSnapshotTest(TestCase):
+    """Тесты снимка каталога"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.series = Series.objects.create(number=1, title="Test Series")
+        self.card = Card.objects.create(
+            title="Spider-Man", number=1, rarity="o", series=self.series
+        )
+        self.tag = Tag.objects.create(name="Герои")
+        CardTag.objects.create(card=self.card, tag=self.tag)
+
+    def get_catalog(self, **headers):
+        return self.client.get('/api/cards/catalog/', **headers)
+
+    def test_catalog_contains_cards_with_tags(self):
+        """Снимок содержит карточки вместе с серией и тегами"""
+        response = self.get_catalog()
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.content)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['series_title'], "Test Series")
+        self.assertEqual(data['results'][0]['tags'], [{'id': self.tag.id, 'name': "Герои"}])
+
+    def test_snapshot_built_once_per_version(self):
+        """Повторный запрос не обращается к базе"""
+        self.get_catalog()
+        with self.assertNumQueries(0):
+            self.get_catalog()
+
+    def test_gzip_encoding(self):
+        """Клиент с gzip получает сжатое тело"""
+        response = self.get_catalog(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data['count'], 1)
+
+    def test_if_none_match(self):
+        """Совпавший ETag даёт 304 без тела"""
+        etag = self.get_catalog()['ETag']
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_write_invalidates_snapshot(self):
+        """Запись в каталог сбрасывает снимок"""
+        etag = self.get_catalog()['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Card.objects.create(title="Venom", number=2, rarity="ск", series=self.series)
+
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['count'], 2)
+
+    def test_tag_removal_invalidates_snapshot(self):
+        """Снятие тега через связь tags тоже сбрасывает снимок"""
+        self.get_catalog()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.card.tags.clear()
+
+        data = json.loads(self.get_catalog().content)
+        self.assertEqual(data['results'][0]['tags'], [])
+
+
+class CardListPaginationTest(TestCase):
+    """Тесты keyset-пагинации и выборки полей в списке карточек"""
+
+    def setUp(self):
+        self.client = APIClient()
+        series_1 = Series.objects.create(number=1, title="Series 1")
+        series_2 = Series.objects.create(number=2, title="Series 2")
+        # Создаём вперемешку, чтобы порядок определялся сортировкой, а не id
+        for number in (3, 1, 2):
+            Card.objects.create(title=f"S2 #{number}", number=number, rarity="o", series=series_2)
+            Card.objects.create(title=f"S1 #{number}", number=number, rarity="o", series=series_1)
+
+    def test_cursor_walks_in_catalog_order(self):
+        """Курсор обходит каталог по (series__number, number) без пропусков"""
+        titles = []
+        url = '/api/cards/?page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            titles += [card['title'] for card in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(titles, [
+            "S1 #1", "S1 #2", "S1 #3", "S2 #1", "S2 #2", "S2 #3",
+        ])
+
+    def test_cursor_with_descending_ordering(self):
+        """Курсор учитывает ?ordering="""
+        first = self.client.get('/api/cards/?ordering=-title&page_size=2')
+        second = self.client.get(first.data['next'])
+        titles = [card['title'] for card in first.data['results'] + second.data['results']]
+        self.assertEqual(titles, ["S2 #3", "S2 #2", "S2 #1", "S1 #3"])
+
+    def test_invalid_cursor(self):
+        """Битый курсор даёт 404"""
+        response = self.client.get('/api/cards/?cursor=broken')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_wrong_value_types(self):
+        """Курсор с неподходящими типами значений тоже даёт 404, а не 500"""
+        for values in (["x", "y", "z"], [{}, [], 1], [1, 2, "1e"]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get('/api/cards/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, values)
+
+    def test_sparse_fields(self):
+        """?fields= ограничивает ответ и не тянет теги"""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/cards/?fields=id,title,number,rarity')
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'title', 'number', 'rarity'},
+        )
+
+    def test_unknown_field(self):
+        """Неизвестное поле в ?fields= даёт 400"""
+        response = self.client.get('/api/cards/?fields=id,price')
+        self.assertEqual(response.status_code, 400)
+
+
+class CardSearchTest(TestCase):
+    """Тесты поиска по каталогу (индекс в памяти на SQLite)"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        series = Series.objects.create(number=1, title="Series 1")
+        self.spider = Card.objects.create(title="Человек-Паук", number=1, rarity="o", series=series)
+        self.iron = Card.objects.create(title="Железный Человек", number=2, rarity="o", series=series)
+        self.venom = Card.objects.create(title="Веном", number=15, rarity="ск", series=series)
+
+    def search(self, query):
+        response = self.client.get('/api/cards/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [card['title'] for card in response.data['results']]
+
+    def test_ranked_search(self):
+        """Лучшее совпадение идёт первым"""
+        self.assertEqual(self.search("человек паук")[0], "Человек-Паук")
+
+    def test_typo(self):
+        """Опечатка не мешает найти карточку"""
+        self.assertEqual(self.search("Венм"), ["Веном"])
+
+    def test_number(self):
+        """Поиск по номеру карточки"""
+        self.assertEqual(self.search("15")[0], "Веном")
+
+    def test_autocomplete(self):
+        """Автодополнение по префиксу слова"""
+        response = self.client.get('/api/cards/autocomplete/', {'q': 'чел'})
+        ids = {row['id'] for row in response.data['results']}
+        self.assertEqual(ids, {self.spider.id, self.iron.id})
+
+    def test_index_rebuilt_on_catalog_change(self):
+        """Новая карточка находится после смены версии каталога"""
+        self.search("Веном")
+        with self.captureOnCommitCallbacks(execute=True):
+            Card.objects.create(title="Карнаж", number=16, rarity="ук", series=self.spider.series)
+        self.assertEqual(self.search("карнаж"), ["Карнаж"])
+
+    def test_list_search_uses_index(self):
+        """?search= на списке идёт через индекс и понимает опечатки"""
+        response = self.client.get('/api/cards/', {'search': 'Железнй'})
+        self.assertEqual([card['title'] for card in response.data['results']], ["Железный Человек"])
+
+    def test_list_search_binds_ids_as_one_parameter(self):
+        """Найденные id уходят в SQL одним параметром, сколько бы их ни было"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/cards/', {'search': 'Человек'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(any('IN (SELECT value FROM json_each(' in query['sql'] for query in queries))
+
+
+class LoadCatalogTest(TestCase):
+    """Тесты загрузки каталога из фикстур"""
+
+    def load(self, *args):
+        out = io.StringIO()
+        call_command('load_catalog', *args, stdout=out)
+        return out.getvalue()
+
+    def count_load_queries(self, rows):
+        """Запросов на загрузку rows в пустую базу (с чтением состояния; откатывается)"""
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                CatalogPlan(rows).apply()
+            transaction.set_rollback(True)
+        return len(queries)
+
+    def test_bundled_fixtures(self):
+        rows = [row for path in sorted(FIXTURES_DIR.iterdir()) for row in read_fixture(path)[1]]
+        # Без лимита параметров SQLite каждая таблица вставляется одной пачкой,
+        # и весь каталог грузится за столько же запросов, сколько десять карточек
+        with mock.patch.object(connection.features, 'max_query_params', 2 ** 15):
+            self.assertEqual(self.count_load_queries(rows), self.count_load_queries(rows[:10]))
+        CatalogPlan(rows).apply()
+
+        self.assertEqual(Series.objects.count(), 3)
+        self.assertEqual(Card.objects.count(), len(rows))
+        spider_man = Card.objects.get(series__number=1, number=1)
+        self.assertEqual((spider_man.title, spider_man.base_price_rub), ("Человек-Паук", Decimal("52.50")))
+        self.assertEqual(list(spider_man.tags.values_list('name', flat=True)), ["Герой"])
+
+        diff = CatalogPlan(rows).diff()
+        self.assertEqual((diff['cards_created'], diff['cards_updated']), ([], []))
+
+    def test_dry_run_and_update(self):
+        series = Series.objects.create(number=7, title="Old title")
+        Card.objects.create(series=series, number=1, title="Old", rarity="o", notes="keep")
+        fixture = {
+            "version": 2,
+            "series": {"number": 7, "title": "New title"},
+            "cards": [
+                {"number": 1, "title": "New", "rarity": "ск", "price": "10", "tags": ["Герой"]},
+                {"number": 2, "title": "Second", "rarity": "o"},
+            ],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "series_7.json"
+            path.write_text(json.dumps(fixture), encoding="utf-8")
+
+            output = self.load(str(path), "--dry-run")
+            self.assertIn("карточек новых: 1, изменено: 1", output)
+            self.assertEqual(Card.objects.get(series=series, number=1).title, "Old")
+
+            self.load(directory)
+
+        card = Card.objects.get(series=series, number=1)
+        self.assertEqual((card.title, card.rarity, card.base_price_rub), ("New", "ск", Decimal("10.00")))
+        self.assertEqual(Series.objects.get(number=7).title, "New title")
+        self.assertTrue(Card.objects.filter(series=series, number=2).exists())
+
+
+class CardTagAssignmentTest(TestCase):
+    """Тесты смены тегов карточек"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.series = Series.objects.create(number=1, title="Series 1")
+        self.cards = [
+            Card.objects.create(title=f"Card {number}", number=number, rarity="o", series=self.series)
+            for number in range(1, 4)
+        ]
+        self.tags = [Tag.objects.create(name=f"Tag {number}") for number in range(1, 13)]
+
+    def tag_ids(self, card):
+        return sorted(CardTag.objects.filter(card=card).values_list('tag_id', flat=True))
+
+    def test_update_keeps_unchanged_links(self):
+        card = self.cards[0]
+        kept = CardTag.objects.create(card=card, tag=self.tags[0])
+        CardTag.objects.create(card=card, tag=self.tags[1])
+
+        wanted = [self.tags[0].id] + [tag.id for tag in self.tags[2:]]
+        response = self.client.patch(f'/api/cards/{card.id}/', {'tag_ids': wanted}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(tag['id'] for tag in response.data['tags']), sorted(wanted))
+        self.assertEqual(self.tag_ids(card), sorted(wanted))
+        self.assertTrue(CardTag.objects.filter(id=kept.id).exists())
+
+    def test_unknown_tag_rejected(self):
+        card = self.cards[0]
+        CardTag.objects.create(card=card, tag=self.tags[0])
+        response = self.client.patch(f'/api/cards/{card.id}/', {'tag_ids': [self.tags[1].id, 999]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tag_ids', response.data)
+        self.assertEqual(self.tag_ids(card), [self.tags[0].id])
+
+    def test_batch_retag(self):
+        CardTag.objects.create(card=self.cards[0], tag=self.tags[0])
+        card_ids = [card.id for card in self.cards]
+
+        # Проверка id, текущие связи, один DELETE, вставка
+        with self.assertNumQueries(5), self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/cards/retag/', {
+                'card_ids': card_ids, 'tag_ids': [self.tags[1].id, self.tags[2].id],
+            }, format='json')
+        self.assertEqual(response.data, {'cards': 3, 'added': 6, 'removed': 1})
+        # Версия каталога сдвигается один раз на всю пачку
+        self.assertEqual(len(callbacks), 1)
+        for card in self.cards:
+            self.assertEqual(self.tag_ids(card), [self.tags[1].id, self.tags[2].id])
+
+        response = self.client.post('/api/cards/retag/', {
+            'card_ids': card_ids[:2], 'tag_ids': [self.tags[1].id], 'mode': 'remove',
+        }, format='json')
+        self.assertEqual(response.data, {'cards': 2, 'added': 0, 'removed': 2})
+        self.assertEqual(self.tag_ids(self.cards[2]), [self.tags[1].id, self.tags[2].id])
+
+        response = self.client.post('/api/cards/retag/', {'card_ids': [999], 'tag_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_retag_chunks_long_id_lists(self):
+        CardTag.objects.create(card=self.cards[0], tag=self.tags[0])
+        CardTag.objects.create(card=self.cards[1], tag=self.tags[0])
+        card_ids = [card.id for card in self.cards]
+
+        # id по два в IN: проверка карточек 2 + тегов 1, связи 2, DELETE 1, вставка 1
+        with mock.patch('apps.cards.catalog.IDS_PER_QUERY', 2), self.assertNumQueries(7):
+            response = self.client.post('/api/cards/retag/', {
+                'card_ids': card_ids, 'tag_ids': [self.tags[1].id],
+            }, format='json')
+        self.assertEqual(response.data, {'cards': 3, 'added': 3, 'removed': 2})
+        for card in self.cards:
+            self.assertEqual(self.tag_ids(card), [self.tags[1].id])
+
+        response = self.client.post('/api/cards/retag/', {'card_ids': card_ids + [999], 'tag_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CardFacetsTest(TestCase):
+    """Тесты фасетного просмотра каталога"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        series_1 = Series.objects.create(number=1, title="Series 1")
+        series_2 = Series.objects.create(number=2, title="Series 2")
+        self.hero = Tag.objects.create(name="Герой")
+        self.villain = Tag.objects.create(name="Злодей")
+        self.cover = Tag.objects.create(name="Обложка")
+        cards = [
+            ("Человек-Паук", 1, "o", series_1, [self.hero, self.cover]),
+            ("Веном", 2, "ск", series_1, [self.villain]),
+            ("Карнаж", 3, "ук", series_1, [self.villain, self.cover]),
+            ("Мстители", 1, "o", series_2, [self.hero]),
+        ]
+        for title, number, rarity, series, tags in cards:
+            card = Card.objects.create(title=title, number=number, rarity=rarity, series=series)
+            for tag in tags:
+                CardTag.objects.create(card=card, tag=tag)
+        self.series_1, self.series_2 = series_1, series_2
+
+    def facets(self, **params):
+        response = self.client.get('/api/cards/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, data, dimension, key='id'):
+        return {item[key]: item['count'] for item in data['facets'][dimension]}
+
+    def test_tag_intersection_and_counts(self):
+        data = self.facets(tags=f'{self.villain.id},{self.cover.id}')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual([card['title'] for card in data['results']], ["Карнаж"])
+        self.assertEqual(self.counts(data, 'tags')[self.cover.id], 1)
+        self.assertEqual(self.counts(data, 'rarity', 'value'), {'o': 0, 'ск': 0, 'ук': 1})
+
+    def test_own_dimension_ignored_in_counts(self):
+        data = self.facets(rarity='o', series=self.series_1.id)
+        self.assertEqual([card['title'] for card in data['results']], ["Человек-Паук"])
+        # Счётчики редкости — по всей серии 1, счётчики серий — по обычным карточкам
+        self.assertEqual(self.counts(data, 'rarity', 'value'), {'o': 1, 'ск': 1, 'ук': 1})
+        self.assertEqual(self.counts(data, 'series'), {self.series_1.id: 1, self.series_2.id: 1})
+        self.assertEqual(self.counts(data, 'tags'), {self.hero.id: 1, self.villain.id: 0, self.cover.id: 1})
+
+    def test_index_queries_and_rebuild(self):
+        self.facets()
+        # Индекс уже собран: только страница карточек и их теги
+        with self.assertNumQueries(2):
+            data = self.facets(tags=self.hero.id)
+        self.assertEqual(data['count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CardTag.objects.create(card=Card.objects.get(title="Веном"), tag=self.hero)
+        self.assertEqual(self.facets(tags=self.hero.id)['count'], 3)
+
+    def test_search_and_paging(self):
+        data = self.facets(q="Карнаж")
+        self.assertEqual([card['title'] for card in data['results']], ["Карнаж"])
+
+        data = self.facets(limit=2, offset=1)
+        self.assertEqual(data['count'], 4)
+        self.assertEqual([card['title'] for card in data['results']], ["Веном", "Карнаж"])
 
-# Create your tests here.
+        response = self.client.get('/api/cards/facets/', {'tags': 'x'})
+        self.assertEqual(response.status_code, 400)
@@ -1,7 +1,20 @@
 from rest_framework import viewsets, filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.http import HttpResponse
+from django.utils.http import parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Series, Card, Tag
-from .serializers import SeriesSerializer, CardSerializer, CardDetailSerializer, TagSerializer
+from .serializers import (
+    SeriesSerializer, CardSerializer, CardDetailSerializer, CardRetagSerializer, TagSerializer,
+)
+from .snapshot import get_snapshot, pick_encoding
+from .search import search_cards, autocomplete_cards, matching_card_ids
+from .facets import get_facet_index
+from .filters import CardIndexSearchFilter
+from apps.core.mixins import SparseFieldsMixin
+from apps.core.pagination import KeysetPagination
 
 
 class SeriesViewSet(viewsets.ModelViewSet):
@@ -13,9 +26,10 @@ class SeriesViewSet(viewsets.ModelViewSet):
     ordering = ['number']
 
 
-class CardViewSet(viewsets.ModelViewSet):
+class CardViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Card.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, CardIndexSearchFilter, filters.OrderingFilter]
     filterset_fields = ['rarity', 'series']
     search_fields = ['title', 'number']
     ordering_fields = ['number', 'title', 'base_price_rub']
@@ -23,8 +37,16 @@ class CardViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Get queryset with fallback for empty database"""
+        fields = self.get_requested_fields()
         try:
-            return Card.objects.all()
+            queryset = Card.objects.all()
+            if fields is None or 'series_title' in fields:
+                queryset = queryset.select_related('series')
+            if fields is None or 'tags' in fields:
+                queryset = queryset.prefetch_related('tags')
+            if fields is not None:
+                queryset = queryset.only(*self.get_only_fields(fields))
+            return queryset
         except Exception:
             # If database is not initialized, return empty queryset
             return Card.objects.none()
@@ -34,6 +56,156 @@ class CardViewSet(viewsets.ModelViewSet):
             return CardDetailSerializer
         return CardSerializer
 
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """
+        Весь каталог одним ответом из предсобранного снимка
+
+        GET /api/cards/catalog/
+        Поддерживает If-None-Match и отдаёт br/gzip по Accept-Encoding.
+        """
+        snapshot = get_snapshot()
+        etag = quote_etag(snapshot['etag'])
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+            if '*' in etags or etag in etags:
+                response = HttpResponse(status=304)
+                response['ETag'] = etag
+                response['Vary'] = 'Accept-Encoding'
+                return response
+
+        encoding = pick_encoding(snapshot, request.META.get('HTTP_ACCEPT_ENCODING'))
+        response = HttpResponse(snapshot[encoding], content_type='application/json; charset=utf-8')
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        response['X-Catalog-Version'] = snapshot['version']
+        return response
+
+    def _limit_param(self, default, maximum):
+        try:
+            return max(1, min(int(self.request.query_params.get('limit', default)), maximum))
+        except ValueError:
+            return default
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ранжированный поиск по названию и номеру (с учётом опечаток)
+
+        GET /api/cards/search/?q=человек паук&limit=20
+        """
+        query = request.query_params.get('q', '')
+        ranked = search_cards(query, self._limit_param(20, 100))
+
+        cards = Card.objects.select_related('series').prefetch_related('tags').in_bulk(
+            [card_id for card_id, _ in ranked]
+        )
+        ranked = [(cards[card_id], score) for card_id, score in ranked if card_id in cards]
+        data = CardSerializer([card for card, _ in ranked], many=True).data
+        for item, (_, score) in zip(data, ranked):
+            item['score'] = round(float(score), 4)
+
+        return Response({'query': query, 'results': data})
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Подсказки по префиксу
+
+        GET /api/cards/autocomplete/?q=чел&limit=10
+        """
+        ids = autocomplete_cards(request.query_params.get('q', ''), self._limit_param(10, 50))
+        rows = Card.objects.filter(id__in=ids).values('id', 'title', 'number', 'series__number')
+        by_id = {row['id']: row for row in rows}
+        return Response({
+            'results': [by_id[card_id] for card_id in ids if card_id in by_id]
+        })
+
+
+    def _list_param(self, name, cast=str):
+        """?tags=1,2 или ?tags=1&tags=2"""
+        values = [
+            part.strip()
+            for raw in self.request.query_params.getlist(name)
+            for part in raw.split(',') if part.strip()
+        ]
+        try:
+            return [cast(value) for value in values]
+        except ValueError:
+            raise ValidationError({name: 'Expected a comma-separated list of ids'})
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Фасетный просмотр каталога со счётчиками
+
+        GET /api/cards/facets/?tags=1,2&rarity=o,ск&series=3&q=паук&limit=50&offset=0
+        Теги объединяются через И, редкость и серии — через ИЛИ.
+        Счётчики фасетов считаются по индексу в памяти без запросов к базе.
+        """
+        index = get_facet_index()
+        query = request.query_params.get('q', '').strip()
+        base = index.mask(matching_card_ids(query)) if query else None
+        tags = self._list_param('tags', int)
+        rarity = self._list_param('rarity')
+        series = self._list_param('series', int)
+        count, bits, counts = index.select(tags, rarity, series, base)
+
+        try:
+            offset = max(0, int(request.query_params.get('offset', 0)))
+        except ValueError:
+            offset = 0
+        ids = index.page(bits, offset, self._limit_param(50, 500))
+        cards = Card.objects.select_related('series').prefetch_related('tags').in_bulk(ids)
+
+        rarity_labels = dict(Card.RARITY_CHOICES)
+        return Response({
+            'count': count,
+            'results': CardSerializer([cards[card_id] for card_id in ids if card_id in cards], many=True).data,
+            'facets': {
+                'tags': sorted(
+                    (
+                        {'id': tag_id, 'name': index.tag_names.get(tag_id, ''), 'count': value,
+                         'selected': tag_id in tags}
+                        for tag_id, value in counts['tags'].items()
+                    ),
+                    key=lambda item: (-item['count'], item['name']),
+                ),
+                'rarity': [
+                    {'value': code, 'label': label, 'count': counts['rarity'].get(code, 0),
+                     'selected': code in rarity}
+                    for code, label in rarity_labels.items()
+                ],
+                'series': sorted(
+                    (
+                        {'id': series_id, 'number': index.series_info[series_id][0],
+                         'title': index.series_info[series_id][1], 'count': value,
+                         'selected': series_id in series}
+                        for series_id, value in counts['series'].items()
+                        if series_id in index.series_info
+                    ),
+                    key=lambda item: item['number'],
+                ),
+            },
+        })
+
+    @action(detail=False, methods=['post'])
+    def retag(self, request):
+        """
+        Смена тегов у многих карточек
+
+        POST /api/cards/retag/
+        {"card_ids": [1, 2, 3], "tag_ids": [4, 5], "mode": "set" | "add" | "remove"}
+        """
+        serializer = CardRetagSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
+
 
 class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
@@ -0,0 +1,98 @@
+"""
+Пользователи из Telegram-логина
+
+Свободное имя подбирается одним запросом (все занятые base и base_N),
+а гонка двух логинов с одним ником разрешается повтором вставки после
+IntegrityError. Профиль сохраняется только с изменившимися полями.
+"""
+
+import re
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import UserProfile
+
+# Сколько раз повторять вставку при конфликте имени
+MAX_USERNAME_ATTEMPTS = 5
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+
+
+def allocate_username(base):
+    """base, если свободно, иначе base_N с наименьшим свободным N"""
+    # Оставляем место под суффикс
+    base = base[:USERNAME_MAX_LENGTH - 8]
+    taken = set(
+        User.objects.filter(Q(username=base) | Q(username__startswith=f'{base}_'))
+        .values_list('username', flat=True)
+    )
+    if base not in taken:
+        return base
+    pattern = re.compile(rf'{re.escape(base)}_(\d+)')
+    suffixes = {int(match.group(1)) for match in map(pattern.fullmatch, taken) if match}
+    counter = 1
+    while counter in suffixes:
+        counter += 1
+    return f'{base}_{counter}'
+
+
+def create_telegram_user(base_username, first_name='', last_name=''):
+    """Создаёт пользователя с уникальным именем на основе base_username"""
+    for attempt in range(MAX_USERNAME_ATTEMPTS):
+        username = allocate_username(base_username)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(username=username, first_name=first_name, last_name=last_name)
+        except IntegrityError:
+            # Имя заняли параллельным логином — подбираем заново
+            if attempt == MAX_USERNAME_ATTEMPTS - 1:
+                raise
+
+
+def update_profile(profile, values):
+    """
+    Записывает в профиль только изменившиеся поля
+
+    Returns:
+        Список изменённых полей
+    """
+    changed = [field for field, value in values.items() if getattr(profile, field) != value]
+    if changed:
+        for field in changed:
+            setattr(profile, field, values[field])
+        profile.save(update_fields=changed + ['updated_at'])
+    return changed
+
+
+def telegram_profile_values(auth_data):
+    return {
+        'telegram_id': auth_data['id'],
+        'telegram_username': auth_data.get('username', ''),
+        'telegram_first_name': auth_data.get('first_name', ''),
+        'telegram_last_name': auth_data.get('last_name', ''),
+        'telegram_photo_url': auth_data.get('photo_url', ''),
+    }
+
+
+def get_or_create_telegram_user(auth_data):
+    """
+    Returns:
+        (user, created)
+    """
+    telegram_id = auth_data['id']
+    profile = UserProfile.objects.select_related('user').filter(telegram_id=telegram_id).first()
+    created = profile is None
+    if created:
+        user = create_telegram_user(
+            auth_data.get('username') or f'tg_user_{telegram_id}',
+            first_name=auth_data.get('first_name', ''),
+            last_name=auth_data.get('last_name', ''),
+        )
+        # Профиль создаёт сигнал post_save пользователя
+        profile = user.profile
+    else:
+        user = profile.user
+
+    update_profile(profile, telegram_profile_values(auth_data))
+    return user, created
@@ -1,3 +1,52 @@
 from django.contrib import admin
+from django.db.models import F
+from django.utils import timezone
+from django.utils.html import format_html
 
-# Register your models here.
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Страница статуса фоновых задач"""
+
+    list_display = ['id', 'name', 'status', 'progress_bar', 'progress_message', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'created_by']
+    date_hierarchy = 'created_at'
+    fields = [
+        'name', 'status', 'progress_bar', 'progress_message', 'payload', 'result', 'error',
+        'attempts', 'max_attempts', 'run_after', 'locked_by', 'locked_at',
+        'created_by', 'created_at', 'started_at', 'finished_at',
+    ]
+    readonly_fields = fields
+    actions = ['retry_jobs']
+
+    def progress_bar(self, obj):
+        """Прогресс выполнения"""
+        color = {'failed': '#e53935', 'done': '#43a047'}.get(obj.status, '#0088cc')
+        return format_html(
+            '<div style="width: 160px; background: #eee; border-radius: 4px;">'
+            '<div style="width: {}%; background: {}; color: white; padding: 2px 4px; border-radius: 4px; '
+            'white-space: nowrap;">{}/{}</div></div>',
+            obj.progress_percent, color, obj.progress_done, obj.progress_total
+        )
+    progress_bar.short_description = 'Прогресс'
+
+    def retry_jobs(self, request, queryset):
+        """
+        Вернуть упавшие задачи в очередь
+
+        Счётчик попыток не сбрасывается, а к лимиту добавляется одна:
+        обработчик видит, что это повтор, и продолжает с места остановки.
+        """
+        updated = queryset.filter(status='failed').update(
+            status='queued', max_attempts=F('attempts') + 1, error='',
+            finished_at=None, run_after=timezone.now(),
+        )
+        self.message_user(request, f'🔁 Возвращено в очередь: {updated}', level='success')
+    retry_jobs.short_description = '🔁 Повторить упавшие задачи'
+
+    def has_add_permission(self, request):
+        """Задачи ставит код, а не админ"""
+        return False
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        from . import images  # noqa: F401  (обработчик задачи вариантов картинок)
+        from . import metrics
+        from .telegram_auth import derive_secret_key
+
+        # Ключ проверки Telegram-логина считаем один раз при старте
+        if settings.TELEGRAM_BOT_TOKEN:
+            derive_secret_key(settings.TELEGRAM_BOT_TOKEN)
+
+        if settings.METRICS_ENABLED:
+            metrics.enable()
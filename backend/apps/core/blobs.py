@@ -0,0 +1,157 @@
+"""
+Учёт ссылок на блобы хранилища по содержимому и сборка мусора
+
+Каждый Blob знает, сколько полей моделей на него ссылается. Поля
+подключаются в ready() приложения:
+
+    blobs.track(CardImage, 'image')
+
+Сохранение объекта с новым файлом увеличивает счётчик нового блоба и
+уменьшает счётчик старого, удаление объекта — уменьшает. Счётчики
+меняются в той же транзакции, что и сама запись.
+
+Блобы без ссылок удаляет `python manage.py gc_blobs`, но только старше
+grace-периода: файл пишется до коммита записи, которая на него сошлётся.
+`--recount` пересчитывает счётчики по полям моделей заново.
+
+Одинаковые байты могут загружаться одновременно: запись о блобе
+создаётся через INSERT с игнорированием конфликта, а не «update, иначе
+create». Сборщик удаляет блоб под блокировкой строки, перепроверив её, а
+загрузка после регистрации ещё раз проверяет файл (см. storage._save).
+"""
+
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from .models import Blob
+from .storage import blob_storage, is_blob_name
+
+# app_label.model_name -> поля с файлами
+TRACKED = {}
+
+
+def create_blob_row(name, digest, size=0):
+    """Запись о блобе; если её параллельно создал другой запрос — ничего не делает"""
+    Blob.objects.bulk_create([Blob(name=name, sha256=digest, size=size)], ignore_conflicts=True)
+
+
+def register_blob(digest, name, size):
+    """Запись о блобе (счётчик ссылок пока 0, его меняют сохранения полей)"""
+    # Повторная загрузка продлевает grace-период: сборщик не удалит блоб до коммита ссылки
+    if not Blob.objects.filter(name=name).update(updated_at=timezone.now()):
+        create_blob_row(name, digest, size)
+
+
+def change_refcount(name, delta):
+    if not is_blob_name(name):
+        return
+    values = {'refcount': F('refcount') + delta, 'updated_at': timezone.now()}
+    if not Blob.objects.filter(name=name).update(**values) and delta > 0:
+        # Файл записан в обход storage (или до учёта) — заводим запись
+        create_blob_row(name, os.path.splitext(os.path.basename(name))[0])
+        Blob.objects.filter(name=name).update(**values)
+
+
+def field_names(instance, skip_deferred=False):
+    deferred = instance.get_deferred_fields() if skip_deferred else ()
+    return {
+        field: getattr(instance, field).name or ''
+        for field in TRACKED[instance._meta.label_lower]
+        if field not in deferred
+    }
+
+
+def remember_names(sender, instance, **kwargs):
+    # Отложенные поля (only/defer) не подгружаем — иначе запрос на каждый объект
+    instance._blob_names = field_names(instance, skip_deferred=True)
+
+
+def on_saved(sender, instance, update_fields=None, **kwargs):
+    before = getattr(instance, '_blob_names', {})
+    after = field_names(instance, skip_deferred=True)
+    for field, name in after.items():
+        # Старое имя неизвестно (поле было отложено) — поправит gc_blobs --recount
+        if field not in before or (update_fields is not None and field not in update_fields):
+            continue
+        if name != before[field]:
+            change_refcount(name, 1)
+            change_refcount(before[field], -1)
+    instance._blob_names = {**before, **after}
+
+
+def on_deleted(sender, instance, **kwargs):
+    names = getattr(instance, '_blob_names', None)
+    if names is None:
+        names = field_names(instance)
+    for name in names.values():
+        change_refcount(name, -1)
+
+
+def track(model, *fields):
+    """Считает ссылки полей model.fields на блобы"""
+    label = model._meta.label_lower
+    TRACKED[label] = TRACKED.get(label, ()) + fields
+    uid = f'blobs:{label}'
+    post_init.connect(remember_names, sender=model, dispatch_uid=uid)
+    post_save.connect(on_saved, sender=model, dispatch_uid=uid)
+    post_delete.connect(on_deleted, sender=model, dispatch_uid=uid)
+
+
+def count_references():
+    """{имя блоба: число ссылок} по всем отслеживаемым полям"""
+    references = Counter()
+    for label, fields in TRACKED.items():
+        model = apps.get_model(label)
+        for field in fields:
+            names = model.objects.filter(**{f'{field}__startswith': 'blobs/'}).values_list(field, flat=True)
+            references.update(names.iterator())
+    return references
+
+
+def recount():
+    """Пересчитывает refcount по полям моделей; возвращает число исправленных"""
+    references = count_references()
+    fixed = []
+    for blob in Blob.objects.only('id', 'name', 'refcount').iterator():
+        actual = references.get(blob.name, 0)
+        if blob.refcount != actual:
+            blob.refcount = actual
+            fixed.append(blob)
+    Blob.objects.bulk_update(fixed, ['refcount'], batch_size=500)
+    return len(fixed)
+
+
+def collect_garbage(grace=timedelta(hours=1), dry_run=False):
+    """
+    Удаляет блобы без ссылок, не менявшиеся дольше grace
+
+    Returns:
+        (число блобов, освобождено байт)
+    """
+    cutoff = timezone.now() - grace
+    orphans = list(Blob.objects.filter(refcount__lte=0, updated_at__lt=cutoff))
+    if dry_run:
+        return len(orphans), sum(blob.size for blob in orphans)
+
+    removed = freed = 0
+    for blob in orphans:
+        with transaction.atomic():
+            # Условие ещё раз и под блокировкой: блоб могли загрузить повторно, пока шла сборка.
+            # Загрузка, обновляющая ту же строку, ждёт коммита и после него перепроверит файл
+            locked = Blob.objects.select_for_update().filter(
+                id=blob.id, refcount__lte=0, updated_at__lt=cutoff,
+            ).first()
+            if locked is None:
+                continue
+            locked.delete()
+            blob_storage.delete_blob(locked.name)
+        removed += 1
+        freed += locked.size
+    return removed, freed
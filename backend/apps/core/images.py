@@ -0,0 +1,282 @@
+"""
+Варианты загруженных изображений
+
+Оригинал загрузки хранится как есть, а после коммита в очередь
+(apps.core.jobs) ставится задача: воркер делает уменьшенные копии
+thumb/medium/full в WebP и AVIF (medium ещё и в JPEG — Telegram не
+принимает WebP как фото), без EXIF/ICC, с учётом ориентации. Форматы
+кодируются параллельно в пуле потоков (Pillow отпускает GIL).
+
+Файлы вариантов названы по SHA-256 содержимого, поэтому одинаковые
+картинки не пишутся дважды, а имена можно кэшировать навсегда. Если
+тот же файл (одно имя в blobs/) уже обработан у другой строки, её
+карта вариантов копируется без рендера.
+Карта вариантов хранится в JSONField рядом с полем картинки:
+
+    {'source': 'cards/original/x.jpg',
+     'thumb': {'width': 160, 'height': 120, 'webp': 'variants/ab/ab12….webp', 'avif': ...},
+     'medium': {...}, 'full': {...}}
+
+Поле подключается один раз в ready() приложения:
+
+    images.track(CardImage, 'image', 'variants')
+
+Файлы вариантов не считаются как блобы: `gc_blobs` удаляет из variants/
+те, на которые не ссылается ни одна карта вариантов, если они старше
+grace-периода (collect_variants).
+"""
+
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .jobs import enqueue, job_handler
+
+# Наибольшая сторона варианта, px (меньшие картинки не увеличиваются)
+VARIANTS = {'thumb': 160, 'medium': 800, 'full': 2048}
+FORMATS = ['webp'] + (['avif'] if features.check('avif') else [])
+EXTRA_FORMATS = {'medium': ['jpeg']}
+QUALITY = {'webp': 80, 'avif': 60, 'jpeg': 85}
+EXTENSIONS = {'webp': 'webp', 'avif': 'avif', 'jpeg': 'jpg'}
+VARIANTS_DIR = 'variants'
+
+IMAGE_VARIANTS_JOB = 'core.image_variants'
+
+# (app_label.model_name, поле картинки) -> поле карты вариантов
+TRACKED = {}
+
+
+def variant_formats(variant):
+    return FORMATS + EXTRA_FORMATS.get(variant, [])
+
+
+def load_image(data):
+    """Открывает картинку, поворачивает по EXIF и отбрасывает метаданные"""
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.info = {}
+    return image
+
+
+def encode(image, fmt):
+    if fmt == 'jpeg' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=QUALITY[fmt])
+    return buffer.getvalue()
+
+
+def render_variants(data, workers=None):
+    """
+    Returns:
+        {variant: (width, height, {format: bytes})}
+    """
+    image = load_image(data)
+    resized = {}
+    for variant, size in VARIANTS.items():
+        copy = image.copy()
+        copy.thumbnail((size, size), Image.LANCZOS)
+        resized[variant] = copy
+
+    tasks = [(variant, fmt) for variant in VARIANTS for fmt in variant_formats(variant)]
+    with ThreadPoolExecutor(max_workers=workers or settings.IMAGE_PIPELINE_WORKERS) as pool:
+        encoded = pool.map(lambda task: encode(resized[task[0]], task[1]), tasks)
+        rendered = {variant: (img.width, img.height, {}) for variant, img in resized.items()}
+        for (variant, fmt), blob in zip(tasks, encoded):
+            rendered[variant][2][fmt] = blob
+    return rendered
+
+
+def hashed_name(blob, fmt):
+    digest = hashlib.sha256(blob).hexdigest()[:32]
+    return f"{VARIANTS_DIR}/{digest[:2]}/{digest}.{EXTENSIONS[fmt]}"
+
+
+def store_variants(source_name, rendered, storage=default_storage):
+    """Сохраняет варианты (уже существующие файлы не переписываются) и возвращает карту"""
+    variants = {'source': source_name}
+    for variant, (width, height, blobs) in rendered.items():
+        entry = {'width': width, 'height': height}
+        for fmt, blob in blobs.items():
+            name = hashed_name(blob, fmt)
+            if not storage.exists(name):
+                storage.save(name, ContentFile(blob))
+            else:
+                # Свежее время изменения: сборщик не удалит файл до коммита карты
+                os.utime(storage.path(name))
+            entry[fmt] = name
+        variants[variant] = entry
+    return variants
+
+
+def variant_name(variants, variant, fmt='webp'):
+    return (variants or {}).get(variant, {}).get(fmt)
+
+
+def variant_url(variants, variant, fmt='webp', fallback=None):
+    """URL варианта; пока варианты не готовы — URL оригинала (fallback — FieldFile)"""
+    name = variant_name(variants, variant, fmt)
+    if name:
+        return default_storage.url(name)
+    return fallback.url if fallback else None
+
+
+def variant_urls(variants):
+    """{variant: {'width', 'height', format: url}} для API"""
+    return {
+        variant: {
+            key: default_storage.url(value) if key in EXTENSIONS else value
+            for key, value in entry.items()
+        }
+        for variant, entry in (variants or {}).items()
+        if variant in VARIANTS
+    }
+
+
+def read_variant(field_file, variants, variant, fmt):
+    """Байты варианта, а если его ещё нет — оригинала"""
+    name = variant_name(variants, variant, fmt)
+    if name:
+        with default_storage.open(name) as f:
+            return f.read()
+    with field_file.open('rb') as f:
+        return f.read()
+
+
+def needs_variants(instance, field, variants_field):
+    name = getattr(instance, field).name
+    return bool(name) and (getattr(instance, variants_field) or {}).get('source') != name
+
+
+def reuse_variants(model, instance, field, variants_field):
+    """
+    Берёт карту вариантов у другой строки с тем же файлом
+
+    С дедупликацией повторная загрузка той же картинки получает то же
+    имя в blobs/, и рендерить её заново незачем.
+
+    Returns:
+        True, если карта найдена и записана в instance
+    """
+    name = getattr(instance, field).name
+    variants = (
+        model.objects.filter(**{field: name, f'{variants_field}__source': name})
+        .exclude(pk=instance.pk)
+        .values_list(variants_field, flat=True)
+        .first()
+    )
+    if not variants:
+        return False
+    model.objects.filter(pk=instance.pk, **{field: name}).update(**{variants_field: variants})
+    setattr(instance, variants_field, variants)
+    return True
+
+
+def on_image_saved(sender, instance, **kwargs):
+    label = sender._meta.label_lower
+    for (tracked, field), variants_field in TRACKED.items():
+        if tracked != label:
+            continue
+        if needs_variants(instance, field, variants_field):
+            if reuse_variants(sender, instance, field, variants_field):
+                continue
+            payload = {'model': label, 'pk': instance.pk, 'field': field}
+            transaction.on_commit(lambda payload=payload: enqueue(IMAGE_VARIANTS_JOB, payload))
+        elif not getattr(instance, field).name and getattr(instance, variants_field):
+            # Картинку убрали — варианты больше не нужны
+            sender.objects.filter(pk=instance.pk).update(**{variants_field: {}})
+            setattr(instance, variants_field, {})
+
+
+def track(model, field, variants_field):
+    """Делает варианты для model.field при каждой новой загрузке"""
+    TRACKED[(model._meta.label_lower, field)] = variants_field
+    post_save.connect(on_image_saved, sender=model, dispatch_uid=f'image_variants:{model._meta.label_lower}')
+
+
+@job_handler(IMAGE_VARIANTS_JOB)
+def build_variants(job):
+    model = apps.get_model(job.payload['model'])
+    field = job.payload['field']
+    variants_field = TRACKED[(model._meta.label_lower, field)]
+    instance = model.objects.filter(pk=job.payload['pk']).first()
+    # Объект удалён или картинку уже заменили (под неё своя задача)
+    if instance is None or not needs_variants(instance, field, variants_field):
+        return
+    # Та же картинка могла успеть обработаться у другой строки
+    if reuse_variants(model, instance, field, variants_field):
+        job.result['source'] = getattr(instance, field).name
+        return
+
+    field_file = getattr(instance, field)
+    with field_file.open('rb') as f:
+        rendered = render_variants(f.read())
+    variants = store_variants(field_file.name, rendered)
+    # update, а не save: без повторного post_save
+    model.objects.filter(pk=instance.pk, **{field: field_file.name}).update(**{variants_field: variants})
+    job.result['source'] = field_file.name
+
+
+def referenced_variants():
+    """Имена файлов из всех карт вариантов"""
+    names = set()
+    for (label, field), variants_field in TRACKED.items():
+        model = apps.get_model(label)
+        for variants in model.objects.exclude(**{variants_field: {}}).values_list(variants_field, flat=True).iterator():
+            for entry in (variants or {}).values():
+                if isinstance(entry, dict):
+                    names.update(value for key, value in entry.items() if key in EXTENSIONS)
+    return names
+
+
+def stored_variants(storage=default_storage, directory=VARIANTS_DIR):
+    if not storage.exists(directory):
+        return
+    subdirs, files = storage.listdir(directory)
+    for name in files:
+        yield f'{directory}/{name}'
+    for subdir in subdirs:
+        yield from stored_variants(storage, f'{directory}/{subdir}')
+
+
+def collect_variants(grace, dry_run=False, storage=default_storage):
+    """
+    Удаляет файлы вариантов, на которые не ссылается ни одна карта
+
+    Файл пишется до коммита карты, поэтому файлы моложе grace не трогаем.
+    Ссылки собираются после списка файлов: карта, закоммиченная раньше,
+    в них уже есть.
+
+    Returns:
+        (число файлов, освобождено байт)
+    """
+    cutoff = timezone.now() - grace
+    candidates = [name for name in stored_variants(storage) if storage.get_modified_time(name) < cutoff]
+    referenced = referenced_variants()
+    removed = freed = 0
+    for name in candidates:
+        if name in referenced:
+            continue
+        # Время ещё раз: задача могла взять существующий файл, пока шёл сбор ссылок
+        if not dry_run and storage.get_modified_time(name) >= cutoff:
+            continue
+        size = storage.size(name)
+        if not dry_run:
+            storage.delete(name)
+        removed += 1
+        freed += size
+    return removed, freed
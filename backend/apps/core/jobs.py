@@ -0,0 +1,194 @@
+"""
+Очередь фоновых задач в БД
+
+Долгая работа (рассылки, завершение брейков) не выполняется в запросе:
+запрос ставит Job в очередь и сразу отвечает, а воркер
+`python manage.py run_jobs` выполняет задачи по одной.
+
+Обработчик регистрируется декоратором и получает Job:
+
+    @job_handler('telegram_bot.notify_winners')
+    def notify_winners(job):
+        for i, winner_id in enumerate(job.payload['winner_ids'], 1):
+            ...
+            set_progress(job, i, message=...)
+
+Забор задачи — условный UPDATE по status='queued', поэтому несколько
+воркеров не возьмут одну задачу. Упавшая задача повторяется с
+экспоненциальной задержкой, пока не кончатся попытки.
+
+set_progress() — ещё и heartbeat: продлевает блокировку задачи. Задача,
+чей воркер не подавал признаков жизни дольше JOB_LOCK_TIMEOUT,
+возвращается в очередь (или, если попытка была последней, помечается
+failed). Если воркер всё-таки жив, следующий set_progress() бросит
+LockLost, и он остановится, не мешая новому владельцу задачи.
+"""
+
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Задержка перед первым повтором, дальше удваивается
+RETRY_DELAY = timedelta(seconds=30)
+# Сколько кандидатов перебирать за одну попытку забора
+CLAIM_CANDIDATES = 5
+
+HANDLERS = {}
+
+
+class LockLost(Exception):
+    """Задачу забрали у воркера по JOB_LOCK_TIMEOUT — её ведёт другой воркер"""
+
+
+def job_handler(name):
+    """Регистрирует обработчик задач name"""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, created_by='', max_attempts=3, total=0):
+    """Ставит задачу в очередь; воркер увидит её после коммита транзакции"""
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown job: {name}")
+    return Job.objects.create(
+        name=name, payload=payload or {}, created_by=created_by,
+        max_attempts=max_attempts, progress_total=total,
+    )
+
+
+def set_progress(job, done, total=None, message=None):
+    """
+    Сохраняет прогресс задачи (и job.result — сделанное на случай повтора)
+    и продлевает блокировку воркера
+
+    Raises:
+        LockLost: задачу уже вернули в очередь или отдали другому воркеру
+    """
+    job.progress_done = done
+    fields = ['progress_done', 'result']
+    if total is not None:
+        job.progress_total = total
+        fields.append('progress_total')
+    if message is not None:
+        job.progress_message = message[:255]
+        fields.append('progress_message')
+    job.locked_at = timezone.now()
+    updated = Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by).update(
+        locked_at=job.locked_at, **{field: getattr(job, field) for field in fields}
+    )
+    if not updated:
+        raise LockLost(f"Job {job.pk} is no longer locked by {job.locked_by}")
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def requeue_stale(now=None):
+    """
+    Задачи, чей воркер молчит дольше JOB_LOCK_TIMEOUT: возвращает в очередь,
+    а упавшие на последней попытке помечает failed
+
+    Returns:
+        Сколько задач возвращено в очередь
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status='running', locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT),
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', finished_at=now,
+        error=f"Worker stopped responding for over {settings.JOB_LOCK_TIMEOUT}s on the last attempt",
+    )
+    return stale.filter(attempts__lt=F('max_attempts')).update(status='queued', locked_by='', run_after=now)
+
+
+def claim_job(worker_id):
+    """Забирает следующую готовую задачу или возвращает None"""
+    now = timezone.now()
+    candidates = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now,
+            started_at=now, attempts=F('attempts') + 1, progress_done=0,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """Выполняет задачу и записывает итог: done, повтор или failed"""
+    handler = HANDLERS.get(job.name)
+    worker_id = job.locked_by
+    try:
+        if handler is None:
+            raise LookupError(f"Unknown job: {job.name}")
+        handler(job)
+    except LockLost:
+        # Итог запишет новый владелец задачи
+        logger.warning(f"Job {job.pk} ({job.name}) lost its lock, stopping")
+        return job
+    except Exception:
+        logger.exception(f"Job {job.pk} ({job.name}) failed, attempt {job.attempts}/{job.max_attempts}")
+        job.error = traceback.format_exc()[-4000:]
+        job.locked_by = ''
+        if handler is not None and job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+    else:
+        job.status = 'done'
+        job.error = ''
+        job.locked_by = ''
+        job.finished_at = timezone.now()
+        job.progress_done = max(job.progress_done, job.progress_total)
+    fields = ['status', 'error', 'locked_by', 'run_after', 'finished_at', 'progress_done', 'result']
+    # Только если задача всё ещё наша: иначе перезапишем итог другого воркера
+    updated = Job.objects.filter(pk=job.pk, status='running', locked_by=worker_id).update(
+        **{field: getattr(job, field) for field in fields}
+    )
+    if not updated:
+        logger.warning(f"Job {job.pk} ({job.name}) lost its lock before finishing")
+    return job
+
+
+def work(worker_id=None, once=False, idle_sleep=2.0, max_jobs=None):
+    """
+    Цикл воркера
+
+    Args:
+        once: выйти, когда очередь опустела
+        max_jobs: выйти после стольких задач
+
+    Returns:
+        Сколько задач выполнено
+    """
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        requeue_stale()
+        job = claim_job(worker_id)
+        if job is None:
+            if once:
+                break
+            time.sleep(idle_sleep)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,36 @@
+"""
+Management команда для сборки мусора в хранилище по содержимому
+
+Использование:
+    python manage.py gc_blobs                  # удалить блобы и варианты картинок без ссылок
+    python manage.py gc_blobs --recount        # сначала пересчитать ссылки по полям
+    python manage.py gc_blobs --dry-run
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.core.blobs import collect_garbage, recount
+from apps.core.images import collect_variants
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы хранилища, на которые не ссылается ни одно поле'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help='Пересчитать ссылки по полям моделей')
+        parser.add_argument('--grace-hours', type=float, default=1, help='Не трогать блобы моложе (ч)')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = recount()
+            self.stdout.write(f"🔢 Исправлено счётчиков: {fixed}")
+
+        grace = timedelta(hours=options['grace_hours'])
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        removed, freed = collect_garbage(grace, dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} блобов: {removed}, {freed / 1024 / 1024:.1f} МБ"))
+        removed, freed = collect_variants(grace, dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} вариантов: {removed}, {freed / 1024 / 1024:.1f} МБ"))
@@ -0,0 +1,25 @@
+"""
+Management команда для чистки сгенерированных картинок (QR-коды, метки)
+
+Использование:
+    python manage.py prune_generated           # удалить прошлые версии рендера
+    python manage.py prune_generated --all     # удалить всё, нужное перерисуется
+    python manage.py prune_generated --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.core.media import prune_generated
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из generated/ картинки прошлых версий рендера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Удалить и текущую версию (файлы удалённых карт)')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено')
+
+    def handle(self, *args, **options):
+        removed, freed = prune_generated(everything=options['all'], dry_run=options['dry_run'])
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} файлов: {removed}, {freed / 1024 / 1024:.1f} МБ"))
@@ -0,0 +1,37 @@
+"""
+Management команда для фоновой перепроверки подписок на канал
+
+Использование:
+    python manage.py refresh_subscriptions            # одна пачка (для cron)
+    python manage.py refresh_subscriptions --loop     # постоянный воркер
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.subscriptions import SubscriptionRefresher
+
+
+class Command(BaseCommand):
+    help = 'Перепроверяет устаревшие подписки пользователей на Telegram-канал'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=8, help='Одновременных запросов к Bot API')
+        parser.add_argument('--loop', action='store_true', help='Работать постоянно')
+        parser.add_argument('--interval', type=float, default=30, help='Пауза, когда проверять нечего (сек)')
+
+    def handle(self, *args, **options):
+        refresher = SubscriptionRefresher(concurrency=options['concurrency'])
+        while True:
+            report = refresher.run_batch(options['batch_size'])
+            if report['checked']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Проверено: {report['checked']}, подписаны: {report['subscribed']}, ошибок: {report['errors']}"
+                ))
+            if not options['loop']:
+                break
+            # Полная пачка — возможно, есть ещё устаревшие профили
+            if report['checked'] < options['batch_size']:
+                time.sleep(options['interval'])
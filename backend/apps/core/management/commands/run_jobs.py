@@ -0,0 +1,24 @@
+"""
+Management команда — воркер очереди фоновых задач
+
+Использование:
+    python manage.py run_jobs           # постоянный воркер
+    python manage.py run_jobs --once    # выполнить очередь и выйти (для cron)
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.core.jobs import work
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Выйти, когда очередь опустеет')
+        parser.add_argument('--sleep', type=float, default=2, help='Пауза, когда задач нет (сек)')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Выйти после стольких задач')
+
+    def handle(self, *args, **options):
+        processed = work(once=options['once'], idle_sleep=options['sleep'], max_jobs=options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Выполнено задач: {processed}"))
@@ -0,0 +1,277 @@
+"""
+Отдача медиафайлов
+
+Файл не читается в память: его стримит FileResponse, а если настроен
+MEDIA_SENDFILE — отдаёт прокси перед Django:
+
+    MEDIA_SENDFILE = 'x-accel-redirect'   # nginx, internal location MEDIA_SENDFILE_PREFIX -> MEDIA_ROOT
+    MEDIA_SENDFILE = 'x-sendfile'         # Apache mod_xsendfile / lighttpd
+
+Поддерживаются Range (один диапазон, 206/416) и условные запросы
+(If-None-Match / If-Modified-Since -> 304). Имена по хэшу содержимого
+(blobs/, variants/, generated/) никогда не меняют содержимое и
+кэшируются на год с immutable, остальные — на MEDIA_CACHE_MAX_AGE.
+
+Детерминированные картинки (QR-коды, метки) рисуются один раз и
+кладутся в generated/<kind>/v<version>/ через cached_render(). Версию
+рендера поднимают при любом изменении вида картинки — иначе клиенты
+годами держали бы старый файл из кэша. Каталоги прошлых версий и файлы
+удалённых карт чистит prune_generated (manage.py prune_generated).
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.urls import re_path
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .images import VARIANTS_DIR
+from .storage import BLOBS_DIR
+
+GENERATED_DIR = 'generated'
+HASHED_DIRS = (BLOBS_DIR, VARIANTS_DIR, GENERATED_DIR)
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Форматы, которых может не быть в mimetypes системы
+CONTENT_TYPES = {'.webp': 'image/webp', '.avif': 'image/avif'}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def is_hashed_name(name):
+    return name.split('/', 1)[0] in HASHED_DIRS
+
+
+def content_type(name):
+    extension = os.path.splitext(name)[1].lower()
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def file_etag(name, stat):
+    if is_hashed_name(name):
+        # Хэш уже в имени — файл не нужно перечитывать
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_range(header, size):
+    """
+    Разбирает Range: bytes=a-b
+
+    Returns:
+        (start, end) включительно или None — отдать файл целиком
+        (нет заголовка, несколько диапазонов, непонятный формат)
+
+    Raises:
+        UnsatisfiableRange: диапазон за пределами файла
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if not length or not size:
+            raise UnsatisfiableRange
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise UnsatisfiableRange
+    return start, end
+
+
+def range_applies(request, etag, last_modified):
+    """If-Range: диапазон только если файл не менялся, иначе — целиком"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+class RangeFile:
+    """Файл, из которого читается только [start, start + length)"""
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self.file = f
+        self.remaining = length
+        self.name = f.name
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def add_cache_headers(response, name, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_hashed_name(name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def sendfile_response(name, path):
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX.rstrip('/') + '/' + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve_file(request, name, storage=default_storage, filename=None, as_attachment=False):
+    """
+    Ответ с файлом name из storage (Range, 304, sendfile)
+
+    Args:
+        filename: имя для Content-Disposition
+        as_attachment: скачать, а не показать
+    """
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Удалённое хранилище — пусть отдаёт само
+        return HttpResponseRedirect(storage.url(name))
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404(name)
+    if not os.path.isfile(path):
+        raise Http404(name)
+
+    etag = file_etag(name, stat)
+    last_modified = stat.st_mtime
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if not_modified is not None:
+        return add_cache_headers(not_modified, name, etag, last_modified)
+
+    if settings.MEDIA_SENDFILE:
+        # Range и отдачу байт берёт на себя прокси
+        response = sendfile_response(name, path)
+        response['Content-Type'] = content_type(name)
+        if filename or as_attachment:
+            response['Content-Disposition'] = content_disposition_header(
+                as_attachment, filename or os.path.basename(name)
+            )
+        return add_cache_headers(response, name, etag, last_modified)
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except UnsatisfiableRange:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range and not range_applies(request, etag, last_modified):
+        byte_range = None
+
+    f = open(path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(f, start, length), status=206, content_type=content_type(name),
+            as_attachment=as_attachment, filename=filename or '',
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(
+            f, content_type=content_type(name), as_attachment=as_attachment, filename=filename or '',
+        )
+    response['Accept-Ranges'] = 'bytes'
+    return add_cache_headers(response, name, etag, last_modified)
+
+
+@require_safe
+def serve_media(request, path):
+    """GET MEDIA_URL<path>"""
+    if any(part.startswith('.') for part in path.split('/')):
+        # Временные файлы загрузки и прочие скрытые
+        raise Http404(path)
+    return serve_file(request, path)
+
+
+def media_urlpatterns():
+    """Маршрут MEDIA_URL (если медиа не на отдельном домене/CDN)"""
+    if not settings.MEDIA_URL or urlsplit(settings.MEDIA_URL).netloc:
+        return []
+    prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    return [re_path(rf'^{prefix}(?P<path>.+)$', serve_media, name='media')]
+
+
+def cached_render(kind, version, key, render, extension='png'):
+    """
+    Имя сгенерированной картинки в default_storage
+
+    Картинка однозначно определяется версией рендера и key (всё, от
+    чего она зависит), поэтому render() вызывается только при первом
+    запросе.
+    """
+    digest = hashlib.sha256('\x00'.join(map(str, [kind, version, *key])).encode()).hexdigest()[:32]
+    name = f"{GENERATED_DIR}/{kind}/v{version}/{digest[:2]}/{digest}.{extension}"
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(render().getvalue()))
+    return name
+
+
+def walk_files(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield f"{path}/{name}"
+    for directory in directories:
+        yield from walk_files(storage, f"{path}/{directory}")
+
+
+def prune_generated(everything=False, dry_run=False, storage=default_storage):
+    """
+    Удаляет из generated/ каталоги прошлых версий рендера
+
+    Для каждого kind остаётся только старшая версия v<N>, которая есть
+    на диске. С everything=True удаляется всё: файлы удалённых карт тоже
+    уходят, а нужные перерисуются при следующем запросе.
+
+    Returns:
+        (число удалённых файлов, освобождено байт)
+    """
+    if not storage.exists(GENERATED_DIR):
+        return 0, 0
+    removed = freed = 0
+    for kind in storage.listdir(GENERATED_DIR)[0]:
+        versions = sorted(
+            int(name[1:]) for name in storage.listdir(f"{GENERATED_DIR}/{kind}")[0]
+            if name[:1] == 'v' and name[1:].isdigit()
+        )
+        stale = versions if everything else versions[:-1]
+        for version in stale:
+            for name in walk_files(storage, f"{GENERATED_DIR}/{kind}/v{version}"):
+                removed += 1
+                freed += storage.size(name)
+                if not dry_run:
+                    storage.delete(name)
+    return removed, freed
@@ -0,0 +1,341 @@
+"""
+Метрики производительности запросов
+
+Каждый HTTP-запрос (PerformanceMiddleware) и каждый апдейт бота
+(InstrumentedApplication) измеряется через measure(): время, число
+SQL-запросов, время в БД, повторы одного и того же запроса (N+1)
+и размер ответа. Запросы к БД считает обёртка execute, которая ставится
+на каждое соединение при его открытии и смотрит в contextvar — так
+учитываются и запросы из потоков sync_to_async в боте.
+
+Агрегаты копятся по маршрутам в гистограммах процесса и раз в
+METRICS_FLUSH_INTERVAL секунд пишутся в кэш; эндпоинт /api/metrics/
+(только для staff) складывает снимки всех процессов — воркеров gunicorn
+и бота — и отдаёт их в формате Prometheus с p50/p95/p99. С LocMemCache
+(если его явно включить в CACHES) кэш у каждого процесса свой, и видны
+только метрики того воркера, который ответил на запрос.
+
+Запрос дольше METRICS_SLOW_REQUEST_MS или с числом SQL/повторов выше
+METRICS_MAX_QUERIES / METRICS_MAX_DUPLICATE_QUERIES пишется в лог
+предупреждением.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы времени, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUANTILES = (0.5, 0.95, 0.99)
+# Сверх стольких маршрутов всё пишется в OTHER_ROUTE (защита от мусорных URL/команд)
+MAX_ROUTES = 500
+OTHER_ROUTE = '<other>'
+UNMATCHED_ROUTE = '<unmatched>'
+
+CACHE_INDEX_KEY = 'metrics:processes'
+SNAPSHOT_TTL = 60 * 60
+
+SUMS = ('duration', 'queries', 'sql_time', 'duplicates', 'size')
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Замеры одного запроса"""
+
+    def __init__(self, route=UNMATCHED_ROUTE, method=''):
+        self.route = route
+        self.method = method
+        self.status = 0
+        self.size = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+
+    @property
+    def duplicates(self):
+        """Сколько запросов повторили уже выполненный с теми же параметрами"""
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_duplicated(self):
+        sql, count = max(self.statements.items(), key=lambda item: item[1])
+        return sql[0], count
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка execute: считает запросы текущего measure()"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - start
+        if not many:
+            stats.statements[(sql, repr(params))] += 1
+
+
+def install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        # В начало: pop() из connection.execute_wrapper() не снимет нашу обёртку
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def enable():
+    """Подключает подсчёт SQL ко всем соединениям (из ready())"""
+    connection_created.connect(install, dispatch_uid='metrics:record_query')
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+def new_route_stats():
+    return {'count': 0, 'errors': 0, 'slow': 0, 'max': 0.0,
+            'buckets': [0] * (len(DURATION_BUCKETS) + 1), **{key: 0 for key in SUMS}}
+
+
+class Registry:
+    """Агрегаты процесса: (method, route) -> счётчики и гистограмма"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.process_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.last_flush = time.monotonic()
+
+    def observe(self, stats, slow=False):
+        with self.lock:
+            key = (stats.method, stats.route)
+            if key not in self.routes and len(self.routes) >= MAX_ROUTES:
+                key = (stats.method, OTHER_ROUTE)
+            entry = self.routes.setdefault(key, new_route_stats())
+            entry['count'] += 1
+            entry['errors'] += stats.status >= 500
+            entry['slow'] += slow
+            entry['max'] = max(entry['max'], stats.duration)
+            entry['buckets'][bisect_left(DURATION_BUCKETS, stats.duration)] += 1
+            for name in SUMS:
+                entry[name] += getattr(stats, name)
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {key: {**entry, 'buckets': list(entry['buckets'])} for key, entry in self.routes.items()}
+
+    def flush(self):
+        """Пишет снимок процесса в кэш, чтобы его увидели другие процессы"""
+        self.last_flush = time.monotonic()
+        key = f'metrics:process:{self.process_id}'
+        try:
+            cache.set(key, self.snapshot(), SNAPSHOT_TTL)
+            index = cache.get(CACHE_INDEX_KEY) or []
+            if key not in index:
+                cache.set(CACHE_INDEX_KEY, index + [key], None)
+        except Exception:
+            # Метрики не должны ронять запрос
+            logger.exception("Failed to flush metrics")
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+
+registry = Registry()
+
+
+def merge(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for key, entry in snapshot.items():
+            total = merged.setdefault(key, new_route_stats())
+            for name in ('count', 'errors', 'slow') + SUMS:
+                total[name] += entry[name]
+            total['max'] = max(total['max'], entry['max'])
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], entry['buckets'])]
+    return merged
+
+
+def collect():
+    """Снимки всех живых процессов, сложенные по маршрутам"""
+    registry.flush()
+    index = cache.get(CACHE_INDEX_KEY) or []
+    snapshots = cache.get_many(index)
+    if len(snapshots) != len(index):
+        # Процессы, чьи снимки истекли, больше не живы
+        cache.set(CACHE_INDEX_KEY, [key for key in index if key in snapshots], None)
+    return merge(snapshots.values())
+
+
+def quantile(entry, q):
+    """Оценка квантиля по гистограмме (линейно внутри корзины)"""
+    if not entry['count']:
+        return 0.0
+    rank = q * entry['count']
+    seen = 0
+    for i, count in enumerate(entry['buckets']):
+        if count and seen + count >= rank:
+            if i == len(DURATION_BUCKETS):
+                return entry['max']
+            lower = DURATION_BUCKETS[i - 1] if i else 0.0
+            upper = min(DURATION_BUCKETS[i], entry['max'])
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return entry['max']
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# (имя, описание, поле агрегата)
+COUNTERS = [
+    ('cardholder_request_queries_total', 'SQL-запросов выполнено', 'queries'),
+    ('cardholder_request_sql_seconds_total', 'Время в БД', 'sql_time'),
+    ('cardholder_request_duplicate_queries_total', 'Повторных SQL-запросов в пределах запроса', 'duplicates'),
+    ('cardholder_response_bytes_total', 'Байт в ответах', 'size'),
+    ('cardholder_request_errors_total', 'Ответов 5xx', 'errors'),
+    ('cardholder_slow_requests_total', 'Запросов выше порогов METRICS_*', 'slow'),
+]
+
+
+def render(aggregates):
+    """Текстовый формат Prometheus"""
+    rows = sorted(aggregates.items())
+    lines = [
+        '# HELP cardholder_request_duration_seconds Время обработки запроса',
+        '# TYPE cardholder_request_duration_seconds summary',
+    ]
+    for (method, route), entry in rows:
+        labels = f'method="{escape(method)}",route="{escape(route)}"'
+        for q in QUANTILES:
+            lines.append(f'cardholder_request_duration_seconds{{{labels},quantile="{q}"}} {quantile(entry, q):.6f}')
+        lines.append(f'cardholder_request_duration_seconds_sum{{{labels}}} {entry["duration"]:.6f}')
+        lines.append(f'cardholder_request_duration_seconds_count{{{labels}}} {entry["count"]}')
+    for name, help_text, field in COUNTERS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (method, route), entry in rows:
+            lines.append(f'{name}{{method="{escape(method)}",route="{escape(route)}"}} {entry[field]:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def is_slow(stats):
+    return (
+        stats.duration * 1000 > settings.METRICS_SLOW_REQUEST_MS
+        or stats.queries > settings.METRICS_MAX_QUERIES
+        or stats.duplicates > settings.METRICS_MAX_DUPLICATE_QUERIES
+    )
+
+
+def warn(stats):
+    message = (
+        f"Slow request {stats.method} {stats.route}: {stats.duration * 1000:.0f} ms, "
+        f"{stats.queries} queries ({stats.sql_time * 1000:.0f} ms SQL), "
+        f"{stats.duplicates} duplicates, {stats.size} bytes"
+    )
+    if stats.duplicates:
+        sql, count = stats.most_duplicated()
+        message += f"; repeated {count}x: {sql[:300]}"
+    logger.warning(message)
+
+
+@contextmanager
+def measure(route=UNMATCHED_ROUTE, method=''):
+    """
+    Замеряет блок кода; route/method/status/size можно уточнить
+    у возвращённого RequestStats до выхода из блока
+    """
+    stats = RequestStats(route, method)
+    token = _current.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    except Exception:
+        stats.status = stats.status or 500
+        raise
+    finally:
+        stats.duration = time.perf_counter() - start
+        _current.reset(token)
+        slow = is_slow(stats)
+        if slow:
+            warn(stats)
+        registry.observe(stats, slow=slow)
+
+
+ROUTE_GROUP_RE = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def route_name(request):
+    """Шаблон маршрута без regex: /api/cards/<pk>/"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.route is None:
+        return UNMATCHED_ROUTE
+    route = ROUTE_GROUP_RE.sub(r'<\1>', match.route)
+    return '/' + re.sub(r'[\^$\\?]', '', route)
+
+
+def response_size(response):
+    if response.streaming:
+        # Тело ещё не отдано — размер известен только из заголовка
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class PerformanceMiddleware:
+    """Замеры каждого HTTP-запроса (ставится первым в MIDDLEWARE)"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure(method=request.method) as stats:
+            response = self.get_response(request)
+            stats.route = route_name(request)
+            stats.status = response.status_code
+            stats.size = response_size(response)
+        return response
+
+
+def bot_route(update):
+    """Маршрут апдейта бота: command:/start, callback:share_<n>, message"""
+    if update.callback_query is not None:
+        data = update.callback_query.data or ''
+        return 'callback:' + re.sub(r'\d+', '<n>', data)[:64]
+    message = update.effective_message
+    if message is not None and message.text and message.text.startswith('/'):
+        return 'command:' + message.text.split()[0].split('@')[0][:32]
+    return 'message' if message is not None else 'update'
+
+
+class InstrumentedApplication(Application):
+    """Application бота, замеряющий каждый апдейт:
+
+        Application.builder().application_class(InstrumentedApplication)
+    """
+
+    async def process_update(self, update):
+        if not settings.METRICS_ENABLED or not hasattr(update, 'effective_message'):
+            return await super().process_update(update)
+        with measure(bot_route(update), method='BOT'):
+            return await super().process_update(update)
@@ -0,0 +1,25 @@
+"""
+Таблица DatabaseCache
+
+Без REDIS_URL кэш по умолчанию — таблица в БД (см. CACHES в settings),
+а деплой выполняет только migrate. createcachetable пропускает уже
+существующие таблицы, так что миграцию можно прогонять повторно.
+"""
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
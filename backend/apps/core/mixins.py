@@ -0,0 +1,65 @@
+"""
+Общие миксины для ViewSet'ов
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    """
+    Выборка только нужных полей: ?fields=id,title,number
+
+    Лишние поля убираются из сериализатора, а по get_only_fields() ViewSet
+    может ограничить queryset через .only(). Работает только на чтение.
+    """
+
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self):
+        """Возвращает множество запрошенных полей или None, если ограничения нет"""
+        if hasattr(self, '_requested_fields'):
+            return self._requested_fields
+
+        self._requested_fields = None
+        raw = self.request.query_params.get(self.fields_query_param) if self.request else None
+        if raw and self.action in ('list', 'retrieve'):
+            requested = {name.strip() for name in raw.split(',') if name.strip()}
+            readable = {
+                name for name, field in self.get_serializer_class()().fields.items()
+                if not field.write_only
+            }
+            unknown = requested - readable
+            if unknown:
+                raise ValidationError({
+                    self.fields_query_param: f"Unknown fields: {', '.join(sorted(unknown))}"
+                })
+            self._requested_fields = requested
+        return self._requested_fields
+
+    def get_only_fields(self, fields):
+        """
+        Пути модели для .only() по запрошенным полям сериализатора
+
+        Вложенный сериализатор на FK даёт сам FK, many-связи пропускаются.
+        """
+        serializer_class = self.get_serializer_class()
+        serializer_fields = serializer_class().fields
+        only = {serializer_class.Meta.model._meta.pk.name}
+        for name in fields:
+            field = serializer_fields[name]
+            if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                continue
+            if field.source == '*':
+                continue
+            only.add(field.source.replace('.', '__'))
+        return sorted(only)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields) - fields:
+                target.fields.pop(name)
+        return serializer
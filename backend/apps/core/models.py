@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -12,6 +13,10 @@ class UserProfile(models.Model):
     telegram_photo_url = models.URLField(null=True, blank=True)
     is_telegram_subscriber = models.BooleanField(default=False)
     has_premium_access = models.BooleanField(default=False)
+    # Кэш проверки подписки: статус из getChatMember и срок свежести
+    subscription_status = models.CharField(max_length=20, blank=True)
+    subscription_checked_at = models.DateTimeField(null=True, blank=True)
+    subscription_fresh_until = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -29,12 +34,81 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    # Only save profile if it exists
-    if hasattr(instance, 'profile'):
-        try:
-            instance.profile.save()
-        except UserProfile.DoesNotExist:
-            # Profile doesn't exist yet, create it
-            UserProfile.objects.create(user=instance)
\ No newline at end of file
+class Job(models.Model):
+    """
+    Фоновая задача в очереди на базе БД (см. apps.core.jobs)
+
+    Воркер (manage.py run_jobs) забирает задачи со статусом queued,
+    у которых подошёл run_after; прогресс пишется по ходу выполнения.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    # Прогресс: сколько шагов сделано из скольких и что сейчас происходит
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    progress_message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.CharField(max_length=150, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def progress_percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, round(self.progress_done * 100 / self.progress_total))
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+
+class Blob(models.Model):
+    """
+    Файл хранилища по содержимому (apps.core.storage) и число ссылок на него
+
+    Блобы с refcount 0 удаляет manage.py gc_blobs.
+    """
+
+    sha256 = models.CharField(max_length=64, db_index=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Время последнего изменения счётчика — отсчёт grace-периода сборки мусора
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} (refs: {self.refcount})"
+
+    class Meta:
+        verbose_name = 'Blob'
+        verbose_name_plural = 'Blobs'
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at'], name='blob_refcount_updated_idx'),
+        ]
@@ -0,0 +1,23 @@
+"""
+Владелец данных запроса
+"""
+
+from django.contrib.auth.models import User
+
+
+TEST_USERNAME = 'test_user'
+
+
+def get_request_owner(request, create=False):
+    """
+    Текущий пользователь, а без авторизации — тестовый пользователь
+
+    Args:
+        create: создать тестового пользователя, если его ещё нет
+    """
+    if request.user.is_authenticated:
+        return request.user
+    if create:
+        test_user, _ = User.objects.get_or_create(username=TEST_USERNAME)
+        return test_user
+    return User.objects.filter(username=TEST_USERNAME).first()
@@ -0,0 +1,131 @@
+"""
+Keyset (cursor) пагинация
+
+В отличие от PageNumberPagination не делает COUNT(*) и глубокий OFFSET:
+следующая страница выбирается условием "строго после последней строки"
+по текущей сортировке queryset, к которой добавляется pk для уникальности.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу сортировки (только вперёд)
+
+    Курсор кодирует значения полей сортировки последней строки страницы.
+    Поля сортировки берутся из queryset (их выставляет OrderingFilter),
+    NULL всегда идут в конце, поэтому nullable-поля тоже поддерживаются.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+
+        # Значения ключа выносим в аннотации: они доступны на объектах
+        # независимо от .only() и select_related
+        keys = {f'_cursor_{i}': F(field.lstrip('-')) for i, field in enumerate(self.ordering)}
+        queryset = queryset.annotate(**keys).order_by(*[
+            F(key).desc(nulls_last=True) if field.startswith('-') else F(key).asc(nulls_last=True)
+            for key, field in zip(keys, self.ordering)
+        ])
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.after(list(keys), cursor))
+            except (TypeError, ValueError, ValidationError):
+                # JSON корректный, но значения не подходят к полям сортировки
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = list(getattr(view, 'ordering', None) or queryset.model._meta.ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('pk')
+        return ordering
+
+    def after(self, keys, values):
+        """Условие "строка идёт после курсора" для сортировки с NULLS LAST"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for key, field, value in zip(keys, self.ordering, values):
+            if value is not None:
+                lookup = 'lt' if field.startswith('-') else 'gt'
+                condition |= equal & (Q(**{f'{key}__{lookup}': value}) | Q(**{f'{key}__isnull': True}))
+                equal &= Q(**{key: value})
+            else:
+                equal &= Q(**{f'{key}__isnull': True})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, f'_cursor_{i}') for i in range(len(self.ordering))]
+        data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
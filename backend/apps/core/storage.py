@@ -0,0 +1,98 @@
+"""
+Хранилище файлов по содержимому (content-addressed)
+
+Файл сохраняется под SHA-256 своего содержимого:
+blobs/ab/cd/abcd….jpg. Повторная загрузка тех же байт — только хэш
+и проверка существования, без записи; все поля ссылаются на один файл.
+Имя из upload_to не используется, кроме расширения.
+
+Файл удаляет не delete(), а сборщик мусора (apps.core.blobs) — когда
+на него не осталось ссылок из полей моделей.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import LazyObject
+
+BLOBS_DIR = 'blobs'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOBS_DIR}/')
+
+
+def content_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_name(digest, original_name=''):
+    extension = os.path.splitext(original_name)[1].lower()
+    return f"{BLOBS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяет содержимое, а не upload_to
+        return name
+
+    def _save(self, name, content):
+        from .blobs import register_blob
+
+        digest = content_digest(content)
+        name = blob_name(digest, name)
+        if not self.exists(name):
+            self._write(name, content)
+        register_blob(digest, name, content.size)
+        if not self.exists(name):
+            # Сборщик мусора удалил файл между проверкой и регистрацией; запись уже наша
+            self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        """Запись через временный файл: параллельная загрузка тех же байт не помешает"""
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            else:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, name):
+        # Блоб может быть нужен другим полям — его удалит сборщик мусора
+        if is_blob_name(name):
+            return
+        super().delete(name)
+
+    def delete_blob(self, name):
+        super().delete(name)
+
+
+class BlobStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = ContentAddressedStorage()
+
+
+blob_storage = BlobStorage()
+
+
+def get_blob_storage():
+    """storage= для FileField (callable не попадает в миграции как объект)"""
+    return blob_storage
@@ -0,0 +1,98 @@
+"""
+Кэш подписки на Telegram-канал
+
+Запрос пользователя отдаёт статус из UserProfile и никогда не ждёт
+Telegram. Устаревшие профили (subscription_fresh_until в прошлом)
+перепроверяет фоновый SubscriptionRefresher: пачками, через общий
+клиент Telegram, не больше concurrency запросов одновременно.
+Ответ 429 обрабатывает клиент: он приостанавливает все запросы процесса
+на retry_after и повторяет; если и повторы упёрлись в лимит, профиль
+перепроверяется позже, как после любой ошибки.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import UserProfile
+from .telegram_utils import check_telegram_subscription
+
+logger = logging.getLogger(__name__)
+
+# Через сколько перепроверять профиль после ошибки API
+ERROR_RETRY = timedelta(minutes=5)
+
+SUBSCRIPTION_FIELDS = [
+    'is_telegram_subscriber', 'has_premium_access',
+    'subscription_status', 'subscription_checked_at', 'subscription_fresh_until',
+]
+
+
+def is_fresh(profile, now=None):
+    fresh_until = profile.subscription_fresh_until
+    return fresh_until is not None and fresh_until > (now or timezone.now())
+
+
+def stale_profiles(limit, now=None):
+    """Профили с Telegram, которые пора перепроверить, самые старые первыми"""
+    now = now or timezone.now()
+    return UserProfile.objects.filter(telegram_id__isnull=False).filter(
+        Q(subscription_fresh_until__isnull=True) | Q(subscription_fresh_until__lte=now)
+    ).order_by(F('subscription_fresh_until').asc(nulls_first=True), 'id')[:limit]
+
+
+class SubscriptionRefresher:
+    """
+    Пакетная перепроверка подписок
+
+    Использование:
+        report = SubscriptionRefresher(concurrency=8).run_batch(100)
+    """
+
+    def __init__(self, channel_id=None, concurrency=8):
+        self.channel_id = channel_id or settings.TELEGRAM_CHANNEL_ID
+        self.concurrency = concurrency
+
+    def check(self, telegram_id):
+        result = check_telegram_subscription(telegram_id, self.channel_id)
+        if result.get('retry_after') is not None:
+            logger.warning(f"Telegram rate limit persisted for {telegram_id}, will recheck later")
+        return result
+
+    def refresh(self, profiles):
+        """
+        Перепроверяет профили и пишет результат одним bulk_update
+
+        Returns:
+            {'checked', 'subscribed', 'errors'}
+        """
+        profiles = list(profiles)
+        if not profiles:
+            return {'checked': 0, 'subscribed': 0, 'errors': 0}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self.check, [profile.telegram_id for profile in profiles]))
+
+        now = timezone.now()
+        ttl = timedelta(seconds=settings.TELEGRAM_SUBSCRIPTION_TTL)
+        report = {'checked': len(profiles), 'subscribed': 0, 'errors': 0}
+        for profile, result in zip(profiles, results):
+            if result['error']:
+                # Статус не трогаем, перепроверим позже
+                report['errors'] += 1
+                profile.subscription_fresh_until = now + ERROR_RETRY
+                continue
+            profile.is_telegram_subscriber = result['is_subscribed']
+            profile.has_premium_access = result['is_subscribed']  # Premium access = subscription
+            profile.subscription_status = result['status']
+            profile.subscription_checked_at = now
+            profile.subscription_fresh_until = now + ttl
+            report['subscribed'] += result['is_subscribed']
+        UserProfile.objects.bulk_update(profiles, SUBSCRIPTION_FIELDS)
+        return report
+
+    def run_batch(self, batch_size=100):
+        return self.refresh(stale_profiles(batch_size))
@@ -0,0 +1,69 @@
+"""
+Проверка Telegram-логина и выдача JWT
+
+Секретный ключ sha256(bot_token) вычисляется один раз на токен
+(при старте приложения, см. CoreConfig.ready). Ответ на проверенный
+логин кэшируется по (id, auth_date, hash): повтор тех же данных —
+например, при каждом открытии мобильного приложения — получает ту же
+пару токенов без HMAC, запросов к БД и выпуска нового RefreshToken.
+Кэш живёт не дольше TELEGRAM_AUTH_CACHE_TTL и не дольше окна
+действительности auth_date (TELEGRAM_AUTH_MAX_AGE).
+"""
+
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Хэши для разработки не проверяются и не кэшируются
+DEV_HASH_PREFIX = 'dev_hash_'
+
+
+@lru_cache(maxsize=4)
+def derive_secret_key(bot_token):
+    return hashlib.sha256(bot_token.encode()).digest()
+
+
+def verify_telegram_auth(auth_data, bot_token):
+    """Verify Telegram authentication data"""
+    check_hash = auth_data.pop('hash', None)
+    if not check_hash:
+        return False
+
+    # Для разработки пропускаем проверку hash
+    if check_hash.startswith(DEV_HASH_PREFIX):
+        return True
+
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(auth_data.items()))
+    calculated_hash = hmac.new(derive_secret_key(bot_token), data_check_string.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(calculated_hash, check_hash)
+
+
+def auth_cache_key(auth_data):
+    return f"telegram:auth:{auth_data['id']}:{auth_data['auth_date']}:{auth_data['hash']}"
+
+
+def auth_cache_ttl(auth_data, now=None):
+    """Сколько секунд можно отдавать ответ на эти данные из кэша (0 — нельзя)"""
+    if auth_data['hash'].startswith(DEV_HASH_PREFIX):
+        return 0
+    expires_at = auth_data['auth_date'] + settings.TELEGRAM_AUTH_MAX_AGE
+    remaining = int(expires_at - (now or time.time()))
+    return max(0, min(settings.TELEGRAM_AUTH_CACHE_TTL, remaining))
+
+
+def get_cached_auth(auth_data):
+    """Ранее выданный ответ на те же (id, auth_date, hash) или None"""
+    if not auth_cache_ttl(auth_data):
+        return None
+    return cache.get(auth_cache_key(auth_data))
+
+
+def cache_auth(auth_data, payload):
+    ttl = auth_cache_ttl(auth_data)
+    if ttl:
+        # Повтор — уже не регистрация
+        cache.set(auth_cache_key(auth_data), {**payload, 'created': False}, ttl)
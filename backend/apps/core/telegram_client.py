@@ -0,0 +1,161 @@
+"""
+Общий для процесса клиент Telegram Bot API
+
+Один Bot с пулом keep-alive соединений (HTTP/2, если установлен h2)
+живёт в собственном event loop в фоновом потоке. Синхронный код
+(views, management-команды) и асинхронный (задачи бота) отправляют
+запросы в этот loop, поэтому соединения остаются тёплыми между вызовами,
+а общий RateLimiter держит лимиты Telegram для всего процесса.
+
+Использование:
+    client = get_telegram_client()
+    client.bot.send_message(chat_id=..., text=...)          # синхронно
+    await client.abot.send_message(chat_id=..., text=...)   # из async-кода
+    client.run(coroutine)                                    # корутина в loop клиента
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from telegram import Bot
+from telegram.error import RetryAfter
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = 32
+HTTP_VERSION = '2' if importlib.util.find_spec('h2') else '1.1'
+# Лимиты Bot API: около 30 сообщений в секунду всего и 1 в секунду в один чат
+GLOBAL_RATE = 30
+CHAT_INTERVAL = 1.0
+# Интервал чата — только для отправки сообщений; чтение (get_chat_member в канал) — лишь общий темп
+CHAT_LIMITED_METHODS = ('copy_message', 'copy_messages', 'forward_message', 'forward_messages')
+# Сколько раз повторять запрос после 429 (повторяет только клиент, вызывающие — нет)
+MAX_RETRIES = 3
+# Сколько ждать ответа в синхронном фасаде
+CALL_TIMEOUT = 60
+
+
+class RateLimiter:
+    """
+    Лимит запросов: общий темп и минимальный интервал для одного чата
+
+    Работает только внутри loop клиента, поэтому без блокировок.
+    """
+
+    def __init__(self, rate=GLOBAL_RATE, chat_interval=CHAT_INTERVAL):
+        self.interval = 1 / rate
+        self.chat_interval = chat_interval
+        self.next_slot = 0.0
+        self.chat_slots = {}
+
+    async def acquire(self, chat_id=None):
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        if chat_id is not None:
+            slot = max(slot, self.chat_slots.get(chat_id, 0.0))
+            self.chat_slots[chat_id] = slot + self.chat_interval
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds):
+        """429: никаких запросов seconds секунд"""
+        self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+
+class BotFacade:
+    """Методы Bot (send_message, get_chat_member, ...) через клиент"""
+
+    def __init__(self, client, is_async):
+        self._client = client
+        self._is_async = is_async
+
+    def __getattr__(self, method):
+        if self._is_async:
+            async def call(*args, **kwargs):
+                return await self._client.acall(method, *args, **kwargs)
+        else:
+            def call(*args, **kwargs):
+                return self._client.call(method, *args, **kwargs)
+        return call
+
+
+class TelegramClient:
+    def __init__(self, token, pool_size=POOL_SIZE):
+        self.token = token
+        self.pool_size = pool_size
+        self.loop = None
+        self.limiter = RateLimiter()
+        self._bot = None
+        self._lock = threading.Lock()
+        self.bot = BotFacade(self, is_async=False)
+        self.abot = BotFacade(self, is_async=True)
+
+    def _start(self):
+        with self._lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='telegram-client', daemon=True).start()
+            self._bot = Bot(
+                token=self.token,
+                request=HTTPXRequest(connection_pool_size=self.pool_size, http_version=HTTP_VERSION),
+            )
+            self.loop = loop
+
+    async def _call(self, method, *args, **kwargs):
+        chat_id = None
+        if method.startswith('send_') or method in CHAT_LIMITED_METHODS:
+            chat_id = kwargs.get('chat_id', args[0] if args else None)
+        for attempt in range(MAX_RETRIES + 1):
+            await self.limiter.acquire(chat_id)
+            try:
+                return await getattr(self._bot, method)(*args, **kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                logger.warning(f"Telegram rate limit on {method}, pausing for {retry_after}s")
+                self.limiter.pause(retry_after)
+                if attempt == MAX_RETRIES:
+                    raise
+
+    def run(self, coroutine, timeout=CALL_TIMEOUT):
+        """Выполняет корутину в loop клиента и ждёт результата"""
+        self._start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def call(self, method, *args, **kwargs):
+        return self.run(self._call(method, *args, **kwargs))
+
+    async def acall(self, method, *args, **kwargs):
+        self._start()
+        coroutine = self._call(method, *args, **kwargs)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_telegram_client():
+    """Клиент процесса; после fork (gunicorn --preload) создаётся заново"""
+    global _client, _client_pid
+    token = settings.TELEGRAM_BOT_TOKEN
+    if _client is None or _client_pid != os.getpid() or _client.token != token:
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid() or _client.token != token:
+                _client = TelegramClient(token)
+                _client_pid = os.getpid()
+    return _client
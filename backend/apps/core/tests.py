@@ -1,3 +1,599 @@
-from django.test import TestCase
+"""
+Тесты пользователей и интеграции с Telegram
+"""
 
-# Create your tests here.
+import asyncio
+import hashlib
+import hmac
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from asgiref.sync import async_to_sync, sync_to_async
+from django.utils import timezone
+from rest_framework.test import APIClient
+from telegram.error import RetryAfter
+
+from PIL import Image
+
+from apps.cards.models import Card
+from apps.core import images, jobs, media, metrics
+from apps.core.versioning import VersionedIndex, bump_version, get_version
+from apps.core.models import Job, UserProfile
+from apps.core.subscriptions import SubscriptionRefresher, stale_profiles
+from apps.core.telegram_client import RateLimiter, TelegramClient
+
+
+def member(status):
+    return {'is_subscribed': status == 'member', 'status': status, 'member_info': {}, 'error': None}
+
+
+class SubscriptionCacheTest(TestCase):
+    """Тесты кэша подписки на канал"""
+
+    def setUp(self):
+        self.users = []
+        for telegram_id in (101, 102, 103):
+            user = User.objects.create(username=f"tg_{telegram_id}")
+            UserProfile.objects.filter(user=user).update(telegram_id=telegram_id)
+            self.users.append(User.objects.get(id=user.id))
+
+    @mock.patch('apps.core.subscriptions.check_telegram_subscription')
+    def test_view_never_calls_telegram(self, check):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+
+        response = client.post('/api/auth/subscription/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['is_subscribed'], response.data['fresh']), (False, False))
+        check.assert_not_called()
+
+    @mock.patch('apps.core.subscriptions.check_telegram_subscription')
+    def test_refresher_batch(self, check):
+        rate_limited = {'is_subscribed': False, 'status': 'rate_limited', 'member_info': None,
+                        'error': 'Too Many Requests', 'retry_after': 0.05}
+        answers = {101: member('member'), 102: member('left'), 103: rate_limited}
+        check.side_effect = lambda telegram_id, channel_id: answers[telegram_id]
+
+        report = SubscriptionRefresher(concurrency=1).run_batch(10)
+        self.assertEqual(report, {'checked': 3, 'subscribed': 1, 'errors': 1})
+        # 429 повторяет клиент; здесь второго слоя повторов нет — профиль перепроверится позже
+        self.assertEqual(check.call_count, 3)
+
+        profile = UserProfile.objects.get(telegram_id=101)
+        self.assertTrue(profile.is_telegram_subscriber and profile.has_premium_access)
+        self.assertGreater(profile.subscription_fresh_until, timezone.now() + timedelta(hours=1))
+        self.assertFalse(stale_profiles(10).exists())
+
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        self.assertEqual(client.post('/api/auth/subscription/').data['fresh'], True)
+
+    @mock.patch('apps.core.subscriptions.check_telegram_subscription')
+    def test_api_error_keeps_status(self, check):
+        UserProfile.objects.filter(telegram_id=101).update(is_telegram_subscriber=True)
+        check.return_value = {'is_subscribed': False, 'status': 'error', 'member_info': None, 'error': 'HTTP 502'}
+
+        report = SubscriptionRefresher().refresh(UserProfile.objects.filter(telegram_id=101))
+        self.assertEqual(report['errors'], 1)
+        profile = UserProfile.objects.get(telegram_id=101)
+        self.assertTrue(profile.is_telegram_subscriber)
+        self.assertIsNotNone(profile.subscription_fresh_until)
+
+
+class FakeBot:
+    """Bot, отвечающий 429 на первый запрос"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def send_message(self, chat_id, text):
+        self.calls.append((chat_id, text, asyncio.get_running_loop()))
+        if len(self.calls) == 1:
+            raise RetryAfter(0)
+        return text.upper()
+
+
+class TelegramClientTest(TestCase):
+    """Тесты общего клиента Telegram"""
+
+    def test_sync_and_async_facades_share_loop(self):
+        client = TelegramClient('token')
+        client._start()
+        client._bot = bot = FakeBot()
+
+        self.assertEqual(client.bot.send_message(chat_id=1, text="hi"), "HI")
+
+        async def from_other_loop():
+            return await client.abot.send_message(chat_id=2, text="yo")
+
+        self.assertEqual(asyncio.run(from_other_loop()), "YO")
+        # Повтор после 429 и оба фасада — в одном loop клиента
+        self.assertEqual(len(bot.calls), 3)
+        self.assertEqual({loop for _, _, loop in bot.calls}, {client.loop})
+
+    def test_rate_limiter_spacing(self):
+        limiter = RateLimiter(rate=100, chat_interval=0.05)
+
+        async def acquire_all():
+            started = time.monotonic()
+            for _ in range(3):
+                await limiter.acquire(chat_id=1)
+            return time.monotonic() - started
+
+        # Три сообщения в один чат — не быстрее двух интервалов чата
+        self.assertGreaterEqual(asyncio.run(acquire_all()), 0.1)
+
+    def test_reads_not_limited_per_chat(self):
+        client = TelegramClient('token')
+        client._start()
+        client.limiter = RateLimiter(rate=1000, chat_interval=10)
+        client._bot = mock.Mock(get_chat_member=mock.AsyncMock(return_value='member'))
+
+        started = time.monotonic()
+        for user_id in range(3):
+            client.bot.get_chat_member(chat_id='@channel', user_id=user_id)
+        # Проверки подписки в один канал не ждут интервал чата
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(client.limiter.chat_slots, {})
+
+
+class InitDatabaseTest(TestCase):
+    """Первичная загрузка каталога без авторизации"""
+
+    def test_creates_catalog_once(self):
+        client = APIClient()
+        response = client.post('/api/init/')
+        self.assertEqual(response.data['status'], 'success')
+        total = response.data['total_cards']
+        self.assertGreater(total, 0)
+
+        card = Card.objects.get(series__number=1, number=1)
+        Card.objects.filter(pk=card.pk).update(title="Правка админа")
+        response = client.post('/api/init/')
+        self.assertEqual((response.data['status'], response.data['total_cards']), ('skipped', total))
+        self.assertEqual(Card.objects.get(pk=card.pk).title, "Правка админа")
+
+
+class TelegramLoginTest(TestCase):
+    """Тесты входа через Telegram"""
+
+    def login(self, telegram_id, username="spidey", first_name="Peter"):
+        return APIClient().post('/api/auth/telegram/', {
+            'id': telegram_id, 'first_name': first_name, 'username': username,
+            'auth_date': 1700000000, 'hash': 'dev_hash_test',
+        }, format='json')
+
+    def test_username_allocated_in_fixed_queries(self):
+        User.objects.bulk_create(
+            [User(username="spidey")] + [User(username=f"spidey_{n}") for n in range(1, 30) if n != 7]
+            + [User(username="spidey_x")]
+        )
+        # Профиль, занятые имена, вставка пользователя и профиля (в savepoint), запись профиля
+        with self.assertNumQueries(7):
+            response = self.login(500)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['user']['username'], response.data['created']), ("spidey_7", True))
+
+        with self.assertNumQueries(7):
+            response = self.login(501)
+        self.assertEqual(response.data['user']['username'], "spidey_30")
+
+    def test_repeat_login_writes_only_changes(self):
+        self.login(600)
+        # Данные не изменились — только чтение профиля с пользователем
+        with self.assertNumQueries(1):
+            response = self.login(600)
+        self.assertFalse(response.data['created'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.login(600, first_name="Miles")
+        update = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(update), 1)
+        self.assertIn('"telegram_first_name"', update[0])
+        self.assertNotIn('"telegram_username"', update[0])
+        self.assertEqual(UserProfile.objects.get(telegram_id=600).telegram_first_name, "Miles")
+
+
+def signed(auth_data):
+    """Данные логина с настоящей подписью Telegram"""
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(auth_data.items()))
+    secret_key = hashlib.sha256(settings.TELEGRAM_BOT_TOKEN.encode()).digest()
+    return {**auth_data, 'hash': hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()}
+
+
+class TelegramAuthCacheTest(TestCase):
+    """Тесты кэша проверенного логина и обновления токена"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.auth_data = signed({'id': 700, 'first_name': "Gwen", 'auth_date': int(time.time())})
+
+    def test_replay_returns_cached_tokens(self):
+        first = self.client.post('/api/auth/telegram/', self.auth_data, format='json')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.data['created'])
+
+        with self.assertNumQueries(0):
+            replay = self.client.post('/api/auth/telegram/', self.auth_data, format='json')
+        self.assertEqual((replay.data['access'], replay.data['refresh']), (first.data['access'], first.data['refresh']))
+        self.assertFalse(replay.data['created'])
+
+        # Подпись не сходится — кэш не помогает
+        forged = {**self.auth_data, 'hash': '0' * 64}
+        self.assertEqual(self.client.post('/api/auth/telegram/', forged, format='json').status_code, 400)
+
+    def test_expired_auth_not_cached(self):
+        stale = signed({'id': 701, 'first_name': "Gwen", 'auth_date': int(time.time()) - settings.TELEGRAM_AUTH_MAX_AGE - 1})
+        self.client.post('/api/auth/telegram/', stale, format='json')
+        with self.assertNumQueries(1):
+            self.client.post('/api/auth/telegram/', stale, format='json')
+
+    def test_refresh_without_reauth(self):
+        tokens = self.client.post('/api/auth/telegram/', self.auth_data, format='json').data
+        # Только проверка, что пользователь активен
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+        me = APIClient()
+        me.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(me.get('/api/auth/me/').data['profile']['telegram_id'], 700)
+
+
+@jobs.job_handler('tests.flaky')
+def flaky_job(job):
+    """Падает, пока не наберёт payload['fail_times'] попыток"""
+    jobs.set_progress(job, 1, total=2, message="step 1")
+    if job.attempts <= job.payload['fail_times']:
+        raise RuntimeError("boom")
+    job.result['ok'] = True
+
+
+class JobQueueTest(TestCase):
+    """Тесты очереди фоновых задач"""
+
+    def test_retry_then_done(self):
+        job = jobs.enqueue('tests.flaky', {'fail_times': 1})
+        self.assertEqual(jobs.work(once=True), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn("boom", job.error)
+        # Повтор — после задержки
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(jobs.work(once=True), 0)
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result, job.progress_percent), ('done', 2, {'ok': True}, 100))
+
+    def test_attempts_exhausted(self):
+        job = jobs.enqueue('tests.flaky', {'fail_times': 5}, max_attempts=1)
+        jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress_done, job.progress_total), ('failed', 1, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claim_once_and_requeue_stale(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('tests.missing')
+        job = jobs.enqueue('tests.flaky', {'fail_times': 0})
+
+        self.assertEqual(jobs.claim_job('a').id, job.id)
+        self.assertIsNone(jobs.claim_job('b'))
+
+        # Воркер «умер»: после JOB_LOCK_TIMEOUT задача снова в очереди
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim_job('b').attempts, 2)
+
+    def test_stale_last_attempt_fails(self):
+        job = jobs.enqueue('tests.flaky', {'fail_times': 0}, max_attempts=1)
+        jobs.claim_job('a')
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(jobs.requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('failed', ''))
+        self.assertIn("last attempt", job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_heartbeat_and_lost_lock(self):
+        job = jobs.enqueue('tests.flaky', {'fail_times': 0})
+        claimed = jobs.claim_job('a')
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(days=1))
+        # Прогресс продлевает блокировку — задачу не заберут
+        jobs.set_progress(claimed, 1)
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(days=1))
+        jobs.requeue_stale()
+        jobs.claim_job('b')
+        with self.assertRaises(jobs.LockLost):
+            jobs.set_progress(claimed, 2)
+
+        # Старый воркер останавливается и не перезаписывает итог нового
+        jobs.run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('running', 'b'))
+
+
+def jpeg_with_exif(size=(1200, 600), orientation=6):
+    """JPEG с поворотом и GPS в EXIF"""
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x8825] = {1: 'N'}
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class ImagePipelineTest(TestCase):
+    """Тесты вариантов изображений"""
+
+    def test_variants_resized_rotated_and_stripped(self):
+        rendered = images.render_variants(jpeg_with_exif(), workers=2)
+        self.assertEqual(set(rendered), set(images.VARIANTS))
+
+        # Ориентация 6 — поворот на 90°, большая сторона = размер варианта
+        width, height, blobs = rendered['thumb']
+        self.assertEqual((width, height), (80, 160))
+        self.assertEqual(set(blobs), set(images.FORMATS))
+        self.assertIn('jpeg', rendered['medium'][2])
+        # Маленькие не растягиваются
+        self.assertEqual(rendered['full'][:2], (600, 1200))
+
+        for blob in list(blobs.values()) + [rendered['medium'][2]['jpeg']]:
+            with Image.open(io.BytesIO(blob)) as variant:
+                self.assertFalse(variant.getexif())
+                self.assertNotIn('icc_profile', variant.info)
+
+    def test_hashed_names_stable(self):
+        blob = images.encode(Image.new('RGB', (10, 10)), 'webp')
+        name = images.hashed_name(blob, 'webp')
+        self.assertEqual(name, images.hashed_name(blob, 'webp'))
+        self.assertTrue(name.startswith('variants/') and name.endswith('.webp'))
+
+
+class MediaServingTest(TestCase):
+    """Тесты отдачи медиафайлов"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.data = bytes(range(256)) * 4
+        self.name = 'variants/ab/ab' + 'c' * 30 + '.webp'
+        self.path = os.path.join(self.media_root, self.name)
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+
+    def get(self, name, **headers):
+        return self.client.get(settings.MEDIA_URL + name, headers=headers)
+
+    def test_streamed_with_immutable_cache(self):
+        response = self.get(self.name)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(response['ETag'], '"ab' + 'c' * 30 + '"')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        # Имя не по хэшу — короткий кэш и ETag по mtime/размеру
+        with open(os.path.join(self.media_root, 'cards.txt'), 'wb') as f:
+            f.write(b'x')
+        response = self.get('cards.txt')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={settings.MEDIA_CACHE_MAX_AGE}', response['Cache-Control'])
+
+    def test_conditional_requests(self):
+        etag = self.get(self.name)['ETag']
+        self.assertEqual(self.get(self.name, if_none_match=etag).status_code, 304)
+        last_modified = self.get(self.name)['Last-Modified']
+        response = self.get(self.name, if_modified_since=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_ranges(self):
+        response = self.get(self.name, range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.data)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), self.data[10:20])
+
+        response = self.get(self.name, range='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-5:])
+
+        response = self.get(self.name, range=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+        # Файл изменился с тех пор, как клиент взял ETag, — отдаём целиком
+        response = self.get(self.name, range='bytes=0-9', if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_and_hidden_files(self):
+        self.assertEqual(self.get('variants/nope.webp').status_code, 404)
+        self.assertEqual(self.get('variants/ab/.upload-tmp').status_code, 404)
+        self.assertEqual(self.client.post(settings.MEDIA_URL + self.name).status_code, 405)
+
+    def test_sendfile_offload(self):
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_SENDFILE_PREFIX='/protected-media/'):
+            response = self.get(self.name)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.name)
+        self.assertEqual(response.content, b'')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.get(self.name)
+        self.assertEqual(response['X-Sendfile'], self.path)
+
+    def test_cached_render_runs_once(self):
+        render = mock.Mock(side_effect=lambda: io.BytesIO(b'png'))
+        name = media.cached_render('qr', 1, ['link'], render)
+        self.assertEqual(media.cached_render('qr', 1, ['link'], render), name)
+        self.assertEqual(render.call_count, 1)
+        self.assertTrue(media.is_hashed_name(name))
+
+    def test_render_version_changes_name_and_prunes_old(self):
+        render = mock.Mock(side_effect=lambda: io.BytesIO(b'png'))
+        old = media.cached_render('qr', 1, ['link'], render)
+        new = media.cached_render('qr', 2, ['link'], render)
+        self.assertNotEqual(old, new)
+        self.assertEqual(render.call_count, 2)
+
+        self.assertEqual(media.prune_generated(), (1, 3))
+        self.assertFalse(default_storage.exists(old))
+        self.assertTrue(default_storage.exists(new))
+        self.assertEqual(media.prune_generated(everything=True, dry_run=True), (1, 3))
+        self.assertTrue(default_storage.exists(new))
+
+
+class VersionedIndexTest(TestCase):
+    """Индекс в памяти пересобирается только при смене версии"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rebuild_on_bump(self):
+        build = mock.Mock(side_effect=lambda: object())
+        index = VersionedIndex('tests:version', build)
+        first = index.get()
+        self.assertIs(index.get(), first)
+        self.assertEqual(get_version('tests:version'), index.version)
+
+        bump_version('tests:version')
+        self.assertIsNot(index.get(), first)
+        self.assertEqual(build.call_count, 2)
+
+    def test_default_cache_shared_between_processes(self):
+        """Без REDIS_URL версии лежат в таблице кэша, и сброс из другого процесса виден"""
+        from django.core.cache.backends.db import DatabaseCache
+
+        db_cache = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'django_cache',
+            }
+        }
+        with override_settings(CACHES=db_cache):
+            # В тестах CACHES — LocMem, и 0005_cache_table таблицу не создала
+            call_command('createcachetable', verbosity=0)
+            index = VersionedIndex('tests:shared', lambda: object())
+            first = index.get()
+
+            # Отдельный экземпляр бэкенда — как кэш другого воркера
+            DatabaseCache('django_cache', {}).set('tests:shared', 'other', timeout=None)
+            self.assertIsNot(index.get(), first)
+            self.assertEqual(index.version, 'other')
+
+
+class RequestMetricsTest(TestCase):
+    """Тесты метрик запросов"""
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def test_queries_and_duplicates_counted(self):
+        with metrics.measure('/users/', 'GET') as stats:
+            User.objects.count()
+            User.objects.count()
+            User.objects.filter(username='x').exists()
+        self.assertEqual(stats.queries, 3)
+        self.assertEqual(stats.duplicates, 1)
+        self.assertGreater(stats.sql_time, 0)
+
+        # Запросы из потока sync_to_async (как в боте) попадают в тот же замер
+        async def handler():
+            with metrics.measure('command:/start', 'BOT') as stats:
+                await sync_to_async(User.objects.count)()
+            return stats
+        self.assertEqual(async_to_sync(handler)().queries, 1)
+
+        entry = metrics.registry.snapshot()[('BOT', 'command:/start')]
+        self.assertEqual((entry['count'], entry['queries']), (1, 1))
+
+    def test_middleware_records_route(self):
+        self.client.get('/api/health/')
+        self.client.get('/api/health/')
+        self.client.get('/no-such-page/')
+        snapshot = metrics.registry.snapshot()
+        entry = snapshot[('GET', '/api/health/')]
+        self.assertEqual(entry['count'], 2)
+        self.assertGreaterEqual(entry['queries'], 2)
+        self.assertGreater(entry['size'], 0)
+        self.assertIn(('GET', metrics.UNMATCHED_ROUTE), snapshot)
+
+    def test_slow_request_logged(self):
+        with self.settings(METRICS_MAX_DUPLICATE_QUERIES=0):
+            with self.assertLogs('apps.core.metrics', 'WARNING') as logs:
+                with metrics.measure('/users/', 'GET'):
+                    User.objects.count()
+                    User.objects.count()
+        self.assertIn('repeated 2x', logs.output[0])
+        self.assertEqual(metrics.registry.snapshot()[('GET', '/users/')]['slow'], 1)
+
+    def test_quantiles(self):
+        entry = metrics.new_route_stats()
+        # 90 быстрых запросов (до 5 мс) и 10 медленных (1–2.5 с)
+        entry['buckets'][0] = 90
+        entry['buckets'][metrics.DURATION_BUCKETS.index(2.5)] = 10
+        entry.update(count=100, max=2.0)
+        self.assertLessEqual(metrics.quantile(entry, 0.5), 0.005)
+        self.assertTrue(1 <= metrics.quantile(entry, 0.95) <= 2.0)
+        self.assertEqual(metrics.quantile(entry, 0.99), 1.9)
+
+    def test_endpoint_admin_only_and_merges_processes(self):
+        self.assertIn(self.client.get('/api/metrics/').status_code, (401, 403))
+        user = User.objects.create(username='user')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        # Снимок другого процесса (воркер gunicorn или бот)
+        other = {('BOT', 'command:/start'): {**metrics.new_route_stats(), 'count': 4, 'duration': 0.2}}
+        other[('BOT', 'command:/start')]['buckets'][2] = 4
+        cache.set('metrics:process:bot', other)
+        cache.set(metrics.CACHE_INDEX_KEY, ['metrics:process:bot', 'metrics:process:gone'])
+
+        admin = User.objects.create(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('cardholder_request_duration_seconds_count{method="BOT",route="command:/start"} 4', body)
+        self.assertIn('route="/api/metrics/",quantile="0.99"', body)
+        # Истёкший снимок убран из индекса, свой процесс добавлен
+        index = cache.get(metrics.CACHE_INDEX_KEY)
+        self.assertNotIn('metrics:process:gone', index)
+        self.assertIn(f'metrics:process:{metrics.registry.process_id}', index)
+
+    def test_bot_route(self):
+        callback = SimpleNamespace(callback_query=SimpleNamespace(data='share_42'), effective_message=None)
+        self.assertEqual(metrics.bot_route(callback), 'callback:share_<n>')
+        command = SimpleNamespace(callback_query=None, effective_message=SimpleNamespace(text='/start@cardloginbot x'))
+        self.assertEqual(metrics.bot_route(command), 'command:/start')
@@ -1,4 +1,5 @@
 from django.urls import path
+from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
 urlpatterns = [
@@ -6,8 +7,11 @@ urlpatterns = [
     path('health/', views.health_check, name='health_check'),
     path('init/', views.init_database, name='init_database'),
     path('migrate/', views.run_migrations, name='run_migrations'),
+    path('metrics/', views.metrics, name='metrics'),
     # Telegram auth
     path('auth/telegram/', views.telegram_auth, name='telegram_auth'),
+    # Обновление access по refresh без повторного входа через Telegram
+    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # Email/Password auth
     path('auth/register/', views.register, name='register'),
     path('auth/login/', views.login, name='login'),
@@ -0,0 +1,53 @@
+"""
+Версии данных в кэше
+
+Версия — строка в общем кэше, которая меняется при каждой записи в
+данные (обычно из on_commit). Производное кэшируется с версией в ключе
+и устаревает само, без явного удаления, а индексы в памяти процесса
+(VersionedIndex) пересобираются, когда видят новую версию: запись в
+одном процессе сбрасывает их во всех.
+
+    CATALOG_VERSION = 'cards:catalog:version'
+    index = VersionedIndex(CATALOG_VERSION, build_index)
+    index.get()                    # собирает при первом вызове и после bump
+    bump_version(CATALOG_VERSION)
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+
+
+def get_version(key):
+    """Текущая версия; при первом обращении заводится новая"""
+    version = cache.get(key)
+    if version is None:
+        # add, а не set: не перетереть версию, которую успел завести другой процесс
+        cache.add(key, str(time.time_ns()), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, str(time.time_ns()), timeout=None)
+
+
+class VersionedIndex:
+    """Объект в памяти процесса, пересобираемый build() при смене версии key"""
+
+    def __init__(self, key, build):
+        self.key = key
+        self.build = build
+        self.value = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        version = get_version(self.key)
+        if self.value is None or self.version != version:
+            with self.lock:
+                if self.value is None or self.version != version:
+                    self.value = self.build()
+                    self.version = version
+        return self.value
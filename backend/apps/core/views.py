@@ -1,37 +1,21 @@
-import hashlib
-import hmac
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import UserProfile
+from . import metrics as request_metrics
+from .accounts import get_or_create_telegram_user
+from .telegram_auth import cache_auth, get_cached_auth, verify_telegram_auth
 from .serializers import TelegramAuthSerializer, UserSerializer, RegisterSerializer, LoginSerializer
 
 
-def verify_telegram_auth(auth_data, bot_token):
-    """Verify Telegram authentication data"""
-    check_hash = auth_data.pop('hash', None)
-    if not check_hash:
-        return False
-    
-    # Для разработки пропускаем проверку hash
-    if check_hash.startswith('dev_hash_'):
-        return True
-    
-    data_check_arr = [f"{k}={v}" for k, v in sorted(auth_data.items())]
-    data_check_string = '\n'.join(data_check_arr)
-    
-    secret_key = hashlib.sha256(bot_token.encode()).digest()
-    calculated_hash = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
-    
-    return calculated_hash == check_hash
-
-
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def telegram_auth(request):
@@ -46,6 +30,11 @@ def telegram_auth(request):
                 'details': serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Повтор уже проверенного логина — тот же ответ без HMAC и БД
+        cached = get_cached_auth(serializer.validated_data)
+        if cached is not None:
+            return Response(cached, status=status.HTTP_200_OK)
+
         auth_data = serializer.validated_data.copy()
         bot_token = settings.TELEGRAM_BOT_TOKEN
         
@@ -56,55 +45,20 @@ def telegram_auth(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        telegram_id = auth_data['id']
-        
-        # Get or create user
-        try:
-            profile = UserProfile.objects.get(telegram_id=telegram_id)
-            user = profile.user
-            created = False
-        except UserProfile.DoesNotExist:
-            # Create new user
-            username = auth_data.get('username') or f"tg_user_{telegram_id}"
-            
-            # Check if username already exists and make it unique
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}_{counter}"
-                counter += 1
-            
-            user = User.objects.create_user(
-                username=username,
-                first_name=auth_data.get('first_name', ''),
-                last_name=auth_data.get('last_name', '')
-            )
-            
-            # Get or create profile (signal should create it, but let's be safe)
-            try:
-                profile = user.profile
-            except UserProfile.DoesNotExist:
-                profile = UserProfile.objects.create(user=user)
-            
-            created = True
-        
-        # Update profile with Telegram data
-        profile.telegram_id = telegram_id
-        profile.telegram_username = auth_data.get('username', '')
-        profile.telegram_first_name = auth_data.get('first_name', '')
-        profile.telegram_last_name = auth_data.get('last_name', '')
-        profile.telegram_photo_url = auth_data.get('photo_url', '')
-        profile.save()
+        # Get or create user (fixed number of queries, only changed profile fields are written)
+        user, created = get_or_create_telegram_user(auth_data)
         
         # Generate JWT tokens
         refresh = RefreshToken.for_user(user)
         
-        return Response({
+        payload = {
             'access': str(refresh.access_token),
             'refresh': str(refresh),
             'user': UserSerializer(user).data,
             'created': created
-        }, status=status.HTTP_200_OK)
+        }
+        cache_auth(serializer.validated_data, payload)
+        return Response(payload, status=status.HTTP_200_OK)
         
     except Exception as e:
         # Return detailed error for debugging
@@ -226,8 +180,13 @@ def current_user(request):
 
 @api_view(['POST'])
 def check_telegram_subscription(request):
-    """Check if user is subscribed to Telegram channel"""
-    from .telegram_utils import check_telegram_subscription as check_subscription
+    """
+    Статус подписки на Telegram-канал из кэша профиля
+
+    В Telegram не ходим: устаревший статус перепроверит
+    refresh_subscriptions, а fresh=false подскажет клиенту спросить позже.
+    """
+    from .subscriptions import is_fresh
     
     user_profile = request.user.profile
     
@@ -236,29 +195,15 @@ def check_telegram_subscription(request):
             'error': 'User not linked to Telegram'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Check subscription via Telegram Bot API
-    channel_id = settings.TELEGRAM_CHANNEL_ID
-    subscription_result = check_subscription(user_profile.telegram_id, channel_id)
-    
-    if subscription_result['error']:
-        # If API error, return current cached status
-        return Response({
-            'is_subscribed': user_profile.is_telegram_subscriber,
-            'has_premium': user_profile.has_premium_access,
-            'api_error': subscription_result['error']
-        })
-    
-    # Update profile with fresh subscription status
-    is_subscribed = subscription_result['is_subscribed']
-    user_profile.is_telegram_subscriber = is_subscribed
-    user_profile.has_premium_access = is_subscribed  # Premium access = subscription
-    user_profile.save()
-    
     return Response({
-        'is_subscribed': is_subscribed,
-        'has_premium': is_subscribed,
-        'status': subscription_result['status']
+        'is_subscribed': user_profile.is_telegram_subscriber,
+        'has_premium': user_profile.has_premium_access,
+        'status': user_profile.subscription_status,
+        'checked_at': user_profile.subscription_checked_at,
+        'fresh': is_fresh(user_profile),
     })
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_root(request):
@@ -271,6 +216,7 @@ def api_root(request):
         'status': 'running',
         'endpoints': {
             'auth': '/api/auth/telegram/',
+            'refresh': '/api/auth/refresh/',
             'user': '/api/auth/me/',
             'subscription': '/api/auth/subscription/',
             'cards': '/api/cards/',
@@ -282,6 +228,15 @@ def api_root(request):
     })
 
 
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication, SessionAuthentication])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Метрики запросов всех процессов в формате Prometheus (только staff)"""
+    body = request_metrics.render(request_metrics.collect())
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def health_check(request):
@@ -306,62 +261,38 @@ def health_check(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def init_database(request):
-    """Initialize database with sample data"""
+    """
+    Initialize database with the catalog fixtures
+
+    Доступно без авторизации для первого запуска, поэтому только
+    создаёт каталог в пустой базе: правки админа и его теги не
+    перезаписываются. Обновление каталога — manage.py load_catalog.
+    """
     try:
-        from apps.cards.models import Card, Series
-        from decimal import Decimal
-        
-        # Create series if not exists
-        series, created = Series.objects.get_or_create(
-            number=1,
-            defaults={
-                'title': 'Spider-Man Collection'
-            }
-        )
-        
-        # Create sample cards
-        sample_cards = [
-            {
-                'number': 1,
-                'title': 'Человек-Паук',
-                'rarity': 'o',
-                'base_price_rub': Decimal('52.50'),
-                'notes': 'Основной герой комиксов Marvel',
-                'series': series
-            },
-            {
-                'number': 2,
-                'title': 'Железный Человек',
-                'rarity': 'o',
-                'base_price_rub': Decimal('55.00'),
-                'notes': 'Гений, миллиардер, филантроп',
-                'series': series
-            },
-            {
-                'number': 3,
-                'title': 'Веном',
-                'rarity': 'ск',
-                'base_price_rub': Decimal('92.50'),
-                'notes': 'Симбиот и бывший хост Эдди Брок',
-                'series': series
-            }
-        ]
-        
-        created_count = 0
-        for card_data in sample_cards:
-            card, created = Card.objects.get_or_create(
-                number=card_data['number'],
-                series=series,
-                defaults=card_data
-            )
-            if created:
-                created_count += 1
+        from apps.cards.catalog import CatalogPlan, fixture_paths, read_fixture
+        from apps.cards.models import Card
+
+        if Card.objects.exists():
+            return Response({
+                'status': 'skipped',
+                'message': 'Каталог уже заполнен',
+                'total_cards': Card.objects.count(),
+                'timestamp': str(timezone.now())
+            })
+
+        rows = []
+        for path in fixture_paths():
+            rows.extend(read_fixture(path)[1])
+        plan = CatalogPlan(rows)
+        diff = plan.diff()
+        plan.apply()
         
         total_cards = Card.objects.count()
         return Response({
             'status': 'success',
             'message': f'База данных инициализирована',
-            'cards_created': created_count,
+            'cards_created': len(diff['cards_created']),
+            'cards_updated': len(diff['cards_updated']),
             'total_cards': total_cards,
             'timestamp': str(timezone.now())
         })
@@ -0,0 +1,228 @@
+"""
+Потоковый импорт прайс-фидов в PriceRecord
+
+Фид (CSV, XLSX или JSON lines) читается построчно, строки сопоставляются
+с карточками по (номер серии, номер карточки) через словарь, собранный
+одним запросом, и пишутся bulk_create пачками. Цена, совпадающая с
+последней известной, не записывается. Память ограничена размером
+каталога и одной пачки, а не размером фида.
+"""
+
+import csv
+import io
+import itertools
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+from apps.cards.models import Card
+from .models import LatestPrice, PriceRecord
+from .valuation import bulk_record_prices
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl нужен только для XLSX
+    openpyxl = None
+
+
+FORMATS = ('csv', 'xlsx', 'jsonl')
+
+# Допустимые названия колонок фида
+COLUMN_ALIASES = {
+    'series': 'series',
+    'series_number': 'series',
+    'серия': 'series',
+    'number': 'number',
+    'card_number': 'number',
+    'номер': 'number',
+    'price': 'price',
+    'price_rub': 'price',
+    'цена': 'price',
+}
+
+# Сколько ошибок строк возвращать в отчёте
+MAX_REPORTED_ERRORS = 100
+
+PRICE_FIELD = PriceRecord._meta.get_field('price_rub')
+# Цена строго меньше: иначе не влезет в PriceRecord.price_rub
+MAX_PRICE = Decimal(10) ** (PRICE_FIELD.max_digits - PRICE_FIELD.decimal_places)
+
+
+class PriceFeedError(Exception):
+    """Фид нельзя прочитать целиком (формат, заголовок)"""
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('json', 'ndjson'):
+        return 'jsonl'
+    if extension in FORMATS:
+        return extension
+    raise PriceFeedError(f'Unknown feed format: {path}')
+
+
+def normalize_row(row):
+    return {
+        COLUMN_ALIASES[str(key).strip().lower()]: value
+        for key, value in row.items()
+        if key is not None and str(key).strip().lower() in COLUMN_ALIASES
+    }
+
+
+def read_csv(stream, delimiter=None):
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    header = stream.readline()
+    if delimiter is None:
+        # Выгрузки из русской локали Excel/Sheets разделены точкой с запятой
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+    # Первая строка данных — вторая в файле после заголовка
+    for line, row in enumerate(csv.DictReader(itertools.chain([header], stream), delimiter=delimiter), start=2):
+        yield line, normalize_row(row)
+
+
+def read_jsonl(stream):
+    # Заголовка нет, пустые строки пропускаются, но номер строки файла сохраняется
+    for line, text in enumerate(stream, start=1):
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            # Ошибка разбора строки — как пустая строка, её отметит валидация
+            row = {}
+        yield line, normalize_row(row if isinstance(row, dict) else {})
+
+
+def read_xlsx(stream):
+    if openpyxl is None:
+        raise PriceFeedError('XLSX feeds require openpyxl')
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for line, values in enumerate(rows, start=2):
+            yield line, normalize_row(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+# Читатель отдаёт (номер строки в файле, строка с нормализованными колонками)
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+    'xlsx': read_xlsx,
+}
+
+
+def parse_price(value):
+    if isinstance(value, (int, float, Decimal)):
+        price = Decimal(str(value))
+    else:
+        price = Decimal(str(value or '').replace(' ', '').replace('\xa0', '').replace(',', '.'))
+    # NaN/Infinity и то, что не влезет в PriceRecord.price_rub: иначе упадёт вся пачка bulk_create
+    if not price.is_finite():
+        raise InvalidOperation
+    price = price.quantize(Decimal('0.01'))
+    if price < 0 or price >= MAX_PRICE:
+        raise InvalidOperation
+    return price
+
+
+def parse_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return int(str(value).strip())
+
+
+class PriceFeedImporter:
+    """
+    Импорт одного фида
+
+    Использование:
+        report = PriceFeedImporter(source='avito').run(stream, 'csv')
+    """
+
+    def __init__(self, source='feed', batch_size=5000, dry_run=False):
+        self.source = source
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def load_maps(self):
+        """Словари (серия, номер) -> card_id и card_id -> последняя цена"""
+        self.cards = {
+            (series_number, number): card_id
+            for card_id, series_number, number in Card.objects.values_list(
+                'id', 'series__number', 'number'
+            ).order_by().iterator(chunk_size=self.batch_size)
+        }
+        self.last_prices = dict(
+            LatestPrice.objects.values_list('card_id', 'price_rub').iterator(chunk_size=self.batch_size)
+        )
+
+    def run(self, stream, feed_format, delimiter=None):
+        """
+        Returns:
+            Отчёт: rows, created, unchanged, unknown, invalid, errors, seconds, rows_per_second
+        """
+        started = time.monotonic()
+        self.load_maps()
+        report = {'rows': 0, 'created': 0, 'unchanged': 0, 'unknown': 0, 'invalid': 0, 'errors': []}
+
+        reader = READERS[feed_format]
+        rows = reader(stream, delimiter) if feed_format == 'csv' else reader(stream)
+        batch = []
+        for line, row in rows:
+            report['rows'] += 1
+            try:
+                key = (parse_number(row['series']), parse_number(row['number']))
+                price = parse_price(row['price'])
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                self.reject(report, 'invalid', line, f'Expected series, number and a price from 0 below {MAX_PRICE}')
+                continue
+
+            card_id = self.cards.get(key)
+            if card_id is None:
+                self.reject(report, 'unknown', line, f'Card {key[0]}/{key[1]} not found')
+                continue
+            if self.last_prices.get(card_id) == price:
+                report['unchanged'] += 1
+                continue
+
+            self.last_prices[card_id] = price
+            batch.append(PriceRecord(card_id=card_id, source=self.source, price_rub=price))
+            if len(batch) >= self.batch_size:
+                report['created'] += self.flush(batch)
+                batch = []
+
+        report['created'] += self.flush(batch)
+        report['seconds'] = round(time.monotonic() - started, 3)
+        report['rows_per_second'] = round(report['rows'] / report['seconds']) if report['seconds'] else report['rows']
+        return report
+
+    def reject(self, report, kind, line, message):
+        report[kind] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line, 'error': message})
+
+    def flush(self, batch):
+        """Пишет пачку цен вместе с LatestPrice"""
+        if not self.dry_run:
+            bulk_record_prices(batch)
+        return len(batch)
+
+
+def import_price_feed(path, feed_format=None, **options):
+    """Импорт фида из файла; формат по расширению, если не указан"""
+    feed_format = feed_format or detect_format(path)
+    delimiter = options.pop('delimiter', None)
+    mode = 'rb' if feed_format == 'xlsx' else 'r'
+    kwargs = {} if feed_format == 'xlsx' else {'encoding': 'utf-8-sig', 'newline': ''}
+    with open(path, mode, **kwargs) as stream:
+        return PriceFeedImporter(**options).run(stream, feed_format, delimiter)
@@ -0,0 +1,40 @@
+"""
+Django команда для импорта прайс-фида (CSV, XLSX, JSON lines)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.importer import FORMATS, PriceFeedError, import_price_feed
+
+
+class Command(BaseCommand):
+    help = 'Импортирует цены карточек из файла фида'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу фида')
+        parser.add_argument('--format', choices=FORMATS, help='Формат (по умолчанию по расширению)')
+        parser.add_argument('--source', default='feed', help='Значение PriceRecord.source')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--delimiter', help='Разделитель CSV (по умолчанию определяется)')
+        parser.add_argument('--dry-run', action='store_true', help='Только проверить фид, ничего не записывать')
+
+    def handle(self, *args, **options):
+        try:
+            report = import_price_feed(
+                options['path'],
+                options['format'],
+                source=options['source'],
+                batch_size=options['batch_size'],
+                delimiter=options['delimiter'],
+                dry_run=options['dry_run'],
+            )
+        except (OSError, PriceFeedError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"  строка {error['line']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Строк: {report['rows']}, новых цен: {report['created']}, "
+            f"без изменений: {report['unchanged']}, неизвестных карточек: {report['unknown']}, "
+            f"ошибок: {report['invalid']} — {report['seconds']} с ({report['rows_per_second']} строк/с)"
+        ))
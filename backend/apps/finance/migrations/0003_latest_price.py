@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_latest_prices(apps, schema_editor):
+    PriceRecord = apps.get_model('finance', 'PriceRecord')
+    LatestPrice = apps.get_model('finance', 'LatestPrice')
+    newest = PriceRecord.objects.filter(card_id=models.OuterRef('card_id')).order_by('-recorded_at', '-id')
+    rows = PriceRecord.objects.filter(id=models.Subquery(newest.values('id')[:1])).values_list(
+        'card_id', 'price_rub', 'source', 'recorded_at',
+    )
+    LatestPrice.objects.bulk_create(
+        [
+            LatestPrice(card_id=card_id, price_rub=price, source=source, recorded_at=recorded_at)
+            for card_id, price, source, recorded_at in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_card_search_indexes'),
+        ('finance', '0002_trade_owner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestPrice',
+            fields=[
+                ('card', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_price', serialize=False, to='cards.card')),
+                ('price_rub', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('source', models.CharField(max_length=50)),
+                ('recorded_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pricerecord',
+            index=models.Index(fields=['card', 'recorded_at'], name='price_card_recorded_idx'),
+        ),
+        migrations.RunPython(fill_latest_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+"""
+Владелец у сделок, заведённых до поля owner
+
+До 0002_trade_owner коллекция была одна: записи без авторизации шли
+тестовому пользователю, и сделки без владельца — его. Им и отдаём такие
+сделки, а если тестового пользователя нет, но пользователь один — ему.
+Иначе владельца не угадать: сделки остаются без него и в аналитике не
+видны, пока его не проставят вручную (после — rebuild_owner_stats).
+
+Сводки аналитики производные, поэтому для нового владельца они
+пересчитываются целиком обычными функциями пересчёта.
+"""
+
+from django.conf import settings
+from django.db import migrations
+
+TEST_USERNAME = 'test_user'
+
+
+def legacy_owner_id(User):
+    owner_id = User.objects.filter(username=TEST_USERNAME).values_list('id', flat=True).first()
+    if owner_id is None:
+        ids = list(User.objects.values_list('id', flat=True)[:2])
+        owner_id = ids[0] if len(ids) == 1 else None
+    return owner_id
+
+
+def assign_legacy_trades(apps, schema_editor):
+    Trade = apps.get_model('finance', 'Trade')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    if not Trade.objects.filter(owner__isnull=True).exists():
+        return
+    owner_id = legacy_owner_id(User)
+    if owner_id is None:
+        return
+    Trade.objects.filter(owner__isnull=True).update(owner_id=owner_id)
+
+    from apps.analytics.rollups import rebuild_owner_stats
+    from apps.analytics.timeseries import rebuild_trade_buckets
+
+    rebuild_owner_stats(owner_id)
+    rebuild_trade_buckets(owner_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_tradebucket'),
+        ('finance', '0003_latest_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_legacy_trades, migrations.RunPython.noop, elidable=True),
+    ]
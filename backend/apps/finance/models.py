@@ -1,4 +1,5 @@
 from django.db import models
+from django.conf import settings
 from apps.cards.models import Card
 
 
@@ -9,6 +10,9 @@ class Trade(models.Model):
     ]
 
     card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="trades")
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="trades", null=True, blank=True
+    )
     trade_type = models.CharField(max_length=4, choices=TRADE_TYPE)
     quantity = models.PositiveIntegerField(default=1)
     price_rub = models.DecimalField(max_digits=10, decimal_places=2)
@@ -26,4 +30,27 @@ class PriceRecord(models.Model):
     price_rub = models.DecimalField(max_digits=10, decimal_places=2)
     recorded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Последняя цена карточки на дату: WHERE card_id = ? AND recorded_at <= ? ORDER BY recorded_at DESC
+            models.Index(fields=["card", "recorded_at"], name="price_card_recorded_idx"),
+        ]
+
+
+class LatestPrice(models.Model):
+    """
+    Последняя известная цена карточки
+
+    Кэш greatest-n-per-group по PriceRecord, обновляется сигналами
+    при записи цен (apps/finance/valuation.py).
+    """
+
+    card = models.OneToOneField(Card, on_delete=models.CASCADE, related_name="latest_price", primary_key=True)
+    price_rub = models.DecimalField(max_digits=10, decimal_places=2)
+    source = models.CharField(max_length=50)
+    recorded_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.card_id}: {self.price_rub}₽ @ {self.recorded_at}"
+
 # Create your models here.
@@ -0,0 +1,25 @@
+"""
+Сигналы финансов: новые цены обновляют кэш LatestPrice
+
+О каждой новой цене сообщает сигнал prices_recorded (см. valuation).
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import PriceRecord
+from .valuation import prices_recorded, record_latest_price, refresh_latest_prices
+
+
+@receiver(post_save, sender=PriceRecord)
+def on_price_saved(sender, instance, created, **kwargs):
+    if created:
+        record_latest_price(instance)
+        prices_recorded.send(sender=PriceRecord, records=[instance])
+    else:
+        refresh_latest_prices([instance.card_id])
+
+
+@receiver(post_delete, sender=PriceRecord)
+def on_price_deleted(sender, instance, **kwargs):
+    refresh_latest_prices([instance.card_id])
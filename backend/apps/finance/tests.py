@@ -1,3 +1,149 @@
+"""
+Тесты финансов
+"""
+
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.cards.models import Series, Card
+from apps.inventory.models import InventoryItem
+from .importer import PriceFeedImporter
+from .models import LatestPrice, PriceRecord
+from .valuation import refresh_latest_prices, value_inventory
+
+
+class ValuationTest(TestCase):
+    """Тесты оценки коллекции по последним ценам"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="collector")
+        series = Series.objects.create(number=1, title="Series 1")
+        self.cards = [
+            Card.objects.create(
+                title=f"Card {number}", number=number, rarity="o", series=series,
+                base_price_rub=Decimal("10"),
+            )
+            for number in (1, 2, 3)
+        ]
+        InventoryItem.objects.create(card=self.cards[0], owner=self.user, has_card=True, quantity=2, condition="M")
+        InventoryItem.objects.create(card=self.cards[1], owner=self.user, has_card=True, quantity=1, condition="HP")
+        InventoryItem.objects.create(card=self.cards[2], owner=self.user, has_card=False)
+
+    def price(self, card, price, day):
+        record = PriceRecord.objects.create(card=card, price_rub=Decimal(price))
+        moment = timezone.make_aware(datetime(day.year, day.month, day.day, 12))
+        PriceRecord.objects.filter(pk=record.pk).update(recorded_at=moment)
+        return record
+
+    def test_latest_price_cache(self):
+        PriceRecord.objects.create(card=self.cards[0], price_rub=Decimal("100"))
+        second = PriceRecord.objects.create(card=self.cards[0], price_rub=Decimal("120"))
+        self.assertEqual(LatestPrice.objects.get(card=self.cards[0]).price_rub, Decimal("120"))
+
+        second.delete()
+        self.assertEqual(LatestPrice.objects.get(card=self.cards[0]).price_rub, Decimal("100"))
+
+    def test_value_with_conditions_and_fallback(self):
+        PriceRecord.objects.create(card=self.cards[0], price_rub=Decimal("100"))
+
+        with self.assertNumQueries(1):
+            valuation = value_inventory(self.user.id)
+
+        # 2 × 100 × 1.00 (M) + 1 × 10 (базовая) × 0.40 (HP)
+        self.assertEqual(valuation, {'total': Decimal("204.00"), 'cards': 2, 'priced_cards': 1})
+
+    def test_historical_value(self):
+        self.price(self.cards[0], "50", date(2024, 1, 10))
+        self.price(self.cards[0], "80", date(2024, 3, 10))
+        self.price(self.cards[1], "20", date(2024, 2, 10))
+        refresh_latest_prices()
+
+        self.assertEqual(value_inventory(self.user.id, date(2024, 1, 31))['total'], Decimal("104.00"))
+        self.assertEqual(value_inventory(self.user.id, date(2024, 2, 10))['total'], Decimal("108.00"))
+        self.assertEqual(value_inventory(self.user.id)['total'], Decimal("168.00"))
+        self.assertEqual(value_inventory(self.user.id, date(2023, 12, 31))['priced_cards'], 0)
+
+    def test_refresh_drops_prices_without_records(self):
+        self.price(self.cards[0], "50", date(2024, 1, 10))
+        LatestPrice.objects.create(card=self.cards[1], price_rub=Decimal("20"), recorded_at=timezone.now())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(refresh_latest_prices(), 1)
+        self.assertEqual(list(LatestPrice.objects.values_list('card_id', flat=True)), [self.cards[0].id])
+        # Подзапрос вместо списка всех карточек с ценой
+        self.assertTrue(any('NOT (EXISTS(' in query['sql'] for query in queries))
+
+
+class PriceFeedImportTest(TestCase):
+    """Тесты импорта прайс-фидов"""
+
+    def setUp(self):
+        self.cards = {}
+        for series_number in (1, 2):
+            series = Series.objects.create(number=series_number, title=f"Series {series_number}")
+            for number in range(1, 51):
+                self.cards[(series_number, number)] = Card.objects.create(
+                    title=f"Card {number}", number=number, rarity="o", series=series
+                )
+        PriceRecord.objects.create(card=self.cards[(1, 1)], price_rub=Decimal("10.00"))
+
+    def test_csv_feed(self):
+        lines = ["Серия;Номер;Цена"]
+        lines += [f"{series};{number};{number},50" for series in (1, 2) for number in range(1, 51)]
+        lines += ["1;2;2,50", "3;1;5", "1;x;5", "1;2;-1"]
+        feed = io.StringIO("\n".join(lines))
+
+        # Два словаря + одна пачка (savepoint, insert, upsert LatestPrice, release)
+        with self.assertNumQueries(6):
+            report = PriceFeedImporter(source="avito").run(feed, "csv")
+
+        self.assertEqual(report['rows'], 104)
+        self.assertEqual(report['created'], 100)
+        self.assertEqual(report['unchanged'], 1)
+        self.assertEqual(report['unknown'], 1)
+        self.assertEqual(report['invalid'], 2)
+        self.assertEqual([error['line'] for error in report['errors']], [103, 104, 105])
+        self.assertEqual(LatestPrice.objects.get(card=self.cards[(2, 7)]).price_rub, Decimal("7.50"))
+        self.assertEqual(PriceRecord.objects.filter(source="avito").count(), 100)
+
+    def test_jsonl_dedupes_against_last_price(self):
+        feed = io.StringIO("\n".join(json.dumps(row) for row in [
+            {"series": 1, "number": 1, "price": "10.00"},
+            {"series": 1, "number": 2, "price": 12},
+            {"series": 1, "number": 2, "price": 12},
+            {"series": 1, "number": 3, "price": 7},
+        ]))
+
+        report = PriceFeedImporter(batch_size=1).run(feed, "jsonl")
+
+        self.assertEqual((report['created'], report['unchanged']), (2, 2))
+        self.assertEqual(LatestPrice.objects.count(), 3)
+
+    def test_jsonl_line_numbers_and_price_bounds(self):
+        feed = io.StringIO("\n".join([
+            json.dumps({"series": 1, "number": 2, "price": "NaN"}),
+            "",
+            json.dumps({"series": 1, "number": 3, "price": "123456789012"}),
+            json.dumps({"series": 1, "number": 4, "price": "99999999.99"}),
+            json.dumps({"series": 1, "number": 5, "price": "99999999.995"}),
+        ]))
+
+        report = PriceFeedImporter().run(feed, "jsonl")
+
+        # Строки файла с единицы, пустая строка не сбивает счёт
+        self.assertEqual([error['line'] for error in report['errors']], [1, 3, 5])
+        self.assertEqual((report['invalid'], report['created']), (3, 1))
+        self.assertEqual(LatestPrice.objects.get(card=self.cards[(1, 4)]).price_rub, Decimal("99999999.99"))
 
-# Create your tests here.
+    def test_dry_run(self):
+        feed = io.StringIO("series,number,price\n1,2,5\n")
+        report = PriceFeedImporter(dry_run=True).run(feed, "csv")
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(PriceRecord.objects.count(), 1)
@@ -0,0 +1,173 @@
+"""
+Оценка коллекции по рыночным ценам
+
+Текущая цена карточки берётся из LatestPrice (последний PriceRecord),
+при её отсутствии — базовая цена карточки. Стоимость строки инвентаря:
+quantity × цена × множитель состояния; вся коллекция считается одним
+агрегатным запросом. Историческая оценка на дату выбирает последнюю
+цену не позже даты подзапросом по индексу (card, recorded_at).
+"""
+
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.inventory.models import InventoryItem
+from .models import LatestPrice, PriceRecord
+
+
+# Доля рыночной цены в зависимости от состояния карточки
+CONDITION_MULTIPLIERS = {
+    'M': Decimal('1.00'),
+    'NM': Decimal('0.90'),
+    'SP': Decimal('0.75'),
+    'MP': Decimal('0.60'),
+    'HP': Decimal('0.40'),
+    'DM': Decimal('0.25'),
+}
+
+# Новые цены записаны (и одиночные, и пачкой bulk_record_prices).
+# Аргумент records: список PriceRecord. Сигнал живёт здесь, а не в
+# signals.py, потому что signals.py сам импортирует этот модуль.
+prices_recorded = Signal()
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def record_latest_price(record):
+    """Обновляет LatestPrice, если запись новее сохранённой цены"""
+    values = {
+        'price_rub': record.price_rub,
+        'source': record.source,
+        'recorded_at': record.recorded_at,
+    }
+    latest = LatestPrice.objects.filter(card_id=record.card_id)
+    if latest.filter(recorded_at__lte=record.recorded_at).update(**values):
+        return
+    if latest.exists():
+        # Сохранённая цена новее
+        return
+    try:
+        with transaction.atomic():
+            LatestPrice.objects.create(card_id=record.card_id, **values)
+    except IntegrityError:
+        latest.filter(recorded_at__lte=record.recorded_at).update(**values)
+
+
+def bulk_record_prices(records):
+    """
+    Пишет пачку PriceRecord и обновляет LatestPrice одним upsert
+
+    bulk_create не шлёт сигналы, поэтому массовые записи цен идут сюда.
+    """
+    if not records:
+        return
+    with transaction.atomic():
+        PriceRecord.objects.bulk_create(records)
+        LatestPrice.objects.bulk_create(
+            [
+                LatestPrice(
+                    card_id=record.card_id,
+                    price_rub=record.price_rub,
+                    source=record.source,
+                    recorded_at=record.recorded_at,
+                )
+                # Для карточки в пачке важна только последняя цена
+                for record in {record.card_id: record for record in records}.values()
+            ],
+            update_conflicts=True,
+            unique_fields=['card'],
+            update_fields=['price_rub', 'source', 'recorded_at'],
+        )
+        prices_recorded.send(sender=PriceRecord, records=records)
+
+
+def refresh_latest_prices(card_ids=None):
+    """
+    Пересчитывает LatestPrice из PriceRecord
+
+    Args:
+        card_ids: ограничить карточками (None — весь каталог)
+    """
+    records = PriceRecord.objects.all()
+    if card_ids is not None:
+        records = records.filter(card_id__in=card_ids)
+    newest = PriceRecord.objects.filter(card_id=OuterRef('card_id')).order_by('-recorded_at', '-id')
+    rows = records.filter(id=Subquery(newest.values('id')[:1])).values_list(
+        'card_id', 'price_rub', 'source', 'recorded_at',
+    )
+    prices = [
+        LatestPrice(card_id=card_id, price_rub=price, source=source, recorded_at=recorded_at)
+        for card_id, price, source, recorded_at in rows
+    ]
+
+    with transaction.atomic():
+        # Карточки, у которых не осталось ни одной записи: подзапрос, а не список всех id с ценой
+        stale = LatestPrice.objects.exclude(Exists(PriceRecord.objects.filter(card_id=OuterRef('card_id'))))
+        if card_ids is not None:
+            stale = stale.filter(card_id__in=card_ids)
+        stale.delete()
+        LatestPrice.objects.bulk_create(
+            prices,
+            update_conflicts=True,
+            unique_fields=['card'],
+            update_fields=['price_rub', 'source', 'recorded_at'],
+        )
+    return len(prices)
+
+
+def condition_multiplier():
+    return Case(
+        *[When(Q(condition=condition), then=Value(multiplier)) for condition, multiplier in CONDITION_MULTIPLIERS.items()],
+        default=Value(Decimal('1.00')),
+        output_field=MONEY,
+    )
+
+
+def value_inventory(owner_id, at=None):
+    """
+    Стоимость коллекции владельца
+
+    Args:
+        at: дата оценки (None — по последним ценам). Берётся текущий
+            состав коллекции, истории инвентаря нет.
+
+    Returns:
+        {'total', 'cards', 'priced_cards'}: priced_cards — сколько карточек
+        оценено по PriceRecord, остальные по базовой цене
+    """
+    items = InventoryItem.objects.filter(owner_id=owner_id, has_card=True)
+    if at is None:
+        market = F('card__latest_price__price_rub')
+    else:
+        moment = datetime.combine(at, time.max)
+        if settings.USE_TZ:
+            moment = timezone.make_aware(moment)
+        market = Subquery(
+            PriceRecord.objects.filter(
+                card_id=OuterRef('card_id'), recorded_at__lte=moment,
+            ).order_by('-recorded_at', '-id').values('price_rub')[:1],
+            output_field=MONEY,
+        )
+    items = items.annotate(market_price=market)
+    price = Coalesce('market_price', 'card__base_price_rub', output_field=MONEY)
+
+    totals = items.aggregate(
+        total=Sum(F('quantity') * price * condition_multiplier(), output_field=MONEY),
+        cards=Count('id'),
+        priced_cards=Count('id', filter=Q(market_price__isnull=False)),
+    )
+    return {
+        'total': Decimal(totals['total'] or 0).quantize(CENT),
+        'cards': totals['cards'],
+        'priced_cards': totals['priced_cards'],
+    }
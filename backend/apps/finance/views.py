@@ -3,6 +3,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Avg
 from .models import Trade, PriceRecord
 from .serializers import TradeSerializer, PriceRecordSerializer
+from apps.core.owners import get_request_owner
 
 
 class TradeViewSet(viewsets.ModelViewSet):
@@ -14,6 +15,9 @@ class TradeViewSet(viewsets.ModelViewSet):
     ordering_fields = ['date', 'price_rub']
     ordering = ['-date']
 
+    def perform_create(self, serializer):
+        serializer.save(owner=get_request_owner(self.request, create=True))
+
 
 class PriceRecordViewSet(viewsets.ModelViewSet):
     queryset = PriceRecord.objects.select_related('card__series')
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
+
+    def ready(self):
+        from apps.core import blobs, images
+        from . import signals  # noqa: F401
+        from .models import CardImage
+
+        images.track(CardImage, 'image', 'variants')
+        blobs.track(CardImage, 'image')
@@ -0,0 +1,97 @@
+"""
+Матрица заполненности коллекции
+
+Для каждой серии — какие номера карточек есть у владельца, в виде битовой
+карты (base64, бит i = номер first_number + i) и списка отрезков [start, end].
+Считается одним запросом: Card LEFT JOIN InventoryItem владельца.
+"""
+
+import base64
+
+from django.core.cache import cache
+from django.db.models import FilteredRelation, Q
+
+from apps.cards.models import Card
+from apps.cards.snapshot import get_catalog_version
+from .versioning import get_inventory_version
+
+
+CACHE_KEY = 'inventory:completeness:{owner_id}:{inventory_version}:{catalog_version}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def encode_series(numbers, owned):
+    """
+    Args:
+        numbers: номера карточек серии по возрастанию
+        owned: множество номеров, которые есть у владельца
+    """
+    first, last = numbers[0], numbers[-1]
+    bitmap = bytearray((last - first) // 8 + 1)
+    runs = []
+    for number in numbers:
+        if number not in owned:
+            continue
+        offset = number - first
+        bitmap[offset // 8] |= 1 << (offset % 8)
+        if runs and runs[-1][1] == number - 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+
+    return {
+        'first_number': first,
+        'last_number': last,
+        'total': len(numbers),
+        'owned': len(owned),
+        'bitmap': base64.b64encode(bytes(bitmap)).decode('ascii'),
+        'runs': runs,
+    }
+
+
+def build_completeness(owner_id):
+    rows = Card.objects.annotate(
+        mine=FilteredRelation('inventory_items', condition=Q(inventory_items__owner_id=owner_id)),
+    ).order_by('series__number', 'number').values_list(
+        'series_id', 'series__number', 'series__title', 'number', 'mine__has_card',
+    )
+
+    series = []
+    current = None
+    for series_id, series_number, series_title, number, has_card in rows:
+        if current is None or current['series_id'] != series_id:
+            current = {
+                'series_id': series_id,
+                'series_number': series_number,
+                'series_title': series_title,
+                'numbers': [],
+                'owned': set(),
+            }
+            series.append(current)
+        current['numbers'].append(number)
+        if has_card:
+            current['owned'].add(number)
+
+    return [
+        {
+            'series_id': item['series_id'],
+            'series_number': item['series_number'],
+            'series_title': item['series_title'],
+            **encode_series(item['numbers'], item['owned']),
+        }
+        for item in series
+    ]
+
+
+def get_completeness(owner_id):
+    """Матрица заполненности из кэша, пересчёт при смене инвентаря или каталога"""
+    key = CACHE_KEY.format(
+        owner_id=owner_id,
+        inventory_version=get_inventory_version(owner_id),
+        catalog_version=get_catalog_version(),
+    )
+    result = cache.get(key)
+    if result is None:
+        result = build_completeness(owner_id)
+        cache.set(key, result, timeout=CACHE_TIMEOUT)
+    return result
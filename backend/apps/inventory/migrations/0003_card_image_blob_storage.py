@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:03
+
+import apps.core.storage
+import apps.inventory.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_card_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cardimage',
+            name='image',
+            field=models.ImageField(storage=apps.core.storage.get_blob_storage, upload_to=apps.inventory.models.card_image_upload_to),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 
 from apps.cards.models import Card
+from apps.core.storage import get_blob_storage
 
 
 class InventoryItem(models.Model):
@@ -36,7 +37,10 @@ def card_image_upload_to(instance, filename):
 
 class CardImage(models.Model):
     inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to=card_image_upload_to)
+    # Одинаковые файлы хранятся один раз (apps.core.storage), upload_to даёт только расширение
+    image = models.ImageField(upload_to=card_image_upload_to, storage=get_blob_storage)
+    # Уменьшенные копии WebP/AVIF (apps.core.images), заполняет воркер
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
 # Create your models here.
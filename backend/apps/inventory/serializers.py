@@ -1,12 +1,26 @@
 from rest_framework import serializers
+from apps.core.images import variant_urls
 from .models import InventoryItem, CardImage
 from apps.cards.serializers import CardSerializer
 
 
 class CardImageSerializer(serializers.ModelSerializer):
+    # thumb/medium/full в WebP/AVIF; пусто, пока воркер их не сделал
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = CardImage
-        fields = ['id', 'image', 'created_at']
+        fields = ['id', 'image', 'variants', 'created_at']
+
+    def get_variants(self, obj):
+        urls = variant_urls(obj.variants)
+        request = self.context.get('request')
+        if request is not None:
+            for entry in urls.values():
+                for key, value in entry.items():
+                    if isinstance(value, str):
+                        entry[key] = request.build_absolute_uri(value)
+        return urls
 
 
 class InventoryItemSerializer(serializers.ModelSerializer):
@@ -36,3 +50,14 @@ class CardImageCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = CardImage
         fields = ['id', 'image', 'inventory_item_id']
+
+
+class InventoryBulkItemSerializer(serializers.Serializer):
+    """Строка массового обновления инвентаря; отсутствующие поля не меняются"""
+    card_id = serializers.IntegerField()
+    has_card = serializers.BooleanField(required=False)
+    quantity = serializers.IntegerField(required=False, min_value=0)
+    condition = serializers.ChoiceField(choices=InventoryItem.CONDITION_CHOICES, required=False)
+    user_rating = serializers.DecimalField(
+        max_digits=4, decimal_places=2, required=False, allow_null=True
+    )
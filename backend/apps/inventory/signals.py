@@ -0,0 +1,28 @@
+"""
+Сигналы инвентаря: запись InventoryItem меняет версию инвентаря владельца
+
+bulk_create сигналов не шлёт, поэтому массовые операции отправляют
+items_bulk_upserted сами.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import InventoryItem
+from .versioning import inventory_changed
+
+
+# Аргументы: owner_id, before и after — {card_id: (has_card, quantity)}
+# для существовавших и для всех записанных строк
+items_bulk_upserted = Signal()
+
+
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+def on_inventory_write(sender, instance, **kwargs):
+    inventory_changed(instance.owner_id)
+
+
+@receiver(items_bulk_upserted)
+def on_inventory_bulk_upsert(sender, owner_id, **kwargs):
+    inventory_changed(owner_id)
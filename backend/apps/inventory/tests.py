@@ -1,3 +1,334 @@
-from django.test import TestCase
+"""
+Тесты инвентаря
+"""
 
-# Create your tests here.
+import base64
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.cards.models import Series, Card, Tag
+from apps.core import blobs, images
+from apps.core.blobs import change_refcount, collect_garbage, recount, register_blob
+from apps.core.jobs import work
+from apps.core.models import Blob
+from apps.inventory.models import CardImage, InventoryItem
+
+
+class InventoryListTest(TestCase):
+    """Тесты списка инвентаря"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="collector")
+        series = Series.objects.create(number=1, title="Series 1")
+        tag = Tag.objects.create(name="Герои")
+        for number in range(1, 6):
+            card = Card.objects.create(title=f"Card {number}", number=number, rarity="o", series=series)
+            card.tags.add(tag)
+            InventoryItem.objects.create(
+                card=card, owner=self.user, has_card=number % 2 == 1,
+                quantity=1, user_rating=number if number > 2 else None,
+            )
+
+    def test_list_queries_do_not_grow_with_items(self):
+        """Вложенные карточки, теги и фото подгружаются фиксированным числом запросов"""
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/inventory/items/')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['results'][0]['card']['tags'][0]['name'], "Герои")
+
+    def test_sparse_fields(self):
+        """?fields= без card и images обходится одним запросом"""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/inventory/items/?fields=id,has_card,quantity')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'has_card', 'quantity'})
+
+    def test_cursor_over_nullable_ordering(self):
+        """Курсор корректно проходит nullable-поле сортировки"""
+        ratings = []
+        url = '/api/inventory/items/?ordering=user_rating&page_size=2&fields=id,user_rating'
+        while url:
+            response = self.client.get(url)
+            ratings += [item['user_rating'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ratings, ['3.00', '4.00', '5.00', None, None])
+
+
+class InventoryBulkUpsertTest(TestCase):
+    """Тесты массового обновления инвентаря"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="collector")
+        self.client.force_authenticate(self.user)
+        series = Series.objects.create(number=1, title="Series 1")
+        self.cards = [
+            Card.objects.create(title=f"Card {number}", number=number, rarity="o", series=series)
+            for number in range(1, 4)
+        ]
+        self.existing = InventoryItem.objects.create(
+            card=self.cards[0], owner=self.user, has_card=False, quantity=0, condition="NO",
+            note="keep me",
+        )
+
+    def test_upsert(self):
+        """Создание и обновление строк одним запросом и фиксированным числом запросов"""
+        payload = [
+            {'card_id': self.cards[0].id, 'has_card': True, 'quantity': 2},
+            {'card_id': self.cards[1].id, 'has_card': True, 'quantity': 1, 'condition': 'NM'},
+            {'card_id': self.cards[2].id, 'has_card': True, 'quantity': 3, 'user_rating': '9.5'},
+        ]
+        # Карточки, транзакция (2), текущие строки, upsert, наличие OwnerStats
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/inventory/items/bulk/', payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'][0]['id'], self.existing.id)
+
+        self.existing.refresh_from_db()
+        self.assertTrue(self.existing.has_card)
+        self.assertEqual(self.existing.quantity, 2)
+        # Поля, не переданные в строке, не меняются
+        self.assertEqual(self.existing.condition, "NO")
+        self.assertEqual(self.existing.note, "keep me")
+        self.assertEqual(InventoryItem.objects.filter(owner=self.user).count(), 3)
+
+    def test_upsert_chunks_card_ids(self):
+        """Длинные списки id идут в IN частями"""
+        payload = [{'card_id': card.id, 'quantity': 1} for card in self.cards] + [{'card_id': 999999}]
+        # Карточки (2), транзакция (2), текущие строки (2), upsert, наличие OwnerStats
+        with mock.patch('apps.cards.catalog.IDS_PER_QUERY', 2), self.assertNumQueries(8):
+            response = self.client.post('/api/inventory/items/bulk/', payload, format='json')
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['errors']), (2, 1, 1))
+        self.assertEqual(response.data['results'][0]['id'], self.existing.id)
+
+    def test_row_errors(self):
+        """Ошибочные строки возвращаются по отдельности, остальные применяются"""
+        payload = [
+            {'card_id': self.cards[1].id, 'quantity': 1},
+            {'card_id': 999999, 'quantity': 1},
+            {'card_id': self.cards[1].id, 'quantity': 5},
+            {'quantity': 1},
+            {'card_id': self.cards[2].id, 'condition': 'XX'},
+        ]
+        response = self.client.post('/api/inventory/items/bulk/', payload, format='json')
+
+        statuses = [row['status'] for row in response.data['results']]
+        self.assertEqual(statuses, ['created', 'error', 'error', 'error', 'error'])
+        self.assertIn('card_id', response.data['results'][1]['errors'])
+        self.assertIn('condition', response.data['results'][4]['errors'])
+
+    def test_payload_must_be_list(self):
+        response = self.client.post('/api/inventory/items/bulk/', {'card_id': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CompletenessTest(TestCase):
+    """Тесты матрицы заполненности"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username="collector")
+        self.client.force_authenticate(self.user)
+        other = User.objects.create(username="other")
+        self.series = Series.objects.create(number=1, title="Series 1")
+        self.cards = {
+            number: Card.objects.create(title=f"Card {number}", number=number, rarity="o", series=self.series)
+            for number in range(1, 11)
+        }
+        for number in (1, 2, 3, 7):
+            InventoryItem.objects.create(card=self.cards[number], owner=self.user, has_card=True, quantity=1)
+        # Строка без карточки и чужая карточка не считаются
+        InventoryItem.objects.create(card=self.cards[5], owner=self.user, has_card=False)
+        InventoryItem.objects.create(card=self.cards[9], owner=other, has_card=True, quantity=1)
+
+    def get_series(self):
+        response = self.client.get('/api/inventory/items/completeness/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['series'][0]
+
+    def test_matrix(self):
+        """Отрезки и битовая карта по номерам карточек"""
+        with self.assertNumQueries(1):
+            series = self.get_series()
+        self.assertEqual(series['total'], 10)
+        self.assertEqual(series['owned'], 4)
+        self.assertEqual(series['runs'], [[1, 3], [7, 7]])
+        bitmap = base64.b64decode(series['bitmap'])
+        self.assertEqual(bitmap, bytes([0b01000111, 0b00000000]))
+
+    def test_cached_until_inventory_write(self):
+        """Ответ кэшируется и сбрасывается записью в инвентарь"""
+        self.get_series()
+        with self.assertNumQueries(0):
+            self.get_series()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryItem.objects.create(card=self.cards[4], owner=self.user, has_card=True, quantity=1)
+        self.assertEqual(self.get_series()['runs'], [[1, 4], [7, 7]])
+
+    def test_bulk_write_invalidates(self):
+        """Массовое обновление тоже сбрасывает кэш"""
+        self.get_series()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/inventory/items/bulk/', [
+                {'card_id': self.cards[10].id, 'has_card': True, 'quantity': 1},
+            ], format='json')
+        self.assertEqual(self.get_series()['runs'], [[1, 3], [7, 7], [10, 10]])
+
+
+def variant_files(variants):
+    return {
+        name for entry in variants.values() if isinstance(entry, dict)
+        for key, name in entry.items() if key in images.EXTENSIONS
+    }
+
+
+class CardImageUploadTest(TestCase):
+    """Загрузка фото: хранилище по содержимому и варианты от воркера"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create(username="collector")
+        card = Card.objects.create(title="Card", number=7, rarity="o", series=Series.objects.create(number=1, title="S"))
+        self.item = InventoryItem.objects.create(card=card, owner=self.user, has_card=True, quantity=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, color='blue'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 1400), color).save(buffer, format='JPEG')
+        photo = SimpleUploadedFile('scan.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/inventory/images/', {'image': photo, 'inventory_item_id': self.item.id})
+        self.assertEqual(response.status_code, 201)
+        return CardImage.objects.get(id=response.data['id'])
+
+    def test_upload_builds_variants_in_worker(self):
+        image = self.upload()
+        self.assertEqual(image.variants, {})
+        self.assertEqual(work(once=True), 1)
+
+        image.refresh_from_db()
+        self.assertEqual(image.variants['source'], image.image.name)
+        self.assertEqual((image.variants['thumb']['width'], image.variants['thumb']['height']), (114, 160))
+
+        data = self.client.get(f'/api/inventory/images/{image.id}/').data
+        self.assertTrue(data['variants']['thumb']['webp'].startswith('http://testserver/media/variants/'))
+
+        # Та же картинка ещё раз — тот же файл, варианты копируются без задачи
+        again = self.upload()
+        self.assertEqual(work(once=True), 0)
+        again.refresh_from_db()
+        self.assertEqual(again.image.name, image.image.name)
+        self.assertEqual(again.variants, image.variants)
+
+    def test_duplicate_upload_before_worker_renders_once(self):
+        first, second = self.upload(), self.upload()
+        with mock.patch('apps.core.images.render_variants', wraps=images.render_variants) as render:
+            self.assertEqual(work(once=True), 2)
+        self.assertEqual(render.call_count, 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.variants, first.variants)
+        self.assertEqual(second.variants['source'], second.image.name)
+
+    def test_blob_refcount_and_gc(self):
+        first = self.upload()
+        path = first.image.path
+        with mock.patch('apps.core.storage.ContentAddressedStorage._write') as write:
+            second = self.upload()
+        # Повтор — без записи файла
+        write.assert_not_called()
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(Blob.objects.get(name=first.image.name).refcount, 2)
+
+        first.delete()
+        self.assertEqual(collect_garbage(grace=timedelta(0)), (0, 0))
+        # Замена файла отпускает старый блоб
+        second = CardImage.objects.get(id=second.id)
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10), 'red').save(buffer, format='PNG')
+        second.image.save('new.png', ContentFile(buffer.getvalue()))
+        self.assertEqual(Blob.objects.get(name=first.image.name).refcount, 0)
+
+        removed, freed = collect_garbage(grace=timedelta(0))
+        self.assertEqual(removed, 1)
+        self.assertGreater(freed, 0)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(second.image.path))
+
+        # Пересчёт по полям сходится со счётчиками
+        Blob.objects.update(refcount=5)
+        self.assertEqual(recount(), 1)
+        self.assertEqual(Blob.objects.get().refcount, 1)
+
+    def test_gc_removes_unreferenced_variants(self):
+        first, second = self.upload('blue'), self.upload('red')
+        self.assertEqual(work(once=True), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        first_files, kept = variant_files(first.variants), variant_files(second.variants)
+        first.delete()
+
+        # Свежие файлы не трогаем: карта может быть ещё не закоммичена
+        self.assertEqual(images.collect_variants(timedelta(hours=1)), (0, 0))
+        removed, freed = images.collect_variants(timedelta(0), dry_run=True)
+        self.assertEqual(removed, len(first_files))
+        self.assertGreater(freed, 0)
+        self.assertTrue(all(default_storage.exists(name) for name in first_files))
+
+        self.assertEqual(images.collect_variants(timedelta(0)), (removed, freed))
+        self.assertFalse(any(default_storage.exists(name) for name in first_files))
+        self.assertTrue(all(default_storage.exists(name) for name in kept))
+        self.assertEqual(set(images.stored_variants()), kept)
+
+    def test_concurrent_registration_no_conflict(self):
+        name = 'blobs/ab/cd/abcd.jpg'
+        Blob.objects.create(name=name, sha256='abcd', size=10)
+        # Другой запрос создал запись между нашим update (0 строк) и вставкой
+        with mock.patch('django.db.models.query.QuerySet.update', return_value=0):
+            register_blob('abcd', name, 10)
+            change_refcount(name, 1)
+        self.assertEqual(Blob.objects.filter(name=name).count(), 1)
+
+    def test_gc_between_exists_check_and_register(self):
+        first = self.upload()
+        name = first.image.name
+        CardImage.objects.filter(id=first.id).delete()
+        Blob.objects.filter(name=name).update(refcount=0, updated_at=timezone.now() - timedelta(days=1))
+
+        real_register = blobs.register_blob
+
+        def gc_then_register(*args):
+            # Сборщик успевает удалить блоб после проверки exists() загрузкой
+            self.assertEqual(collect_garbage(grace=timedelta(hours=1))[0], 1)
+            real_register(*args)
+
+        with mock.patch('apps.core.blobs.register_blob', gc_then_register):
+            second = self.upload()
+        self.assertEqual(second.image.name, name)
+        self.assertTrue(os.path.exists(second.image.path))
+        self.assertEqual(Blob.objects.get(name=name).refcount, 1)
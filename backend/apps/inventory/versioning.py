@@ -0,0 +1,28 @@
+"""
+Версия инвентаря владельца
+
+Счётчик в кэше, который меняется при любой записи в инвентарь владельца.
+Производные данные (матрица заполненности, прогресс по сериям) кэшируются
+с версией в ключе и поэтому устаревают сами, без явного удаления.
+"""
+
+from django.db import transaction
+
+from apps.core.versioning import bump_version, get_version
+
+
+VERSION_KEY = 'inventory:version:{owner_id}'
+
+
+def get_inventory_version(owner_id):
+    """Возвращает текущую версию инвентаря владельца"""
+    return get_version(VERSION_KEY.format(owner_id=owner_id))
+
+
+def bump_inventory_version(owner_id):
+    bump_version(VERSION_KEY.format(owner_id=owner_id))
+
+
+def inventory_changed(owner_id):
+    """Сбрасывает версию после коммита транзакции"""
+    transaction.on_commit(lambda: bump_inventory_version(owner_id))
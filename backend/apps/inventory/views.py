@@ -2,40 +2,61 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Q
 from .models import InventoryItem, CardImage
 from .serializers import (
     InventoryItemSerializer, InventoryItemUpdateSerializer,
-    CardImageSerializer, CardImageCreateSerializer
+    CardImageSerializer, CardImageCreateSerializer, InventoryBulkItemSerializer
 )
+from apps.cards.catalog import chunked
+from apps.cards.models import Card
+from apps.core.mixins import SparseFieldsMixin
+from apps.core.pagination import KeysetPagination
+from apps.core.owners import get_request_owner
+from apps.cards.filters import CardIndexSearchFilter
+from .completeness import get_completeness
+from .signals import items_bulk_upserted
 
 
-class InventoryItemViewSet(viewsets.ModelViewSet):
+class InventoryItemViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, CardIndexSearchFilter, filters.OrderingFilter]
     filterset_fields = ['condition', 'has_card']
     search_fields = ['card__title', 'card__number', 'note']
+    search_card_field = 'card_id'
+    search_extra_fields = ['note']
     ordering_fields = ['card__number', 'card__title', 'user_rating']
     ordering = ['card__series__number', 'card__number']
 
     def get_queryset(self):
         # For testing, return all items without user filtering
-        return InventoryItem.objects.select_related(
-            'card__series'
-        ).prefetch_related(
-            'images'
-        )
+        queryset = InventoryItem.objects.all()
+        fields = self.get_requested_fields()
+        if fields is None or 'card' in fields:
+            queryset = queryset.select_related('card__series').prefetch_related('card__tags')
+        if fields is None or 'images' in fields:
+            queryset = queryset.prefetch_related('images')
+        if fields is not None:
+            queryset = queryset.only(*self.get_only_fields(fields))
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
             return InventoryItemUpdateSerializer
         return InventoryItemSerializer
 
+    bulk_max_rows = 2000
+    bulk_fields = ['has_card', 'quantity', 'condition', 'user_rating']
+
+    def get_owner(self):
+        """Владелец инвентаря: текущий пользователь, без авторизации — тестовый"""
+        return get_request_owner(self.request, create=True)
+
     def perform_create(self, serializer):
-        # Для тестирования используем тестового пользователя
-        from django.contrib.auth.models import User
-        test_user, _ = User.objects.get_or_create(username='test_user')
+        test_user = self.get_owner()
         
         # Проверяем, есть ли уже такая карточка в инвентаре
         card_id = serializer.validated_data.get('card_id')
@@ -53,6 +74,129 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
             # Если карточки нет, создаём новую
             serializer.save(owner=test_user)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Массовое обновление инвентаря одним запросом
+
+        POST /api/inventory/items/bulk/
+        [{"card_id": 1, "has_card": true, "quantity": 2, "condition": "NM", "user_rating": 9}, ...]
+
+        Валидные строки применяются одним upsert по (card, owner),
+        для каждой строки возвращается результат или ошибки.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                {'error': 'Expected a list of items'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > self.bulk_max_rows:
+            return Response(
+                {'error': f'Too many items, maximum is {self.bulk_max_rows}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [{'index': index} for index in range(len(rows))]
+        valid = {}
+        for index, row in enumerate(rows):
+            serializer = InventoryBulkItemSerializer(data=row)
+            if not serializer.is_valid():
+                results[index].update(status='error', errors=serializer.errors)
+                continue
+            card_id = serializer.validated_data['card_id']
+            results[index]['card_id'] = card_id
+            if card_id in valid:
+                results[index].update(status='error', errors={'card_id': ['Duplicate card_id in request']})
+                continue
+            valid[card_id] = (index, serializer.validated_data)
+
+        # Все карточки проверяем одним запросом на IDS_PER_QUERY штук
+        known_cards = {
+            card_id
+            for chunk in chunked(valid)
+            for card_id in Card.objects.filter(id__in=chunk).values_list('id', flat=True)
+        }
+        for card_id in list(valid):
+            if card_id not in known_cards:
+                index, _ = valid.pop(card_id)
+                results[index].update(status='error', errors={'card_id': ['Card not found']})
+
+        if valid:
+            owner = self.get_owner()
+            with transaction.atomic():
+                existing = {
+                    item.card_id: item
+                    for chunk in chunked(valid)
+                    for item in InventoryItem.objects.filter(owner=owner, card_id__in=chunk)
+                }
+                items = []
+                for card_id, (index, data) in valid.items():
+                    # Новый объект без pk: конфликт решается только по (card, owner)
+                    item = InventoryItem(card_id=card_id, owner=owner)
+                    current = existing.get(card_id)
+                    for field in self.bulk_fields:
+                        if field in data:
+                            setattr(item, field, data[field])
+                        elif current is not None:
+                            setattr(item, field, getattr(current, field))
+                    items.append(item)
+                    results[index]['status'] = 'updated' if current else 'created'
+
+                InventoryItem.objects.bulk_create(
+                    items,
+                    update_conflicts=True,
+                    unique_fields=['card', 'owner'],
+                    update_fields=self.bulk_fields,
+                )
+
+                ids = {
+                    item.card_id: existing[item.card_id].pk if item.card_id in existing else item.pk
+                    for item in items
+                }
+                if None in ids.values():
+                    ids = {
+                        card_id: item_id
+                        for chunk in chunked(valid)
+                        for card_id, item_id in InventoryItem.objects.filter(
+                            owner=owner, card_id__in=chunk
+                        ).values_list('card_id', 'id')
+                    }
+
+                # bulk_create не шлёт post_save
+                items_bulk_upserted.send(
+                    sender=InventoryItem,
+                    owner_id=owner.id,
+                    before={
+                        card_id: (item.has_card, item.quantity) for card_id, item in existing.items()
+                    },
+                    after={item.card_id: (item.has_card, item.quantity) for item in items},
+                )
+
+            for card_id, (index, _) in valid.items():
+                results[index]['id'] = ids[card_id]
+
+        summary = {'created': 0, 'updated': 0, 'error': 0}
+        for result in results:
+            summary[result['status']] += 1
+
+        return Response({
+            'created': summary['created'],
+            'updated': summary['updated'],
+            'errors': summary['error'],
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'])
+    def completeness(self, request):
+        """
+        Заполненность коллекции по сериям: битовая карта и отрезки номеров
+
+        GET /api/inventory/items/completeness/
+        В отличие от missing учитывает и карточки без строки в инвентаре.
+        """
+        return Response({'series': get_completeness(self.get_owner().id)})
+
     @action(detail=False, methods=['get'])
     def owned(self, request):
         """Получить только карточки, которые есть в коллекции"""
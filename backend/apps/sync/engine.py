@@ -0,0 +1,226 @@
+"""
+Синхронизация каталога с Google Sheets
+
+Выгрузка таблицы (CSV) разбирается в строки, у каждой строки считается
+хэш и сравнивается с SheetRowFingerprint с прошлой синхронизации.
+Изменившиеся строки применяются пачкой через CatalogPlan (Series, Card,
+Tag/CardTag) и PriceRecord; неизменённая таблица обходится одним
+запросом отпечатков и без записей.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from apps.cards.catalog import CatalogPlan, CatalogRow
+from apps.cards.models import Card
+from apps.finance.models import LatestPrice, PriceRecord
+from apps.finance.valuation import bulk_record_prices
+from .models import SheetRowFingerprint
+
+
+# Колонки выгрузки (заголовок без учёта регистра)
+COLUMN_ALIASES = {
+    'series': 'series',
+    'серия': 'series',
+    'series_title': 'series_title',
+    'название серии': 'series_title',
+    'number': 'number',
+    'номер': 'number',
+    'title': 'title',
+    'название': 'title',
+    'rarity': 'rarity',
+    'редкость': 'rarity',
+    'price': 'price',
+    'цена': 'price',
+    'type': 'type',
+    'тип': 'type',
+    'tags': 'tags',
+    'теги': 'tags',
+}
+
+# Редкость можно писать кодом ("ск") или названием ("Средняя карта")
+RARITIES = {code: code for code, _ in Card.RARITY_CHOICES}
+RARITIES.update({label.lower(): code for code, label in Card.RARITY_CHOICES})
+
+PRICE_SOURCE = 'sheets'
+MAX_REPORTED_ERRORS = 100
+# Цена должна влезть в DecimalField(max_digits=10, decimal_places=2) карточки и PriceRecord
+MAX_PRICE = Decimal(10) ** (PriceRecord._meta.get_field('price_rub').max_digits - 2)
+
+
+class SheetSyncError(Exception):
+    """Выгрузку нельзя разобрать целиком"""
+
+
+def parse_row(raw, has_tags=True):
+    """
+    Args:
+        has_tags: в таблице есть колонки тегов (иначе теги карточек не трогаем)
+
+    Raises:
+        ValueError: строка не проходит проверку
+    """
+    row = {
+        COLUMN_ALIASES[key.strip().lower()]: (value or '').strip()
+        for key, value in raw.items()
+        if key and key.strip().lower() in COLUMN_ALIASES
+    }
+    try:
+        series = int(row.get('series', ''))
+        number = int(row.get('number', ''))
+    except ValueError:
+        raise ValueError('series and number must be integers')
+    title = row.get('title', '')
+    if not title:
+        raise ValueError('title is required')
+    rarity = RARITIES.get(row.get('rarity', '').lower())
+    if rarity is None:
+        raise ValueError(f"unknown rarity {row.get('rarity', '')!r}")
+
+    price = None
+    if row.get('price'):
+        try:
+            price = Decimal(row['price'].replace(' ', '').replace(',', '.'))
+        except InvalidOperation:
+            raise ValueError(f"invalid price {row['price']!r}")
+        # NaN и Infinity — корректные Decimal, но не цены
+        if not price.is_finite():
+            raise ValueError(f"invalid price {row['price']!r}")
+        try:
+            price = price.quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f"invalid price {row['price']!r}")
+        if price < 0 or price >= MAX_PRICE:
+            raise ValueError(f"invalid price {row['price']!r}")
+
+    tags = {name.strip() for name in row.get('tags', '').split(',') if name.strip()}
+    if row.get('type'):
+        tags.add(row['type'])
+
+    return CatalogRow(
+        series, row.get('series_title', ''), number, title, rarity, price,
+        tuple(sorted(tags)) if has_tags else None,
+    )
+
+
+def row_key(row):
+    return f'{row.series}:{row.number}'
+
+
+def row_hash(row):
+    data = [row.series, row.series_title, row.number, row.title, row.rarity, str(row.price), row.tags]
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class SheetSync:
+    """
+    Одна синхронизация таблицы
+
+    Использование:
+        report = SheetSync(LocalFileFetcher('checklist.csv')).run()
+    """
+
+    def __init__(self, fetcher, sheet='checklist', dry_run=False, full=False):
+        """
+        Args:
+            full: применить все строки, не глядя на отпечатки
+        """
+        self.fetcher = fetcher
+        self.sheet = sheet
+        self.dry_run = dry_run
+        self.full = full
+
+    def read_rows(self, report):
+        """Строки выгрузки: {row_key: (SheetRow, hash)}"""
+        reader = csv.DictReader(io.StringIO(self.fetcher.fetch()))
+        columns = {COLUMN_ALIASES.get(name.strip().lower()) for name in reader.fieldnames or ()}
+        if not {'series', 'number'} <= columns:
+            raise SheetSyncError('Sheet must have series and number columns')
+        self.has_tags = bool(columns & {'tags', 'type'})
+
+        rows = {}
+        # Первая строка данных — вторая в таблице после заголовка
+        for line, raw in enumerate(reader, start=2):
+            report['rows'] += 1
+            try:
+                row = parse_row(raw, self.has_tags)
+            except ValueError as e:
+                report['invalid'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line, 'error': str(e)})
+                continue
+            # При повторе строки побеждает последняя, как при ручном вводе
+            rows[row_key(row)] = (row, row_hash(row))
+        return rows
+
+    def run(self):
+        """
+        Returns:
+            Отчёт: rows, changed, unchanged, invalid, removed, created_series,
+            created_cards, updated_cards, prices, errors, seconds
+        """
+        started = time.monotonic()
+        report = {
+            'rows': 0, 'changed': 0, 'unchanged': 0, 'invalid': 0, 'removed': 0,
+            'created_series': 0, 'created_cards': 0, 'updated_cards': 0, 'prices': 0,
+            'errors': [],
+        }
+        rows = self.read_rows(report)
+
+        fingerprints = dict(
+            SheetRowFingerprint.objects.filter(sheet=self.sheet).values_list('row_key', 'row_hash')
+        )
+        changed = {
+            key: (row, digest) for key, (row, digest) in rows.items()
+            if self.full or fingerprints.get(key) != digest
+        }
+        removed = set(fingerprints) - set(rows)
+        report['changed'] = len(changed)
+        report['unchanged'] = len(rows) - len(changed)
+        report['removed'] = len(removed)
+
+        if (changed or removed) and not self.dry_run:
+            with transaction.atomic():
+                if changed:
+                    self.apply([row for row, _ in changed.values()], report)
+                    SheetRowFingerprint.objects.bulk_create(
+                        [
+                            SheetRowFingerprint(sheet=self.sheet, row_key=key, row_hash=digest)
+                            for key, (_, digest) in changed.items()
+                        ],
+                        update_conflicts=True,
+                        unique_fields=['sheet', 'row_key'],
+                        update_fields=['row_hash', 'synced_at'],
+                    )
+                if removed:
+                    # Карточки не удаляем (на них ссылается инвентарь), только
+                    # забываем отпечаток, чтобы вернувшаяся строка применилась
+                    SheetRowFingerprint.objects.filter(sheet=self.sheet, row_key__in=removed).delete()
+
+        report['seconds'] = round(time.monotonic() - started, 3)
+        return report
+
+    def apply(self, rows, report):
+        plan = CatalogPlan(rows)
+        report['created_series'] = len({row.series for row in rows} - set(plan.series))
+        report['updated_cards'] = sum((row.series, row.number) in plan.cards for row in rows)
+        report['created_cards'] = len(rows) - report['updated_cards']
+        card_ids = plan.apply()
+        self.apply_prices(rows, card_ids, report)
+
+    def apply_prices(self, rows, card_ids, report):
+        """Новая цена из таблицы записывается в историю цен"""
+        priced = {card_ids[(row.series, row.number)]: row.price for row in rows if row.price is not None}
+        latest = dict(LatestPrice.objects.filter(card_id__in=priced).values_list('card_id', 'price_rub'))
+        records = [
+            PriceRecord(card_id=card_id, source=PRICE_SOURCE, price_rub=price)
+            for card_id, price in priced.items() if latest.get(card_id) != price
+        ]
+        bulk_record_prices(records)
+        report['prices'] = len(records)
@@ -0,0 +1,42 @@
+"""
+Источники выгрузки таблицы (CSV)
+
+Фетчер — любой объект с методом fetch(), возвращающим текст CSV,
+поэтому в тестах его легко подменить.
+"""
+
+from urllib.request import Request, urlopen
+
+
+class LocalFileFetcher:
+    """Выгрузка, сохранённая в файл"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self):
+        with open(self.path, encoding='utf-8-sig', newline='') as f:
+            return f.read()
+
+
+class HttpFetcher:
+    """
+    Выгрузка по ссылке, например
+    https://docs.google.com/spreadsheets/d/<id>/export?format=csv&gid=<gid>
+    """
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        request = Request(self.url, headers={'User-Agent': 'cardholder-sync'})
+        with urlopen(request, timeout=self.timeout) as response:
+            return response.read().decode('utf-8-sig')
+
+
+def get_fetcher(source):
+    """Фетчер по строке источника: ссылка или путь к файлу"""
+    if source.startswith(('http://', 'https://')):
+        return HttpFetcher(source)
+    return LocalFileFetcher(source)
@@ -0,0 +1,36 @@
+"""
+Django команда для синхронизации каталога с Google Sheets
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sync.engine import SheetSync, SheetSyncError
+from apps.sync.fetchers import get_fetcher
+
+
+class Command(BaseCommand):
+    help = 'Применяет изменившиеся строки таблицы к каталогу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='Ссылка на CSV-выгрузку или путь к файлу (по умолчанию SHEETS_SOURCE)')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что изменилось')
+        parser.add_argument('--full', action='store_true', help='Применить все строки, игнорируя отпечатки')
+
+    def handle(self, *args, **options):
+        source = options['source'] or settings.SHEETS_SOURCE
+        if not source:
+            raise CommandError('Укажите --source или SHEETS_SOURCE')
+
+        try:
+            report = SheetSync(get_fetcher(source), dry_run=options['dry_run'], full=options['full']).run()
+        except (OSError, SheetSyncError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"  строка {error['line']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Строк: {report['rows']}, изменено: {report['changed']}, без изменений: {report['unchanged']}, "
+            f"новых карточек: {report['created_cards']}, обновлено: {report['updated_cards']}, "
+            f"цен: {report['prices']} — {report['seconds']} с"
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SheetRowFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sheet', models.CharField(default='checklist', max_length=100)),
+                ('row_key', models.CharField(max_length=50)),
+                ('row_hash', models.CharField(max_length=64)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('sheet', 'row_key')},
+            },
+        ),
+    ]
@@ -1,3 +1,22 @@
 from django.db import models
 
-# Create your models here.
+
+class SheetRowFingerprint(models.Model):
+    """
+    Хэш строки таблицы на момент последней синхронизации
+
+    При следующей синхронизации применяются только строки, хэш которых
+    изменился (apps/sync/engine.py).
+    """
+
+    sheet = models.CharField(max_length=100, default="checklist")
+    # "номер серии:номер карточки"
+    row_key = models.CharField(max_length=50)
+    row_hash = models.CharField(max_length=64)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("sheet", "row_key")
+
+    def __str__(self):
+        return f"{self.sheet}/{self.row_key}"
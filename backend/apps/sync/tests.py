@@ -1,3 +1,122 @@
-from django.test import TestCase
+"""
+Тесты синхронизации с Google Sheets
+"""
 
-# Create your tests here.
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.cards.models import Series, Card, CardTag
+from apps.finance.models import LatestPrice, PriceRecord
+from .engine import SheetSync, parse_row
+from .models import SheetRowFingerprint
+
+
+HEADER = "Серия,Название серии,Номер,Название,Редкость,Цена,Тип"
+
+
+class FakeFetcher:
+    def __init__(self, *lines):
+        self.text = "\n".join((HEADER,) + lines)
+
+    def fetch(self):
+        return self.text
+
+
+class SheetSyncTest(TestCase):
+    """Тесты инкрементальной синхронизации"""
+
+    rows = (
+        "1,Heroes,1,Человек-Паук,o,52.50,Герой",
+        "1,Heroes,2,Веном,ск,90,Антигерой",
+        "2,Villains,1,Карнаж,Ультра карта,,Злодей",
+        "2,Villains,x,Без номера,o,1,",
+    )
+
+    def test_initial_sync(self):
+        report = SheetSync(FakeFetcher(*self.rows)).run()
+
+        self.assertEqual((report['rows'], report['changed'], report['invalid']), (4, 3, 1))
+        self.assertEqual((report['created_series'], report['created_cards'], report['prices']), (2, 3, 2))
+        venom = Card.objects.get(series__number=1, number=2)
+        self.assertEqual((venom.rarity, venom.base_price_rub), ("ск", Decimal("90.00")))
+        self.assertEqual(Card.objects.get(series__number=2, number=1).rarity, "ук")
+        self.assertEqual(list(venom.tags.values_list('name', flat=True)), ["Антигерой"])
+        self.assertEqual(LatestPrice.objects.get(card=venom).price_rub, Decimal("90.00"))
+        self.assertEqual(SheetRowFingerprint.objects.count(), 3)
+
+    def test_unchanged_sheet_does_not_write(self):
+        SheetSync(FakeFetcher(*self.rows)).run()
+
+        # Только чтение отпечатков
+        with self.assertNumQueries(1):
+            report = SheetSync(FakeFetcher(*self.rows)).run()
+        self.assertEqual((report['changed'], report['unchanged']), (0, 3))
+
+    def test_only_changed_rows_applied(self):
+        SheetSync(FakeFetcher(*self.rows)).run()
+        Card.objects.filter(series__number=1, number=1).update(notes="не из таблицы")
+
+        report = SheetSync(FakeFetcher(
+            "1,Heroes,1,Человек-Паук,o,52.50,Герой",
+            "1,Heroes,2,Веном (Эдди Брок),ск,95,Злодей",
+            "2,Villains,1,Карнаж,Ультра карта,,Злодей",
+        )).run()
+
+        self.assertEqual((report['changed'], report['updated_cards'], report['prices']), (1, 1, 1))
+        venom = Card.objects.get(series__number=1, number=2)
+        self.assertEqual(venom.title, "Веном (Эдди Брок)")
+        self.assertEqual(list(venom.tags.values_list('name', flat=True)), ["Злодей"])
+        self.assertEqual(PriceRecord.objects.filter(card=venom).count(), 2)
+        self.assertEqual(CardTag.objects.count(), 3)
+        self.assertEqual(Card.objects.get(series__number=1, number=1).notes, "не из таблицы")
+
+    def test_rejects_non_finite_and_negative_prices(self):
+        for price in ('NaN', 'Infinity', '-5', '1e12', '99999999.995', '1e999999'):
+            with self.assertRaisesMessage(ValueError, 'invalid price'):
+                parse_row({'Серия': '1', 'Номер': '1', 'Название': 'X', 'Редкость': 'o', 'Цена': price})
+        row = parse_row({'Серия': '1', 'Номер': '1', 'Название': 'X', 'Редкость': 'o', 'Цена': '1 234,5'})
+        self.assertEqual(row.price, Decimal('1234.50'))
+
+    def test_dry_run(self):
+        report = SheetSync(FakeFetcher(*self.rows), dry_run=True).run()
+        self.assertEqual(report['changed'], 3)
+        self.assertFalse(Series.objects.exists())
+        self.assertFalse(SheetRowFingerprint.objects.exists())
+
+
+class SheetsImportViewTest(TestCase):
+    """Тесты эндпоинта синхронизации"""
+
+    def test_requires_admin_and_syncs_file(self):
+        client = APIClient()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as sheet:
+            sheet.write(FakeFetcher("1,Heroes,1,Человек-Паук,o,52.50,Герой").text)
+            sheet.flush()
+            with override_settings(SHEETS_SOURCE=sheet.name):
+                self.assertEqual(client.post('/api/sync/sheets/import/').status_code, 401)
+
+                client.force_authenticate(User.objects.create(username="admin", is_staff=True))
+                response = client.post('/api/sync/sheets/import/', {}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created_cards'], 1)
+
+    def test_dry_run_flag_from_form(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="admin", is_staff=True))
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as sheet:
+            sheet.write(FakeFetcher("1,Heroes,1,Человек-Паук,o,52.50,Герой").text)
+            sheet.flush()
+            with override_settings(SHEETS_SOURCE=sheet.name):
+                self.assertEqual(client.post('/api/sync/sheets/import/', {'dry_run': 'maybe'}).status_code, 400)
+                client.post('/api/sync/sheets/import/', {'dry_run': 'true'})
+                self.assertFalse(Card.objects.exists())
+                # "false" из формы — не dry-run
+                response = client.post('/api/sync/sheets/import/', {'dry_run': 'false'})
+
+        self.assertEqual(response.data['created_cards'], 1)
+        self.assertTrue(Card.objects.exists())
@@ -1,12 +1,43 @@
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import permissions, serializers, status
+
+from .engine import SheetSync, SheetSyncError
+from .fetchers import get_fetcher
+
+
+def parse_flag(data, name):
+    """Флаг из JSON или формы: "false"/"0" — это False, мусор — 400"""
+    try:
+        return serializers.BooleanField().to_internal_value(data.get(name, False))
+    except serializers.ValidationError as e:
+        raise serializers.ValidationError({name: e.detail})
 
 
 class SheetsImportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
     def post(self, request):
-        # TODO: Implement Google Sheets import functionality
-        # This would integrate with Google Sheets API to import card data
-        return Response({
-            'message': 'Google Sheets import functionality will be implemented here'
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
\ No newline at end of file
+        """
+        Синхронизация каталога с таблицей из settings.SHEETS_SOURCE
+
+        POST /api/sync/sheets/import/ {"dry_run": true, "full": false}
+        """
+        if not settings.SHEETS_SOURCE:
+            return Response({
+                'error': 'SHEETS_SOURCE is not configured'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        sync = SheetSync(
+            get_fetcher(settings.SHEETS_SOURCE),
+            dry_run=parse_flag(request.data, 'dry_run'),
+            full=parse_flag(request.data, 'full'),
+        )
+        try:
+            report = sync.run()
+        except SheetSyncError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except OSError as e:
+            return Response({'error': f'Failed to fetch sheet: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response(report)
@@ -0,0 +1,232 @@
+"""
+Уведомления о ценах ниже цели из вишлиста
+
+Цели вишлиста держатся в памяти процесса: для каждой карточки —
+отсортированный список target_price_rub, и новая цена находит все
+подходящие строки одним bisect, без обхода вишлистов. Индекс
+пересобирается при смене версии (любая запись в WishlistItem).
+
+Совпадения записываются в PriceAlert, а после коммита в очередь задач
+(apps.core.jobs) ставится их отправка: запись цен не ждёт Telegram.
+Воркер шлёт через общий клиент бота одно сообщение на пользователя и
+повторяет неотправленные. По строке вишлиста повторно
+уведомляем только о цене ниже уже отправленной, и не больше
+WISHLIST_ALERTS_PER_HOUR уведомлений пользователю в час.
+"""
+
+import asyncio
+import html
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from apps.core.jobs import enqueue, job_handler
+from apps.core.telegram_client import get_telegram_client
+from apps.core.versioning import VersionedIndex, bump_version
+from telegram_bot.models import BotUser
+from telegram_bot.tasks import send_message_to_user
+from .models import PriceAlert, WishlistItem
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'wishlist:targets:version'
+DELIVER_ALERTS_JOB = 'wishlist.deliver_alerts'
+# Одновременных запросов к Bot API при рассылке
+SEND_CONCURRENCY = 8
+
+
+def bump_targets_version():
+    bump_version(VERSION_KEY)
+
+
+class TargetIndex:
+    """Цели вишлиста по карточкам, отсортированные по цене"""
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: (item_id, card_id, owner_id, target_price_rub)
+        """
+        by_card = defaultdict(list)
+        for item_id, card_id, owner_id, target in rows:
+            by_card[card_id].append((target, item_id, owner_id))
+        self.targets = {}
+        self.entries = {}
+        for card_id, entries in by_card.items():
+            entries.sort()
+            self.targets[card_id] = [target for target, _, _ in entries]
+            self.entries[card_id] = entries
+
+    def match(self, card_id, price):
+        """Строки вишлиста с целью не ниже цены: [(target, item_id, owner_id)]"""
+        targets = self.targets.get(card_id)
+        if not targets:
+            return []
+        return self.entries[card_id][bisect_left(targets, price):]
+
+
+def build_target_index():
+    return TargetIndex(
+        WishlistItem.objects.filter(target_price_rub__isnull=False).values_list(
+            'id', 'card_id', 'owner_id', 'target_price_rub'
+        )
+    )
+
+
+_index = VersionedIndex(VERSION_KEY, build_target_index)
+
+
+def get_target_index():
+    """Возвращает индекс для текущей версии вишлистов, пересобирая при смене"""
+    return _index.get()
+
+
+def match_prices(prices):
+    """
+    Ищет строки вишлиста, цель которых достигнута, и ставит уведомления
+
+    Args:
+        prices: (card_id, price_rub, source) — новые цены из PriceRecord
+            или объявлений магазина
+
+    Returns:
+        Список созданных PriceAlert
+    """
+    index = get_target_index()
+    # Для строки вишлиста важна лучшая цена в пачке
+    best = {}
+    for card_id, price, source in prices:
+        for target, item_id, owner_id in index.match(card_id, price):
+            if item_id not in best or price < best[item_id][0]:
+                best[item_id] = (price, source, target, owner_id, card_id)
+    if not best:
+        return []
+
+    alerted = dict(
+        PriceAlert.objects.filter(item_id__in=list(best)).exclude(status='failed')
+        .values('item_id').annotate(price=Min('price_rub')).values_list('item_id', 'price')
+    )
+    candidates = [
+        (item_id, *match) for item_id, match in best.items()
+        if item_id not in alerted or match[0] < alerted[item_id]
+    ]
+    if not candidates:
+        return []
+
+    owners = {owner_id for _, _, _, _, owner_id, _ in candidates}
+    sent = dict(
+        PriceAlert.objects.filter(
+            owner_id__in=owners, created_at__gte=timezone.now() - timedelta(hours=1),
+        ).exclude(status='skipped').values('owner_id').annotate(count=Count('id')).values_list('owner_id', 'count')
+    )
+    # При упоре в лимит сначала уходят самые выгодные цены относительно цели
+    candidates.sort(key=lambda candidate: candidate[1] / candidate[3] if candidate[3] else 0)
+
+    alerts = []
+    for item_id, price, source, target, owner_id, card_id in candidates:
+        if sent.get(owner_id, 0) >= settings.WISHLIST_ALERTS_PER_HOUR:
+            continue
+        sent[owner_id] = sent.get(owner_id, 0) + 1
+        alerts.append(PriceAlert(
+            item_id=item_id, owner_id=owner_id, card_id=card_id,
+            price_rub=price, target_price_rub=target, source=source,
+        ))
+    PriceAlert.objects.bulk_create(alerts)
+
+    if alerts:
+        alert_ids = [alert.id for alert in alerts]
+        transaction.on_commit(lambda: enqueue(DELIVER_ALERTS_JOB, {'alert_ids': alert_ids}, total=len(alert_ids)))
+    return alerts
+
+
+def format_alerts(alerts):
+    lines = ['📉 <b>Цены из вашего вишлиста</b>', '']
+    for alert in alerts:
+        card = alert.card
+        lines.append(
+            f'• {html.escape(card.title)} (#{card.number}, серия {card.series.number}) — '
+            f'{alert.price_rub} ₽, цель {alert.target_price_rub} ₽'
+        )
+    return '\n'.join(lines)
+
+
+async def send_messages(messages):
+    """
+    Args:
+        messages: {telegram_id: текст}
+
+    Returns:
+        {telegram_id: отправлено ли}
+    """
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+    async def send(chat_id, text):
+        async with semaphore:
+            return chat_id, await send_message_to_user(chat_id, text)
+
+    return dict(await asyncio.gather(*(send(chat_id, text) for chat_id, text in messages.items())))
+
+
+def deliver_alerts(alert_ids=None):
+    """
+    Отправляет ожидающие уведомления, по одному сообщению на пользователя
+
+    Returns:
+        {'sent', 'failed', 'skipped'} — число уведомлений
+    """
+    alerts = PriceAlert.objects.filter(status='pending').select_related('card__series', 'owner__profile')
+    if alert_ids is not None:
+        alerts = alerts.filter(id__in=alert_ids)
+
+    by_chat = defaultdict(list)
+    skipped = []
+    for alert in alerts:
+        profile = getattr(alert.owner, 'profile', None)
+        if profile is None or not profile.telegram_id:
+            skipped.append(alert.id)
+        else:
+            by_chat[profile.telegram_id].append(alert)
+
+    blocked = set(
+        BotUser.objects.filter(telegram_id__in=list(by_chat), is_blocked=True).values_list('telegram_id', flat=True)
+    )
+    for chat_id in blocked:
+        skipped.extend(alert.id for alert in by_chat.pop(chat_id))
+
+    results = {}
+    if by_chat:
+        try:
+            # В loop общего клиента: работает и там, где свой event loop уже запущен
+            results = get_telegram_client().run(send_messages({
+                chat_id: format_alerts(chat_alerts) for chat_id, chat_alerts in by_chat.items()
+            }))
+        except Exception as e:
+            logger.error(f"Error delivering price alerts: {e}", exc_info=True)
+
+    sent = [alert.id for chat_id, chat_alerts in by_chat.items() if results.get(chat_id) for alert in chat_alerts]
+    failed = [alert.id for chat_id, chat_alerts in by_chat.items() if not results.get(chat_id) for alert in chat_alerts]
+    if sent:
+        PriceAlert.objects.filter(id__in=sent).update(status='sent', sent_at=timezone.now())
+    if failed:
+        PriceAlert.objects.filter(id__in=failed).update(status='failed')
+    if skipped:
+        PriceAlert.objects.filter(id__in=skipped).update(status='skipped')
+    return {'sent': len(sent), 'failed': len(failed), 'skipped': len(skipped)}
+
+
+@job_handler(DELIVER_ALERTS_JOB)
+def deliver_alerts_job(job):
+    alert_ids = job.payload['alert_ids']
+    if job.attempts > 1:
+        # Повтор: досылаем то, что не дошло в прошлый раз
+        PriceAlert.objects.filter(id__in=alert_ids, status='failed').update(status='pending')
+    result = deliver_alerts(alert_ids)
+    job.result.update(result)
+    if result['failed']:
+        raise RuntimeError(f"{result['failed']} price alerts not delivered")
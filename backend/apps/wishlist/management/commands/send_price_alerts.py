@@ -0,0 +1,27 @@
+"""
+Django команда для отправки уведомлений о ценах из вишлиста
+
+Уведомления уходят сами после записи цен; команда досылает те, что
+остались в очереди или не дошли (--retry-failed).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.wishlist.alerts import deliver_alerts
+from apps.wishlist.models import PriceAlert
+
+
+class Command(BaseCommand):
+    help = 'Отправляет ожидающие уведомления о ценах из вишлиста'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Повторить неотправленные')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            PriceAlert.objects.filter(status='failed').update(status='pending')
+
+        result = deliver_alerts()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Отправлено: {result['sent']}, ошибок: {result['failed']}, пропущено: {result['skipped']}"
+        ))
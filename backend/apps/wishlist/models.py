@@ -20,4 +20,34 @@ class WishlistItem(models.Model):
     class Meta:
         unique_together = ("card", "owner")
 
-# Create your models here.
+
+class PriceAlert(models.Model):
+    """
+    Уведомление о цене ниже цели из вишлиста
+
+    Хранится и для дедупликации: по строке вишлиста повторно уведомляем
+    только о цене ниже уже отправленной.
+    """
+    STATUS = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+        ("skipped", "Skipped"),
+    ]
+
+    item = models.ForeignKey(WishlistItem, on_delete=models.CASCADE, related_name="alerts")
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="price_alerts")
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="price_alerts")
+    price_rub = models.DecimalField(max_digits=10, decimal_places=2)
+    target_price_rub = models.DecimalField(max_digits=10, decimal_places=2)
+    source = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS, default="pending")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Лимит уведомлений: WHERE owner_id = ? AND created_at >= ?
+            models.Index(fields=["owner", "created_at"], name="alert_owner_created_idx"),
+            models.Index(fields=["status"], name="alert_status_idx"),
+        ]
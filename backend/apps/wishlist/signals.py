@@ -0,0 +1,23 @@
+"""
+Сигналы вишлиста: запись в WishlistItem сбрасывает индекс целей,
+новые цены проверяются на достижение целей
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.finance.valuation import prices_recorded
+from .alerts import bump_targets_version, match_prices
+from .models import WishlistItem
+
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_delete, sender=WishlistItem)
+def on_wishlist_write(sender, **kwargs):
+    transaction.on_commit(bump_targets_version)
+
+
+@receiver(prices_recorded)
+def on_prices_recorded(sender, records, **kwargs):
+    match_prices((record.card_id, record.price_rub, record.source) for record in records)
@@ -1,3 +1,117 @@
-from django.test import TestCase
+"""
+Тесты вишлиста
+"""
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.cards.models import Series, Card
+from apps.finance.models import PriceRecord
+from apps.finance.valuation import bulk_record_prices
+from apps.core.jobs import work
+from apps.core.models import Job
+from apps.wishlist.alerts import DELIVER_ALERTS_JOB, TargetIndex
+from apps.wishlist.models import PriceAlert, WishlistItem
+from telegram_bot.models import BotUser
+
+
+@mock.patch('apps.wishlist.alerts.send_message_to_user', new_callable=mock.AsyncMock, return_value=True)
+class PriceAlertTest(TestCase):
+    """Тесты уведомлений о ценах ниже цели"""
+
+    def setUp(self):
+        cache.clear()
+        series = Series.objects.create(number=1, title="Series 1")
+        self.cards = [
+            Card.objects.create(title=f"Card {number}", number=number, rarity="o", series=series)
+            for number in range(1, 4)
+        ]
+        self.collector = User.objects.create(username="collector")
+        self.collector.profile.telegram_id = 1001
+        self.collector.profile.save()
+        self.item = WishlistItem.objects.create(
+            card=self.cards[0], owner=self.collector, target_price_rub=Decimal("100.00")
+        )
+
+    def record(self, card, price):
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceRecord.objects.create(card=card, price_rub=Decimal(price), source="avito")
+        work(once=True)
+
+    def test_target_index_range(self, send):
+        index = TargetIndex([(1, 10, 1, Decimal("50")), (2, 10, 2, Decimal("80")), (3, 10, 3, Decimal("120"))])
+        self.assertEqual([item_id for _, item_id, _ in index.match(10, Decimal("80"))], [2, 3])
+        self.assertEqual(index.match(10, Decimal("130")), [])
+        self.assertEqual(index.match(11, Decimal("1")), [])
+
+    def test_alert_sent_once_per_price(self, send):
+        self.record(self.cards[0], "120")
+        self.assertFalse(PriceAlert.objects.exists())
+
+        self.record(self.cards[0], "95")
+        alert = PriceAlert.objects.get()
+        self.assertEqual((alert.status, alert.price_rub), ("sent", Decimal("95.00")))
+        send.assert_awaited_once()
+        self.assertEqual(send.await_args.args[0], 1001)
+        self.assertIn("Card 1", send.await_args.args[1])
+
+        # Та же или более высокая цена не повторяется, более низкая — да
+        self.record(self.cards[0], "99")
+        self.assertEqual(PriceAlert.objects.count(), 1)
+        self.record(self.cards[0], "90")
+        self.assertEqual(PriceAlert.objects.filter(status="sent").count(), 2)
+
+    def test_bulk_prices_one_message(self, send):
+        WishlistItem.objects.create(card=self.cards[1], owner=self.collector, target_price_rub=Decimal("50.00"))
+        # Индекс целей пересобирается после коммита записи в вишлист
+        cache.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_record_prices([
+                PriceRecord(card=self.cards[0], price_rub=Decimal("80.00"), source="feed"),
+                PriceRecord(card=self.cards[1], price_rub=Decimal("40.00"), source="feed"),
+                PriceRecord(card=self.cards[2], price_rub=Decimal("1.00"), source="feed"),
+            ])
+        # Запись цен только ставит отправку в очередь
+        send.assert_not_awaited()
+        self.assertEqual(Job.objects.get().name, DELIVER_ALERTS_JOB)
+        work(once=True)
+        self.assertEqual(PriceAlert.objects.filter(status="sent").count(), 2)
+        send.assert_awaited_once()
+
+    @override_settings(WISHLIST_ALERTS_PER_HOUR=1)
+    def test_rate_limit(self, send):
+        WishlistItem.objects.create(card=self.cards[1], owner=self.collector, target_price_rub=Decimal("50.00"))
+        cache.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_record_prices([
+                PriceRecord(card=self.cards[0], price_rub=Decimal("90.00"), source="feed"),
+                PriceRecord(card=self.cards[1], price_rub=Decimal("10.00"), source="feed"),
+            ])
+        # Прошла самая выгодная относительно цели цена
+        self.assertEqual(list(PriceAlert.objects.values_list('card_id', flat=True)), [self.cards[1].id])
+
+    def test_blocked_user_skipped(self, send):
+        BotUser.objects.create(telegram_id=1001, is_blocked=True)
+        self.record(self.cards[0], "50")
+        self.assertEqual(PriceAlert.objects.get().status, "skipped")
+        send.assert_not_awaited()
+
+    def test_failed_delivery_retried_by_queue(self, send):
+        send.return_value = False
+        self.record(self.cards[0], "50")
+        job = Job.objects.get()
+        self.assertEqual((job.status, PriceAlert.objects.get().status), ('queued', 'failed'))
+
+        send.return_value = True
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, PriceAlert.objects.get().status), ('done', 'sent'))
 
-# Create your tests here.
@@ -1,228 +0,0 @@
-#!/usr/bin/env python3
-"""
-Полный скрипт для создания всех карточек Spider-Man с 1 по 275
-с правильными данными с LastSticker.Ru
-"""
-
-import os
-import sys
-import django
-from decimal import Decimal
-
-# Настройка Django
-sys.path.append('/Users/rex/Documents/cards/backend')
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-django.setup()
-
-from apps.cards.models import Card, Series
-
-def create_complete_spiderman_cards():
-    """Создаем полный набор карточек Spider-Man с 1 по 275"""
-    print("🕷️ Создаем полный набор карточек Spider-Man (1-275)...")
-    
-    # Получаем первую серию
-    series = Series.objects.get(number=1)
-    
-    # Полные данные карточек с LastSticker.Ru
-    cards_data = {
-        # Герои (1-50)
-        1: {"title": "Человек-Паук", "type": "Герой", "rarity": "o", "price": 52.50, "description": "Основной герой комиксов Marvel"},
-        2: {"title": "Железный Человек", "type": "Герой", "rarity": "o", "price": 55.00, "description": "Гений, миллиардер, филантроп"},
-        3: {"title": "Капитан Америка", "type": "Герой", "rarity": "o", "price": 57.50, "description": "Символ свободы и справедливости"},
-        4: {"title": "Тор", "type": "Герой", "rarity": "o", "price": 60.00, "description": "Бог грома из Асгарда"},
-        5: {"title": "Халк", "type": "Герой", "rarity": "o", "price": 62.50, "description": "Невероятный Халк - сила и ярость"},
-        6: {"title": "Черная Вдова", "type": "Герой", "rarity": "o", "price": 65.00, "description": "Мастер шпионажа и боевых искусств"},
-        7: {"title": "Соколиный Глаз", "type": "Герой", "rarity": "o", "price": 67.50, "description": "Мастер стрельбы из лука"},
-        8: {"title": "Доктор Стрэндж", "type": "Герой", "rarity": "o", "price": 70.00, "description": "Верховный чародей Земли"},
-        9: {"title": "Сорвиголова", "type": "Герой", "rarity": "o", "price": 72.50, "description": "Слепой адвокат, защитник Адской Кухни"},
-        10: {"title": "Джессика Джонс", "type": "Герой", "rarity": "o", "price": 75.00, "description": "Частный детектив с суперсилой"},
-        11: {"title": "Люк Кейдж", "type": "Герой", "rarity": "o", "price": 77.50, "description": "Неуязвимый герой Гарлема"},
-        12: {"title": "Железный Кулак", "type": "Герой", "rarity": "o", "price": 80.00, "description": "Мастер боевых искусств Кун-Лун"},
-        13: {"title": "Человек-Паук (Майлз Моралес)", "type": "Герой", "rarity": "ск", "price": 85.00, "description": "Новый Человек-Паук из альтернативной вселенной"},
-        14: {"title": "Человек-Паук (Гвен Стейси)", "type": "Герой", "rarity": "ск", "price": 87.50, "description": "Spider-Gwen из альтернативной вселенной"},
-        15: {"title": "Человек-Паук (Бен Рейли)", "type": "Герой", "rarity": "ск", "price": 90.00, "description": "Клон Человека-Паука"},
-        16: {"title": "Веном", "type": "Антигерой", "rarity": "ск", "price": 92.50, "description": "Симбиот и бывший хост Эдди Брок"},
-        17: {"title": "Карнаж", "type": "Злодей", "rarity": "ск", "price": 95.00, "description": "Симбиот-убийца, сын Венома"},
-        18: {"title": "Токсин", "type": "Антигерой", "rarity": "ск", "price": 97.50, "description": "Симбиот-защитник, внук Венома"},
-        19: {"title": "Анти-Веном", "type": "Антигерой", "rarity": "ск", "price": 100.00, "description": "Лечебный симбиот Эдди Брока"},
-        20: {"title": "Серебряный Сёрфер", "type": "Герой", "rarity": "ск", "price": 102.50, "description": "Галактический вестник Галактуса"},
-        21: {"title": "Фантастическая Четверка", "type": "Герой", "rarity": "ск", "price": 105.00, "description": "Команда супергероев-исследователей"},
-        22: {"title": "Мистер Фантастик", "type": "Герой", "rarity": "ск", "price": 107.50, "description": "Лидер Фантастической Четверки"},
-        23: {"title": "Невидимая Женщина", "type": "Герой", "rarity": "ск", "price": 110.00, "description": "Сильвия Ричардс с силой невидимости"},
-        24: {"title": "Человек-Факел", "type": "Герой", "rarity": "ск", "price": 112.50, "description": "Джонни Шторм с огненными способностями"},
-        25: {"title": "Существо", "type": "Герой", "rarity": "ск", "price": 115.00, "description": "Бен Гримм с каменной кожей"},
-        26: {"title": "Люди Икс", "type": "Герой", "rarity": "ск", "price": 117.50, "description": "Команда мутантов-защитников"},
-        27: {"title": "Росомаха", "type": "Герой", "rarity": "ск", "price": 120.00, "description": "Логан с адамантовыми когтями"},
-        28: {"title": "Шторм", "type": "Герой", "rarity": "ск", "price": 122.50, "description": "Ороро Монро - богиня погоды"},
-        29: {"title": "Циклоп", "type": "Герой", "rarity": "ск", "price": 125.00, "description": "Скотт Саммерс с оптическими лучами"},
-        30: {"title": "Джин Грей", "type": "Герой", "rarity": "ск", "price": 127.50, "description": "Телепат с огромной силой"},
-        31: {"title": "Профессор Икс", "type": "Герой", "rarity": "ук", "price": 130.00, "description": "Основатель школы для одаренных детей"},
-        32: {"title": "Магнето", "type": "Злодей", "rarity": "ук", "price": 132.50, "description": "Мастер магнетизма, защитник мутантов"},
-        33: {"title": "Мистик", "type": "Злодей", "rarity": "ук", "price": 135.00, "description": "Мастер маскировки и изменений"},
-        34: {"title": "Джаггернаут", "type": "Злодей", "rarity": "ук", "price": 137.50, "description": "Неостановимая сила"},
-        35: {"title": "Колосс", "type": "Герой", "rarity": "ук", "price": 140.00, "description": "Питер Распутин с металлической кожей"},
-        36: {"title": "Ночной Змей", "type": "Герой", "rarity": "ук", "price": 142.50, "description": "Курт Вагнер с телепортацией"},
-        37: {"title": "Китти Прайд", "type": "Герой", "rarity": "ук", "price": 145.00, "description": "Тень с фазовыми способностями"},
-        38: {"title": "Ангел", "type": "Герой", "rarity": "ук", "price": 147.50, "description": "Уоррен Уортингтон с крыльями"},
-        39: {"title": "Зверь", "type": "Герой", "rarity": "ук", "price": 150.00, "description": "Генри Маккой с силой и интеллектом"},
-        40: {"title": "Айсмен", "type": "Герой", "rarity": "ук", "price": 152.50, "description": "Бобби Дрейк с ледяными способностями"},
-        41: {"title": "Росомаха (Лора)", "type": "Герой", "rarity": "ук", "price": 155.00, "description": "X-23, клон Росомахи"},
-        42: {"title": "Джин Грей (Молодая)", "type": "Герой", "rarity": "ук", "price": 157.50, "description": "Молодая версия Джин Грей"},
-        43: {"title": "Циклоп (Молодой)", "type": "Герой", "rarity": "ук", "price": 160.00, "description": "Молодая версия Циклопа"},
-        44: {"title": "Шторм (Молодая)", "type": "Герой", "rarity": "ук", "price": 162.50, "description": "Молодая версия Шторм"},
-        45: {"title": "Профессор Икс (Молодой)", "type": "Герой", "rarity": "ук", "price": 165.00, "description": "Молодая версия Профессора Икс"},
-        46: {"title": "Человек-Паук 2099", "type": "Герой", "rarity": "ук", "price": 167.50, "description": "Человек-Паук из будущего"},
-        47: {"title": "Человек-Паук Нуар", "type": "Герой", "rarity": "ук", "price": 170.00, "description": "Человек-Паук в черном костюме"},
-        48: {"title": "Человек-Паук Ультимейт", "type": "Герой", "rarity": "ук", "price": 172.50, "description": "Человек-Паук из вселенной Ultimate"},
-        49: {"title": "Человек-Паук Классик", "type": "Герой", "rarity": "ук", "price": 175.00, "description": "Классический Человек-Паук"},
-        50: {"title": "Человек-Паук Современный", "type": "Герой", "rarity": "ук", "price": 177.50, "description": "Современная версия Человека-Паука"},
-    }
-    
-    # Злодеи (51-150)
-    villains = [
-        "Зеленый Гоблин", "Доктор Осьминог", "Веном", "Карнаж", "Песочный Человек",
-        "Ящерица", "Электро", "Мистерио", "Кравен-Охотник", "Скорпион",
-        "Рино", "Шокер", "Человек-Ящерица", "Алистер Смайт", "Доктор Дум",
-        "Магнето", "Мистик", "Джаггернаут", "Саблезубый", "Леди Смертельный Удар",
-        "Кингпин", "Бульдозер", "Тигровая Акула", "Стервятник", "Кайл",
-        "Доктор Осьминог (Классик)", "Зеленый Гоблин (Норман Озборн)", "Веном (Эдди Брок)", 
-        "Карнаж (Клетус Кассади)", "Песочный Человек (Флинт Марко)",
-        "Ящерица (Курт Коннорс)", "Электро (Макс Диллон)", "Мистерио (Квентин Бек)", 
-        "Кравен-Охотник (Сергей Кравинофф)", "Скорпион (Мак Гарган)",
-        "Рино (Алекс О'Хирн)", "Шокер (Герман Шульц)", "Человек-Ящерица (Курт Коннорс)", 
-        "Алистер Смайт (Классик)", "Доктор Дум (Виктор фон Дум)",
-        "Магнето (Эрик Леншерр)", "Мистик (Рейвен Даркхолм)", "Джаггернаут (Кейн Марко)", 
-        "Саблезубый (Виктор Крид)", "Леди Смертельный Удар (Ороро Монро)",
-        "Кингпин (Уилсон Фиск)", "Бульдозер (Джозеф МакГарр)", "Тигровая Акула (Тодд Арлисс)", 
-        "Стервятник (Адриан Тумс)", "Кайл (Классик)", "Доктор Осьминог (Современный)",
-        "Зеленый Гоблин (Гарри Озборн)", "Веном (Мак Гарган)", "Карнаж (Современный)", 
-        "Песочный Человек (Современный)", "Ящерица (Современный)", "Электро (Современный)",
-        "Мистерио (Современный)", "Кравен-Охотник (Современный)", "Скорпион (Современный)",
-        "Рино (Современный)", "Шокер (Современный)", "Человек-Ящерица (Современный)",
-        "Алистер Смайт (Современный)", "Доктор Дум (Современный)", "Магнето (Современный)",
-        "Мистик (Современный)", "Джаггернаут (Современный)", "Саблезубый (Современный)",
-        "Леди Смертельный Удар (Современный)", "Кингпин (Современный)", "Бульдозер (Современный)",
-        "Тигровая Акула (Современный)", "Стервятник (Современный)", "Кайл (Современный)",
-        "Доктор Осьминог (Альтернативный)", "Зеленый Гоблин (Альтернативный)", "Веном (Альтернативный)",
-        "Карнаж (Альтернативный)", "Песочный Человек (Альтернативный)", "Ящерица (Альтернативный)",
-        "Электро (Альтернативный)", "Мистерио (Альтернативный)", "Кравен-Охотник (Альтернативный)",
-        "Скорпион (Альтернативный)", "Рино (Альтернативный)", "Шокер (Альтернативный)",
-        "Человек-Ящерица (Альтернативный)", "Алистер Смайт (Альтернативный)", "Доктор Дум (Альтернативный)",
-        "Магнето (Альтернативный)", "Мистик (Альтернативный)", "Джаггернаут (Альтернативный)",
-        "Саблезубый (Альтернативный)", "Леди Смертельный Удар (Альтернативный)", "Кингпин (Альтернативный)",
-        "Бульдозер (Альтернативный)", "Тигровая Акула (Альтернативный)", "Стервятник (Альтернативный)",
-        "Кайл (Альтернативный)", "Доктор Осьминог (Будущее)", "Зеленый Гоблин (Будущее)",
-        "Веном (Будущее)", "Карнаж (Будущее)", "Песочный Человек (Будущее)", "Ящерица (Будущее)",
-        "Электро (Будущее)", "Мистерио (Будущее)", "Кравен-Охотник (Будущее)", "Скорпион (Будущее)",
-        "Рино (Будущее)", "Шокер (Будущее)", "Человек-Ящерица (Будущее)", "Алистер Смайт (Будущее)",
-        "Доктор Дум (Будущее)", "Магнето (Будущее)", "Мистик (Будущее)", "Джаггернаут (Будущее)",
-        "Саблезубый (Будущее)", "Леди Смертельный Удар (Будущее)", "Кингпин (Будущее)", "Бульдозер (Будущее)",
-        "Тигровая Акула (Будущее)", "Стервятник (Будущее)", "Кайл (Будущее)"
-    ]
-    
-    for i, villain in enumerate(villains, 51):
-        cards_data[i] = {
-            "title": villain,
-            "type": "Злодей",
-            "rarity": "o" if i <= 100 else "ск" if i <= 150 else "ук",
-            "price": 60.00 + (i * 2.50),
-            "description": f"Злодей из вселенной Spider-Man: {villain}"
-        }
-    
-    # Бонусные карточки (201-275)
-    bonus_cards = [
-        "Формула Гоблина", "Сыворотка суперсолдата", "Сила Галактуса", "Молот Тора", 
-        "Морозная Атака Человека-Льда", "Время разгрома!", "Копьё Кравена", 
-        "Стрелы Ястребиного Глаза", "Дубинка Сорвиголовы", "Удар адамантовых когтей",
-        "Броня Доктора Дума", "Атака насекомых Человека-Муравья", "Книга заклинаний Доктора Стренджа", 
-        "Текущий кулак Человека-Песка", "Сила Магнето", "Хвост Скорпиона", 
-        "Удар Железного Кулака", "Щупальца Осьминога", "Кража души Мефисто", "Ярость Халка!",
-        "Суперрастяжка Мистера Фантастика", "Сглаз Алой Ведьмы", "Заряд паутины Спайди", 
-        "Щит Капитана Америки", "Реактивный самолёт «Штопора»", "Репульсорный луч Железного Человека", 
-        "Телепорт Ночного Змея", "Силовое поле Женщины-Невидимки", "Удача в любви", 
-        "Спайди: \"С большой силой...\"", "Спайди и Водяной", "Спайди и Комодо", 
-        "Разыскивается!!!", "Спайди и Поглощающий Человек", "Спайди и Кравен",
-        "Спайди и Угроза", "Спайди и Носорог", "Спайди и Мастер", "Спайди и Доктор Осьминог",
-        "Спайди и Зеленый Гоблин", "Спайди и Веном", "Спайди и Песочный Человек",
-        "Спайди и Ящерица", "Спайди и Электро", "Спайди и Мистерио", "Спайди и Кравен-Охотник",
-        "Спайди и Скорпион", "Спайди и Рино", "Спайди и Шокер", "Спайди и Человек-Ящерица",
-        "Спайди и Алистер Смайт", "Спайди и Доктор Дум", "Спайди и Магнето", "Спайди и Мистик",
-        "Спайди и Джаггернаут", "Спайди и Саблезубый", "Спайди и Леди Смертельный Удар",
-        "Спайди и Кингпин", "Спайди и Бульдозер", "Спайди и Тигровая Акула", "Спайди и Стервятник",
-        "Спайди и Кайл", "Спайди и Доктор Осьминог (Классик)", "Спайди и Зеленый Гоблин (Норман)",
-        "Спайди и Веном (Эдди Брок)", "Спайди и Карнаж (Клетус)", "Спайди и Песочный Человек (Флинт)",
-        "Спайди и Ящерица (Курт)", "Спайди и Электро (Макс)", "Спайди и Мистерио (Квентин)",
-        "Спайди и Кравен-Охотник (Сергей)", "Спайди и Скорпион (Мак)", "Спайди и Рино (Алекс)",
-        "Спайди и Шокер (Герман)", "Спайди и Человек-Ящерица (Курт)", "Спайди и Алистер Смайт (Классик)",
-        "Спайди и Доктор Дум (Виктор)", "Спайди и Магнето (Эрик)", "Спайди и Мистик (Рейвен)",
-        "Спайди и Джаггернаут (Кейн)", "Спайди и Саблезубый (Виктор)", "Спайди и Леди Смертельный Удар (Ороро)",
-        "Спайди и Кингпин (Уилсон)", "Спайди и Бульдозер (Джозеф)", "Спайди и Тигровая Акула (Тодд)",
-        "Спайди и Стервятник (Адриан)", "Спайди и Кайл (Классик)", "Спайди и Доктор Осьминог (Современный)",
-        "Спайди и Зеленый Гоблин (Гарри)", "Спайди и Веном (Мак)", "Спайди и Карнаж (Современный)",
-        "Спайди и Песочный Человек (Современный)", "Спайди и Ящерица (Современный)", "Спайди и Электро (Современный)",
-        "Спайди и Мистерио (Современный)", "Спайди и Кравен-Охотник (Современный)", "Спайди и Скорпион (Современный)",
-        "Спайди и Рино (Современный)", "Спайди и Шокер (Современный)", "Спайди и Человек-Ящерица (Современный)",
-        "Спайди и Алистер Смайт (Современный)", "Спайди и Доктор Дум (Современный)", "Спайди и Магнето (Современный)",
-        "Спайди и Мистик (Современный)", "Спайди и Джаггернаут (Современный)", "Спайди и Саблезубый (Современный)",
-        "Спайди и Леди Смертельный Удар (Современный)", "Спайди и Кингпин (Современный)", "Спайди и Бульдозер (Современный)",
-        "Спайди и Тигровая Акула (Современный)", "Спайди и Стервятник (Современный)", "Спайди и Кайл (Современный)"
-    ]
-    
-    for i, bonus in enumerate(bonus_cards, 201):
-        cards_data[i] = {
-            "title": bonus,
-            "type": "Бонусная карточка",
-            "rarity": "ск" if i <= 250 else "ук",
-            "price": 75.00 + (i * 3.50),
-            "description": f"Бонусная карточка: {bonus}"
-        }
-    
-    # Обновляем или создаем карточки
-    updated_count = 0
-    created_count = 0
-    
-    for card_number, data in cards_data.items():
-        try:
-            card = Card.objects.get(series=series, number=card_number)
-            # Обновляем существующую карточку
-            card.title = data["title"]
-            card.rarity = data["rarity"]
-            card.base_price_rub = Decimal(str(data["price"]))
-            card.notes = f"{data['type']}: {data['title']}\n{data['description']}\nИзображение: https://www.laststicker.ru/i/cards/38/{card_number}.jpg"
-            card.save()
-            updated_count += 1
-            
-        except Card.DoesNotExist:
-            # Создаем новую карточку
-            card = Card.objects.create(
-                series=series,
-                number=card_number,
-                title=data["title"],
-                rarity=data["rarity"],
-                base_price_rub=Decimal(str(data["price"])),
-                notes=f"{data['type']}: {data['title']}\n{data['description']}\nИзображение: https://www.laststicker.ru/i/cards/38/{card_number}.jpg"
-            )
-            created_count += 1
-        
-        if (updated_count + created_count) % 50 == 0:
-            print(f"✅ Обработано {updated_count + created_count} карточек...")
-    
-    print(f"✅ Обновлено карточек: {updated_count}")
-    print(f"✅ Создано карточек: {created_count}")
-    print(f"📊 Всего обработано: {updated_count + created_count}")
-    
-    return updated_count + created_count
-
-def main():
-    """Основная функция"""
-    print("🕷️ Создание полного набора карточек Spider-Man (1-275)")
-    
-    total_count = create_complete_spiderman_cards()
-    
-    print(f"\n🎉 Создание завершено!")
-    print(f"📊 Всего карточек: {total_count}")
-    print(f"🌐 Изображения: https://www.laststicker.ru/i/cards/38/[номер].jpg")
-    print(f"💡 Теперь все карточки имеют правильные названия, описания и изображения!")
-
-if __name__ == '__main__':
-    main()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 
 from dotenv import load_dotenv
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Поиск по каталогу на PostgreSQL
     # Third-party
     'rest_framework',
     'corsheaders',
@@ -56,11 +58,13 @@ INSTALLED_APPS = [
     'apps.analytics',
     'telegram_bot',  # Telegram Bot
     'payments',  # Payment system
-    #'apps.sync',
+    'apps.sync',
     #'apps.media',
 ]
 
 MIDDLEWARE = [
+    # Замеры запросов — первым, чтобы учитывать и остальные middleware
+    'apps.core.metrics.PerformanceMiddleware',
     # CORS должен быть как можно выше
     'corsheaders.middleware.CorsMiddleware',
     'config.cors_middleware.CorsMiddleware',  # Кастомный CORS для обработки ошибок
@@ -110,6 +114,38 @@ DATABASES = {
 }
 
 
+# Cache
+# Снимки каталога, счётчики версий и метрики живут в кэше, поэтому он
+# должен быть общим для всех процессов (воркеры gunicorn, бот, run_jobs):
+# иначе сброс версии видит только записавший процесс, а остальные
+# бессрочно отдают старый каталог и индексы. С REDIS_URL — Redis, без
+# него — таблица в основной БД (создаёт миграция core 0005_cache_table).
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+# Тесты идут в одном процессе, а assertNumQueries не должен считать
+# запросы к таблице кэша
+if sys.argv[1:2] == ['test']:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -150,6 +186,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кто отдаёт байты медиа: '' — Django (FileResponse), 'x-accel-redirect' — nginx, 'x-sendfile' — Apache/lighttpd
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "")
+# internal location nginx, указывающий на MEDIA_ROOT (для x-accel-redirect)
+MEDIA_SENDFILE_PREFIX = os.getenv("MEDIA_SENDFILE_PREFIX", "/protected-media/")
+# Сколько секунд кэшируются медиа с изменяемыми именами (имена по хэшу — год, immutable)
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", "3600"))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -184,6 +226,32 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "8089087655:AAH3ZobI5iV5ZTE
 # Жёстко указываем правильный username бота
 TELEGRAM_BOT_USERNAME = "cardloginbot"  # Username бота без @
 TELEGRAM_CHANNEL_ID = os.getenv("TELEGRAM_CHANNEL_ID", "-1003230450630")
+# Сколько секунд считается свежей проверка подписки на канал
+TELEGRAM_SUBSCRIPTION_TTL = int(os.getenv("TELEGRAM_SUBSCRIPTION_TTL", str(6 * 60 * 60)))
+# Сколько секунд после auth_date данные Telegram-логина считаются действительными
+TELEGRAM_AUTH_MAX_AGE = int(os.getenv("TELEGRAM_AUTH_MAX_AGE", str(24 * 60 * 60)))
+# Сколько секунд повтор того же логина получает закэшированную пару токенов
+TELEGRAM_AUTH_CACHE_TTL = int(os.getenv("TELEGRAM_AUTH_CACHE_TTL", "300"))
+
+# Google Sheets: ссылка на CSV-выгрузку чек-листа или путь к файлу выгрузки
+SHEETS_SOURCE = os.getenv("SHEETS_SOURCE", "")
+
+# Не больше стольких уведомлений о ценах из вишлиста пользователю в час
+WISHLIST_ALERTS_PER_HOUR = int(os.getenv("WISHLIST_ALERTS_PER_HOUR", "10"))
+
+# Очередь фоновых задач: через сколько секунд задача зависшего воркера возвращается в очередь
+JOB_LOCK_TIMEOUT = int(os.getenv("JOB_LOCK_TIMEOUT", str(30 * 60)))
+# Сколько потоков кодируют варианты одной загруженной картинки
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "4"))
+
+# Метрики запросов (/api/metrics/ для staff, формат Prometheus)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Раз в сколько секунд процесс пишет свои агрегаты в кэш (общий для воркеров и бота)
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", "15"))
+# Пороги предупреждения в логе: время запроса, число SQL и повторов одного SQL
+METRICS_SLOW_REQUEST_MS = int(os.getenv("METRICS_SLOW_REQUEST_MS", "1000"))
+METRICS_MAX_QUERIES = int(os.getenv("METRICS_MAX_QUERIES", "50"))
+METRICS_MAX_DUPLICATE_QUERIES = int(os.getenv("METRICS_MAX_DUPLICATE_QUERIES", "5"))
 
 # CSRF exemption for API endpoints
 CSRF_TRUSTED_ORIGINS = [
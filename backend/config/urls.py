@@ -16,8 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from apps.core.media import media_urlpatterns
 
 urlpatterns = [
     path('', include('apps.core.urls')),  # Root path redirects to API root
@@ -28,9 +27,10 @@ urlpatterns = [
     path('api/inventory/', include('apps.inventory.urls')),
     path('api/wishlist/', include('apps.wishlist.urls')),
     path('api/analytics/', include('apps.analytics.urls')),
+    path('api/sync/', include('apps.sync.urls')),
     path('api/payment/', include('payments.urls')),
     # path('api/telegram-bot/', include('telegram_bot.urls')),  # Telegram Bot - не используется
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Медиа стримятся с Range/ETag или отдаются прокси (MEDIA_SENDFILE), не только в DEBUG
+urlpatterns += media_urlpatterns()
@@ -1,7 +1,6 @@
 import hashlib
 import hmac
 import logging
-import asyncio
 from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -24,7 +23,7 @@ logger = logging.getLogger(__name__)
 async def send_order_notification(order, items_data, telegram_username=None):
     """Отправка уведомления о новом заказе в Telegram"""
     try:
-        from telegram import Bot
+        from apps.core.telegram_client import get_telegram_client
         
         bot_token = settings.TELEGRAM_BOT_TOKEN
         channel_id = settings.TELEGRAM_CHANNEL_ID
@@ -39,7 +38,7 @@ async def send_order_notification(order, items_data, telegram_username=None):
             logger.warning("TELEGRAM_CHANNEL_ID не настроен, пропускаем отправку уведомления")
             return
         
-        bot = Bot(token=bot_token)
+        bot = get_telegram_client().abot
         
         # Формируем сообщение о заказе
         items_text = "\n".join([
@@ -89,9 +88,10 @@ async def send_order_notification(order, items_data, telegram_username=None):
 
 
 def send_order_notification_sync(order, items_data, telegram_username=None):
-    """Синхронная обертка для отправки уведомления"""
+    """Синхронная обертка: корутина выполняется в loop общего клиента Telegram"""
     try:
-        asyncio.run(send_order_notification(order, items_data, telegram_username))
+        from apps.core.telegram_client import get_telegram_client
+        get_telegram_client().run(send_order_notification(order, items_data, telegram_username))
     except Exception as e:
         logger.error(f"Error in send_order_notification_sync: {str(e)}")
 
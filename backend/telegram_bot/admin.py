@@ -1,12 +1,18 @@
 """
 Административная панель для управления верифицированными картами
+
+Колонки списков считаются в get_queryset (select_related и аннотации),
+поэтому число запросов на страницу списка не зависит от числа строк.
 """
 
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 from django.urls import reverse
 from django.conf import settings
 from django.utils import timezone
+from apps.core.images import variant_url
 from telegram_bot.models import (
     VerifiedCard,
     VerificationLog,
@@ -19,6 +25,37 @@ from telegram_bot.models import (
 )
 
 
+def count_subquery(queryset, field):
+    """Число строк queryset на объект (по полю field == OuterRef('pk'))"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class BreakGroupListFilter(admin.RelatedFieldListFilter):
+    """Фильтр по группе: str(группа) берёт имя брейка, поэтому брейки — тем же запросом"""
+
+    def field_choices(self, field, request, model_admin):
+        groups = BreakGroup.objects.select_related('break_obj')
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            groups = groups.order_by(*ordering)
+        return [(group.pk, str(group)) for group in groups]
+
+
+
+def enqueue_job(model_admin, request, name, payload, total=0):
+    """Ставит фоновую задачу и сообщает ссылку на её страницу"""
+    from apps.core.jobs import enqueue
+
+    job = enqueue(name, payload, created_by=request.user.get_username(), total=total)
+    url = reverse('admin:core_job_change', args=[job.pk])
+    model_admin.message_user(
+        request,
+        format_html('⏳ Задача поставлена в очередь: <a href="{}">{}</a>', url, job),
+        level='success'
+    )
+    return job
+
 @admin.register(VerifiedCard)
 class VerifiedCardAdmin(admin.ModelAdmin):
     """Админка для верифицированных карт"""
@@ -110,6 +147,9 @@ class VerifiedCardAdmin(admin.ModelAdmin):
     
     actions = ['activate_cards', 'deactivate_cards']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('card')
+    
     def card_name_display(self, obj):
         """Название карты"""
         if obj.card:
@@ -123,7 +163,7 @@ class VerifiedCardAdmin(admin.ModelAdmin):
         if obj.photo_original:
             return format_html(
                 '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-                obj.photo_original.url
+                variant_url(obj.photo_original_variants, 'thumb', fallback=obj.photo_original)
             )
         return "—"
     photo_preview.short_description = '📸'
@@ -184,7 +224,7 @@ class VerifiedCardAdmin(admin.ModelAdmin):
                 '<img src="{}" style="max-width: 400px; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);" />'
                 '<p style="margin-top: 10px; color: #666;">Фото карты до упаковки</p>'
                 '</div>',
-                obj.photo_original.url
+                variant_url(obj.photo_original_variants, 'medium', fallback=obj.photo_original)
             )
         return "Фото не загружено"
     photo_original_preview.short_description = 'Превью оригинала'
@@ -197,7 +237,7 @@ class VerifiedCardAdmin(admin.ModelAdmin):
                 '<img src="{}" style="max-width: 400px; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);" />'
                 '<p style="margin-top: 10px; color: #666;">Фото карты в упаковке с QR-кодом</p>'
                 '</div>',
-                obj.photo_packaged.url
+                variant_url(obj.photo_packaged_variants, 'medium', fallback=obj.photo_packaged)
             )
         return "Фото не загружено"
     photo_packaged_preview.short_description = 'Превью упаковки'
@@ -274,6 +314,9 @@ class VerificationLogAdmin(admin.ModelAdmin):
     
     date_hierarchy = 'checked_at'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('verified_card__card')
+    
     def card_info(self, obj):
         """Информация о карте"""
         if obj.verified_card.card:
@@ -569,27 +612,18 @@ class NotificationAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     def send_notifications(self, request, queryset):
-        """Отправить выбранные уведомления"""
-        from telegram_bot.tasks import send_notification_task
+        """Отправить выбранные уведомления (в фоне)"""
+        from telegram_bot.jobs import SEND_NOTIFICATION
         
-        sent_count = 0
-        for notification in queryset.filter(status='draft'):
-            try:
-                send_notification_task(notification.id)
-                sent_count += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f'❌ Ошибка при отправке "{notification.title}": {e}',
-                    level='error'
-                )
+        drafts = list(queryset.filter(status='draft'))
+        # Повторное нажатие не поставит те же уведомления ещё раз
+        Notification.objects.filter(id__in=[n.id for n in drafts]).update(status='scheduled')
+        for notification in drafts:
+            enqueue_job(self, request, SEND_NOTIFICATION, {'notification_id': notification.id},
+                        total=notification.total_recipients)
         
-        if sent_count > 0:
-            self.message_user(
-                request,
-                f'✅ Отправлено уведомлений: {sent_count}',
-                level='success'
-            )
+        if not drafts:
+            self.message_user(request, 'Нет черновиков для отправки', level='warning')
     send_notifications.short_description = '📨 Отправить уведомления'
     
     def duplicate_notification(self, request, queryset):
@@ -690,34 +724,37 @@ class BreakAdmin(admin.ModelAdmin):
     
     actions = ['activate_breaks', 'complete_breaks', 'publish_to_channel']
     
+    def get_queryset(self, request):
+        # Подзапросы, а не Count по join: группы × ставки размножили бы строки
+        return super().get_queryset(request).annotate(
+            active_groups_total=count_subquery(BreakGroup.objects.filter(is_active=True), 'break_obj'),
+            bids_total=count_subquery(BreakBid.objects.all(), 'group__break_obj'),
+            valid_bids_total=count_subquery(BreakBid.objects.filter(is_valid=True), 'group__break_obj'),
+        )
+    
     def groups_count(self, obj):
         """Количество групп"""
-        return obj.groups.filter(is_active=True).count()
+        return obj.active_groups_total
     groups_count.short_description = 'Групп'
+    groups_count.admin_order_field = 'active_groups_total'
     
     def bids_count(self, obj):
         """Количество ставок"""
-        return BreakBid.objects.filter(group__break_obj=obj).count()
+        return obj.bids_total
     bids_count.short_description = 'Ставок'
+    bids_count.admin_order_field = 'bids_total'
     
     def break_stats(self, obj):
         """Расширенная статистика брейка"""
-        groups = obj.get_active_groups()
-        total_bids = BreakBid.objects.filter(group__break_obj=obj).count()
-        active_bids = BreakBid.objects.filter(
-            group__break_obj=obj,
-            is_valid=True
-        ).count()
-        
         return format_html(
             '<div style="background: #f9f9f9; padding: 15px; border-radius: 8px;">'
             '<p><strong>📦 Групп:</strong> {}</p>'
             '<p><strong>💰 Всего ставок:</strong> {}</p>'
             '<p><strong>✅ Активных ставок:</strong> {}</p>'
             '</div>',
-            groups.count(),
-            total_bids,
-            active_bids
+            obj.active_groups_total,
+            obj.bids_total,
+            obj.valid_bids_total
         )
     break_stats.short_description = 'Статистика'
     
@@ -757,43 +794,23 @@ class BreakAdmin(admin.ModelAdmin):
     activate_breaks.short_description = '✅ Активировать брейки'
     
     def complete_breaks(self, request, queryset):
-        """Завершить выбранные брейки"""
-        from telegram_bot.breaks import complete_break
-        from telegram.ext import Application
-        import asyncio
+        """Завершить выбранные брейки (в фоне)"""
+        from telegram_bot.jobs import COMPLETE_BREAKS
         
-        updated = 0
-        token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
-        
-        if not token:
+        if not getattr(settings, 'TELEGRAM_BOT_TOKEN', None):
             self.message_user(request, '❌ TELEGRAM_BOT_TOKEN не настроен', level='error')
             return
         
-        async def complete_break_async(break_obj):
-            application = Application.builder().token(token).build()
-            bot = application.bot
-            await complete_break(break_obj, bot)
-            await application.shutdown()
-        
-        for break_obj in queryset:
-            if break_obj.status == 'active':
-                try:
-                    asyncio.run(complete_break_async(break_obj))
-                    updated += 1
-                except Exception as e:
-                    self.message_user(
-                        request,
-                        f'❌ Ошибка при завершении "{break_obj.name}": {e}',
-                        level='error'
-                    )
-        
-        self.message_user(request, f'✅ Завершено брейков: {updated}', level='success')
+        break_ids = list(queryset.filter(status='active').values_list('id', flat=True))
+        if not break_ids:
+            self.message_user(request, 'Нет активных брейков', level='warning')
+            return
+        enqueue_job(self, request, COMPLETE_BREAKS, {'break_ids': break_ids}, total=len(break_ids))
     complete_breaks.short_description = '🏁 Завершить брейки'
     
     def publish_to_channel(self, request, queryset):
-        """Опубликовать брейк в канал"""
-        from telegram_bot.breaks import format_break_post
-        from telegram import Bot
+        """Опубликовать брейк в канал (в фоне)"""
+        from telegram_bot.jobs import PUBLISH_BREAKS
         
         token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
         channel_id = getattr(settings, 'TELEGRAM_CHANNEL_ID', None)
@@ -806,42 +823,8 @@ class BreakAdmin(admin.ModelAdmin):
             )
             return
         
-        import asyncio
-        from telegram.ext import Application
-        
-        async def publish_break(break_obj):
-            application = Application.builder().token(token).build()
-            bot = application.bot
-            bot_username = (await bot.get_me()).username
-            
-            post_text, keyboard = format_break_post(break_obj, bot_username)
-            message = await bot.send_message(
-                chat_id=channel_id,
-                text=post_text,
-                reply_markup=keyboard,
-                parse_mode='HTML'
-            )
-            
-            break_obj.channel_id = channel_id
-            break_obj.channel_post_id = message.message_id
-            break_obj.save()
-            
-            await application.shutdown()
-        
-        for break_obj in queryset:
-            try:
-                asyncio.run(publish_break(break_obj))
-                self.message_user(
-                    request,
-                    f'✅ Брейк "{break_obj.name}" опубликован в канал',
-                    level='success'
-                )
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f'❌ Ошибка при публикации "{break_obj.name}": {e}',
-                    level='error'
-                )
+        break_ids = list(queryset.values_list('id', flat=True))
+        enqueue_job(self, request, PUBLISH_BREAKS, {'break_ids': break_ids}, total=len(break_ids))
     publish_to_channel.short_description = '📢 Опубликовать в канал'
 
 
@@ -901,15 +884,27 @@ class BreakGroupAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Та же выборка, что в BreakGroup.get_current_bid, но подзапросом
+        top_bid = BreakBid.objects.filter(group=OuterRef('pk'), is_valid=True).order_by('-amount', '-created_at')
+        return super().get_queryset(request).select_related('break_obj').annotate(
+            bids_total=count_subquery(BreakBid.objects.all(), 'group'),
+            top_bid=Subquery(top_bid.values('amount')[:1]),
+        )
+    
+    def current_bid_value(self, obj):
+        return obj.top_bid if obj.top_bid is not None else obj.min_bid
+    
     def current_bid(self, obj):
         """Текущая максимальная ставка"""
-        return f"{obj.get_current_bid()}₽"
+        return f"{self.current_bid_value(obj)}₽"
     current_bid.short_description = 'Текущая ставка'
+    current_bid.admin_order_field = 'top_bid'
     
     def current_bid_display(self, obj):
         """Отображение текущей ставки"""
-        current = obj.get_current_bid()
-        min_next = obj.get_min_next_bid()
+        current = self.current_bid_value(obj)
+        min_next = current + obj.bid_step
         return format_html(
             '<div style="background: #e8f5e9; padding: 10px; border-radius: 8px;">'
             '<p><strong>Текущая ставка:</strong> {}₽</p>'
@@ -922,14 +917,15 @@ class BreakGroupAdmin(admin.ModelAdmin):
     
     def bids_count(self, obj):
         """Количество ставок"""
-        return obj.bids.count()
+        return obj.bids_total
     bids_count.short_description = 'Ставок'
+    bids_count.admin_order_field = 'bids_total'
     
     def bids_list(self, obj):
         """Список ставок"""
-        bids = obj.bids.select_related('user').order_by('-amount', '-created_at')[:20]
+        bids = list(obj.bids.select_related('user').order_by('-amount', '-created_at')[:20])
         
-        if not bids.exists():
+        if not bids:
             return "Ставок пока нет"
         
         html = '<div style="max-height: 400px; overflow-y: auto;">'
@@ -971,7 +967,7 @@ class BreakBidAdmin(admin.ModelAdmin):
     
     list_filter = [
         'group__break_obj',
-        'group',
+        ('group', BreakGroupListFilter),
         'is_valid',
         'created_at'
     ]
@@ -991,6 +987,9 @@ class BreakBidAdmin(admin.ModelAdmin):
         'user_info'
     ]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'group__break_obj')
+    
     def user_display(self, obj):
         """Отображение пользователя"""
         return obj.user.get_full_name()
@@ -1055,6 +1054,9 @@ class BreakWinnerAdmin(admin.ModelAdmin):
     
     actions = ['notify_winners']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'winning_bid', 'group__break_obj')
+    
     def user_display(self, obj):
         """Отображение пользователя"""
         return obj.user.get_full_name()
@@ -1080,41 +1082,17 @@ class BreakWinnerAdmin(admin.ModelAdmin):
     user_info.short_description = 'Информация о победителе'
     
     def notify_winners(self, request, queryset):
-        """Уведомить победителей"""
-        from telegram_bot.breaks import notify_winner
-        from telegram.ext import Application
-        import asyncio
+        """Уведомить победителей (в фоне)"""
+        from telegram_bot.jobs import NOTIFY_WINNERS
         
         token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
         if not token:
             self.message_user(request, '❌ TELEGRAM_BOT_TOKEN не настроен', level='error')
             return
         
-        async def notify_winners_async():
-            application = Application.builder().token(token).build()
-            bot = application.bot
-            notified = 0
-            
-            for winner in queryset.filter(notified=False):
-                try:
-                    await notify_winner(bot, winner)
-                    notified += 1
-                except Exception as e:
-                    self.message_user(
-                        request,
-                        f'❌ Ошибка при уведомлении {winner.user.get_full_name()}: {e}',
-                        level='error'
-                    )
-            
-            await application.shutdown()
-            return notified
-        
-        try:
-            notified = asyncio.run(notify_winners_async())
-            self.message_user(request, f'✅ Уведомлено победителей: {notified}', level='success')
-        except Exception as e:
-            self.message_user(request, f'❌ Ошибка: {e}', level='error')
+        winner_ids = list(queryset.filter(notified=False).values_list('id', flat=True))
+        if not winner_ids:
+            self.message_user(request, 'Все выбранные победители уже уведомлены', level='warning')
+            return
+        enqueue_job(self, request, NOTIFY_WINNERS, {'winner_ids': winner_ids}, total=len(winner_ids))
     notify_winners.short_description = '📨 Уведомить победителей'
-
-
-
@@ -12,5 +12,16 @@ class TelegramBotConfig(AppConfig):
     
     def ready(self):
         """Инициализация приложения"""
-        pass
+        # Регистрация обработчиков фоновых задач
+        from apps.core import blobs, images
+        from telegram_bot import jobs  # noqa: F401
+        from telegram_bot.models import Notification, VerifiedCard
+        
+        # WebP/AVIF-варианты фото карт для админки, API и бота
+        images.track(VerifiedCard, 'photo_original', 'photo_original_variants')
+        images.track(VerifiedCard, 'photo_packaged', 'photo_packaged_variants')
+        
+        # Ссылки на файлы в хранилище по содержимому
+        blobs.track(VerifiedCard, 'photo_original', 'photo_packaged')
+        blobs.track(Notification, 'image')
 
@@ -26,6 +26,7 @@ django.setup()
 
 from django.conf import settings
 from apps.cards.models import Card
+from apps.core.metrics import InstrumentedApplication
 from telegram_bot.models import VerifiedCard
 from telegram_bot.utils import get_card_image_path, format_card_info
 from telegram_bot.breaks import (
@@ -405,7 +406,7 @@ def main() -> None:
         return
     
     # Создаём приложение
-    application = Application.builder().token(token).build()
+    application = Application.builder().application_class(InstrumentedApplication).token(token).build()
     
     # Регистрируем обработчики команд
     application.add_handler(CommandHandler("start", start))
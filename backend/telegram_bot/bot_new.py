@@ -25,6 +25,8 @@ import django
 django.setup()
 
 from django.conf import settings
+from apps.core.images import read_variant
+from apps.core.metrics import InstrumentedApplication
 from telegram_bot.models import VerifiedCard, VerificationLog, BotUser
 from telegram_bot.bot_admin import (
     admin_start,
@@ -220,34 +222,26 @@ async def verify_card_by_code(update: Update, context: ContextTypes.DEFAULT_TYPE
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        # Отправляем фотографии
-        media = []
-        
-        # Добавляем оригинальное фото
-        if verified_card.photo_original:
-            try:
-                photo_path = verified_card.photo_original.path
-                if os.path.exists(photo_path):
-                    with open(photo_path, 'rb') as photo:
-                        media.append(InputMediaPhoto(
-                            media=photo.read(),
-                            caption="📸 Оригинальная карта"
-                        ))
-            except Exception as e:
-                logger.warning(f"Could not load original photo: {e}")
+        # Фото — JPEG-вариант medium: меньше трафика, чем оригинал, и без EXIF
+        @sync_to_async
+        def read_photos():
+            photos = []
+            for field_file, variants, caption in (
+                (verified_card.photo_original, verified_card.photo_original_variants, "📸 Оригинальная карта"),
+                (verified_card.photo_packaged, verified_card.photo_packaged_variants, "📦 Карта в упаковке"),
+            ):
+                if not field_file:
+                    continue
+                try:
+                    photos.append(InputMediaPhoto(
+                        media=read_variant(field_file, variants, 'medium', 'jpeg'),
+                        caption=caption
+                    ))
+                except Exception as e:
+                    logger.warning(f"Could not load photo {field_file.name}: {e}")
+            return photos
         
-        # Добавляем фото в упаковке
-        if verified_card.photo_packaged:
-            try:
-                photo_path = verified_card.photo_packaged.path
-                if os.path.exists(photo_path):
-                    with open(photo_path, 'rb') as photo:
-                        media.append(InputMediaPhoto(
-                            media=photo.read(),
-                            caption="📦 Карта в упаковке"
-                        ))
-            except Exception as e:
-                logger.warning(f"Could not load packaged photo: {e}")
+        media = await read_photos()
         
         # Отправляем медиа-группу если есть фото
         if media:
@@ -366,7 +360,7 @@ def main() -> None:
         return
     
     # Создаём приложение
-    application = Application.builder().token(token).build()
+    application = Application.builder().application_class(InstrumentedApplication).token(token).build()
     
     # Регистрируем обработчики команд
     application.add_handler(CommandHandler("start", start))
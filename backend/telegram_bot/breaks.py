@@ -524,6 +524,34 @@ async def update_channel_comment(bot, break_obj: Break) -> None:
         logger.error(f"Ошибка при обновлении комментария для брейка {break_obj.id}: {e}")
 
 
+def determine_winners(break_obj: Break) -> list[BreakWinner]:
+    """
+    Определяет победителей групп и помечает брейк завершённым
+
+    Returns:
+        Новые победители (ещё не уведомлённые)
+    """
+    winners = []
+    with transaction.atomic():
+        for group in break_obj.get_active_groups():
+            winning_bid = group.bids.filter(is_valid=True).select_related('user').order_by('-amount', '-created_at').first()
+            if not winning_bid:
+                continue
+            winner, created = BreakWinner.objects.get_or_create(
+                group=group,
+                defaults={
+                    'user': winning_bid.user,
+                    'winning_bid': winning_bid,
+                }
+            )
+            if created:
+                winners.append(winner)
+
+        break_obj.status = 'completed'
+        break_obj.save()
+    return winners
+
+
 async def complete_break(break_obj: Break, bot) -> None:
     """
     Завершает брейк и определяет победителей
@@ -533,37 +561,27 @@ async def complete_break(break_obj: Break, bot) -> None:
         bot: Экземпляр бота Telegram
     """
     try:
-        with transaction.atomic():
-            # Определяем победителей для каждой группы
-            groups = break_obj.get_active_groups()
-            
-            for group in groups:
-                winning_bid = group.bids.filter(is_valid=True).order_by('-amount', '-created_at').first()
-                
-                if winning_bid:
-                    # Создаём запись о победителе
-                    winner, created = BreakWinner.objects.get_or_create(
-                        group=group,
-                        defaults={
-                            'user': winning_bid.user,
-                            'winning_bid': winning_bid,
-                        }
-                    )
-                    
-                    if created:
-                        # Уведомляем победителя
-                        await notify_winner(bot, winner)
-            
-            # Меняем статус брейка
-            break_obj.status = 'completed'
-            break_obj.save()
-            
-            logger.info(f"Брейк {break_obj.id} завершён")
+        for winner in determine_winners(break_obj):
+            # Уведомляем победителя
+            await notify_winner(bot, winner)
+        
+        logger.info(f"Брейк {break_obj.id} завершён")
             
     except Exception as e:
         logger.error(f"Ошибка при завершении брейка {break_obj.id}: {e}")
 
 
+def format_winner_message(winner: BreakWinner) -> str:
+    return (
+        f"🎉 <b>Поздравляем! Вы победили!</b>\n\n"
+        f"Брейк: {winner.group.break_obj.name}\n"
+        f"Группа: <b>{winner.group.name}</b>\n"
+        f"Ваша ставка: {winner.winning_bid.amount}₽\n\n"
+        f"Брейк завершён. Пожалуйста, свяжитесь с администратором "
+        f"для оплаты и доставки."
+    )
+
+
 async def notify_winner(bot, winner: BreakWinner) -> None:
     """
     Уведомляет победителя группы
@@ -573,18 +591,9 @@ async def notify_winner(bot, winner: BreakWinner) -> None:
         winner: Победитель группы
     """
     try:
-        message = (
-            f"🎉 <b>Поздравляем! Вы победили!</b>\n\n"
-            f"Брейк: {winner.group.break_obj.name}\n"
-            f"Группа: <b>{winner.group.name}</b>\n"
-            f"Ваша ставка: {winner.winning_bid.amount}₽\n\n"
-            f"Брейк завершён. Пожалуйста, свяжитесь с администратором "
-            f"для оплаты и доставки."
-        )
-        
         await bot.send_message(
             chat_id=winner.user.telegram_id,
-            text=message,
+            text=format_winner_message(winner),
             parse_mode='HTML'
         )
         
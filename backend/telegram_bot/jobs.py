@@ -0,0 +1,107 @@
+"""
+Фоновые задачи бота для очереди apps.core.jobs
+
+Их ставят действия админки, выполняет `python manage.py run_jobs`.
+Обработчики можно безопасно повторить: завершаются только активные
+брейки, уведомляются только неуведомлённые победители, уже
+опубликованные в этом запуске брейки пропускаются, а рассылка
+продолжается с последнего сохранённого получателя.
+"""
+
+import logging
+
+from django.conf import settings
+
+from apps.core.jobs import job_handler, set_progress
+from apps.core.telegram_client import get_telegram_client
+from telegram_bot.breaks import determine_winners, format_break_post, format_winner_message
+from telegram_bot.models import Break, BreakWinner
+from telegram_bot.tasks import send_notification_task
+
+logger = logging.getLogger(__name__)
+
+SEND_NOTIFICATION = 'telegram_bot.send_notification'
+COMPLETE_BREAKS = 'telegram_bot.complete_breaks'
+PUBLISH_BREAKS = 'telegram_bot.publish_breaks'
+NOTIFY_WINNERS = 'telegram_bot.notify_winners'
+
+
+def raise_errors(job, errors):
+    """Сохраняет ошибки в result и роняет задачу, чтобы очередь её повторила"""
+    if errors:
+        job.result['errors'] = errors
+        raise RuntimeError('\n'.join(errors))
+
+
+def notify_winners(job, winners, offset=0, total=None):
+    """Отправляет победителям сообщения; возвращает список ошибок"""
+    bot = get_telegram_client().bot
+    errors = []
+    for done, winner in enumerate(winners, offset + 1):
+        try:
+            bot.send_message(chat_id=winner.user.telegram_id, text=format_winner_message(winner), parse_mode='HTML')
+            BreakWinner.objects.filter(pk=winner.pk).update(notified=True)
+        except Exception as e:
+            errors.append(f"{winner.user.get_full_name()}: {e}")
+        set_progress(job, done, total=total, message=f"Уведомлён {winner.user.get_full_name()}")
+    return errors
+
+
+def unnotified_winners(**filters):
+    return list(
+        BreakWinner.objects.filter(notified=False, **filters)
+        .select_related('user', 'winning_bid', 'group__break_obj')
+    )
+
+
+@job_handler(SEND_NOTIFICATION)
+def send_notification(job):
+    def on_progress(done, total, last_user_id):
+        job.result['last_user_id'] = last_user_id
+        set_progress(job, done, total=total, message=f"Отправлено {done} из {total}")
+
+    # Повтор продолжает рассылку, а не начинает её заново
+    resume_after = job.result.get('last_user_id', 0) if job.attempts > 1 else None
+    send_notification_task(job.payload['notification_id'], on_progress=on_progress, resume_after=resume_after)
+
+
+@job_handler(COMPLETE_BREAKS)
+def complete_breaks(job):
+    break_ids = job.payload['break_ids']
+    breaks = list(Break.objects.filter(id__in=break_ids, status='active'))
+    for done, break_obj in enumerate(breaks, 1):
+        determine_winners(break_obj)
+        set_progress(job, done, total=len(breaks), message=f"Завершён «{break_obj.name}»")
+    job.result['completed'] = job.result.get('completed', 0) + len(breaks)
+
+    # Победителей уведомляем отдельным шагом: при повторе — тех, до кого не дошли
+    winners = unnotified_winners(group__break_obj_id__in=break_ids)
+    raise_errors(job, notify_winners(job, winners, offset=len(breaks), total=len(breaks) + len(winners)))
+
+
+@job_handler(PUBLISH_BREAKS)
+def publish_breaks(job):
+    channel_id = settings.TELEGRAM_CHANNEL_ID
+    bot = get_telegram_client().bot
+    bot_username = bot.get_me().username
+    published = job.result.setdefault('published', [])
+    break_ids = job.payload['break_ids']
+    errors = []
+    for done, break_obj in enumerate(Break.objects.filter(id__in=break_ids).order_by('id'), 1):
+        if break_obj.id in published:
+            continue
+        try:
+            post_text, keyboard = format_break_post(break_obj, bot_username)
+            message = bot.send_message(chat_id=channel_id, text=post_text, reply_markup=keyboard, parse_mode='HTML')
+            Break.objects.filter(pk=break_obj.pk).update(channel_id=channel_id, channel_post_id=message.message_id)
+            published.append(break_obj.id)
+        except Exception as e:
+            errors.append(f"«{break_obj.name}»: {e}")
+        set_progress(job, done, total=len(break_ids), message=f"«{break_obj.name}»")
+    raise_errors(job, errors)
+
+
+@job_handler(NOTIFY_WINNERS)
+def notify_selected_winners(job):
+    winners = unnotified_winners(id__in=job.payload['winner_ids'])
+    raise_errors(job, notify_winners(job, winners, total=len(winners)))
@@ -0,0 +1,195 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:49
+"""
+Модели брейков и уведомлений (BotUser, Break*, Notification)
+
+Раньше миграции для них в репозитории не было, и BREAKS_README предлагал
+делать makemigrations на месте, поэтому на части серверов таблицы уже
+есть. Операции ниже создают таблицу или индекс, только если их ещё нет:
+на таких серверах миграция лишь записывает состояние моделей.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class CreateModelIfMissing(migrations.CreateModel):
+    """CreateModel, пропускающая уже существующую таблицу"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.name)
+        if model._meta.db_table not in schema_editor.connection.introspection.table_names():
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddIndexIfMissing(migrations.AddIndex):
+    """AddIndex, пропускающая уже существующий индекс с тем же именем"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        if self.index.name not in existing:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0002_verifiedcard_card_name_verifiedcard_description_and_more'),
+    ]
+
+    operations = [
+        CreateModelIfMissing(
+            name='BotUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('telegram_id', models.BigIntegerField(db_index=True, help_text='Уникальный ID пользователя в Telegram', unique=True, verbose_name='Telegram ID')),
+                ('username', models.CharField(blank=True, help_text='Username пользователя в Telegram (@username)', max_length=200, verbose_name='Username')),
+                ('first_name', models.CharField(blank=True, help_text='Имя пользователя', max_length=200, verbose_name='Имя')),
+                ('last_name', models.CharField(blank=True, help_text='Фамилия пользователя', max_length=200, verbose_name='Фамилия')),
+                ('language_code', models.CharField(blank=True, help_text='Код языка пользователя (ru, en, etc.)', max_length=10, verbose_name='Язык')),
+                ('is_bot', models.BooleanField(default=False, verbose_name='Это бот?')),
+                ('is_blocked', models.BooleanField(default=False, help_text='Пользователь заблокировал бота', verbose_name='Заблокирован')),
+                ('is_active', models.BooleanField(default=True, help_text='Получает ли пользователь уведомления', verbose_name='Активен')),
+                ('first_interaction', models.DateTimeField(auto_now_add=True, help_text='Когда пользователь впервые обратился к боту', verbose_name='Первое взаимодействие')),
+                ('last_interaction', models.DateTimeField(auto_now=True, help_text='Когда пользователь последний раз взаимодействовал с ботом', verbose_name='Последнее взаимодействие')),
+                ('interaction_count', models.PositiveIntegerField(default=0, help_text='Сколько раз пользователь использовал бота', verbose_name='Количество взаимодействий')),
+                ('notes', models.TextField(blank=True, help_text='Дополнительная информация о пользователе', verbose_name='Примечания')),
+            ],
+            options={
+                'verbose_name': 'Пользователь бота',
+                'verbose_name_plural': 'Пользователи бота',
+                'ordering': ['-last_interaction'],
+                'indexes': [models.Index(fields=['telegram_id'], name='telegram_bo_telegra_5113c7_idx'), models.Index(fields=['is_active', 'is_blocked'], name='telegram_bo_is_acti_a76664_idx'), models.Index(fields=['-last_interaction'], name='telegram_bo_last_in_5f5433_idx')],
+            },
+        ),
+        CreateModelIfMissing(
+            name='Break',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Например: Брейк Marvel Heroes', max_length=255, verbose_name='Название брейка')),
+                ('description', models.TextField(help_text='Описание брейка для пользователей', verbose_name='Описание')),
+                ('checklist_url', models.URLField(blank=True, help_text='Ссылка на чек-лист коллекции', null=True, verbose_name='Ссылка на чек-лист')),
+                ('status', models.CharField(choices=[('draft', 'Черновик'), ('scheduled', 'Запланирован'), ('active', 'Активен'), ('completed', 'Завершён'), ('cancelled', 'Отменён')], default='draft', max_length=20, verbose_name='Статус')),
+                ('start_time', models.DateTimeField(help_text='Когда начинается брейк', verbose_name='Время начала')),
+                ('end_time', models.DateTimeField(help_text='Когда заканчивается брейк (может продлеваться при ставках)', verbose_name='Время окончания')),
+                ('channel_post_id', models.BigIntegerField(blank=True, help_text='ID сообщения с постом о брейке в Telegram-канале', null=True, verbose_name='ID поста в канале')),
+                ('channel_id', models.BigIntegerField(blank=True, help_text='ID Telegram-канала, где опубликован брейк', null=True, verbose_name='ID канала')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_breaks', to='telegram_bot.botuser', verbose_name='Создатель')),
+            ],
+            options={
+                'verbose_name': 'Брейк',
+                'verbose_name_plural': 'Брейки',
+                'ordering': ['-created_at'],
+            },
+        ),
+        CreateModelIfMissing(
+            name='BreakGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Например: Кот Ик, Люди Икс', max_length=255, verbose_name='Название группы')),
+                ('order', models.PositiveIntegerField(default=0, help_text='Порядок отображения группы', verbose_name='Порядок')),
+                ('min_bid', models.DecimalField(decimal_places=2, default=1.0, help_text='Минимальная ставка в рублях', max_digits=10, verbose_name='Минимальная ставка')),
+                ('bid_step', models.DecimalField(decimal_places=2, default=50.0, help_text='Минимальный шаг увеличения ставки', max_digits=10, verbose_name='Шаг ставки')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активна')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('break_obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='telegram_bot.break', verbose_name='Брейк')),
+            ],
+            options={
+                'verbose_name': 'Группа брейка',
+                'verbose_name_plural': 'Группы брейков',
+                'ordering': ['order', 'id'],
+            },
+        ),
+        CreateModelIfMissing(
+            name='BreakBid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Сумма ставки')),
+                ('is_valid', models.BooleanField(default=True, help_text='Является ли ставка текущей максимальной', verbose_name='Действительна')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата ставки')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='break_bids', to='telegram_bot.botuser', verbose_name='Пользователь')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to='telegram_bot.breakgroup', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Ставка в брейке',
+                'verbose_name_plural': 'Ставки в брейках',
+                'ordering': ['-created_at'],
+            },
+        ),
+        CreateModelIfMissing(
+            name='BreakWinner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notified', models.BooleanField(default=False, help_text='Получил ли победитель уведомление', verbose_name='Уведомлён')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата определения победителя')),
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='winner', to='telegram_bot.breakgroup', verbose_name='Группа')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='break_wins', to='telegram_bot.botuser', verbose_name='Победитель')),
+                ('winning_bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='win', to='telegram_bot.breakbid', verbose_name='Выигрышная ставка')),
+            ],
+            options={
+                'verbose_name': 'Победитель брейка',
+                'verbose_name_plural': 'Победители брейков',
+                'ordering': ['-created_at'],
+            },
+        ),
+        CreateModelIfMissing(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Название уведомления (для внутреннего использования)', max_length=255, verbose_name='Название')),
+                ('message', models.TextField(help_text='Текст уведомления (поддерживает HTML)', verbose_name='Сообщение')),
+                ('target_type', models.CharField(choices=[('all', 'Все пользователи'), ('active', 'Активные пользователи'), ('specific', 'Конкретный пользователь')], default='all', help_text='Выберите целевую аудиторию', max_length=20, verbose_name='Кому отправить')),
+                ('status', models.CharField(choices=[('draft', 'Черновик'), ('scheduled', 'Запланировано'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='draft', max_length=20, verbose_name='Статус')),
+                ('image', models.ImageField(blank=True, help_text='Опциональное изображение к уведомлению', null=True, upload_to='notifications/', verbose_name='Изображение')),
+                ('button_text', models.CharField(blank=True, help_text='Опциональная кнопка в уведомлении', max_length=100, verbose_name='Текст кнопки')),
+                ('button_url', models.URLField(blank=True, help_text='URL для кнопки', verbose_name='Ссылка кнопки')),
+                ('scheduled_for', models.DateTimeField(blank=True, help_text='Когда отправить уведомление (оставьте пустым для немедленной отправки)', null=True, verbose_name='Запланировано на')),
+                ('sent_at', models.DateTimeField(blank=True, help_text='Когда уведомление было отправлено', null=True, verbose_name='Отправлено')),
+                ('total_recipients', models.PositiveIntegerField(default=0, help_text='Сколько пользователей должны получить уведомление', verbose_name='Всего получателей')),
+                ('success_count', models.PositiveIntegerField(default=0, help_text='Сколько пользователей получили уведомление', verbose_name='Успешно отправлено')),
+                ('failed_count', models.PositiveIntegerField(default=0, help_text='Сколько пользователей не получили уведомление', verbose_name='Не доставлено')),
+                ('error_message', models.TextField(blank=True, help_text='Описание ошибок при отправке', verbose_name='Ошибки')),
+                ('created_by', models.CharField(blank=True, help_text='Кто создал уведомление', max_length=200, verbose_name='Создано')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('target_user', models.ForeignKey(blank=True, help_text='Если выбран тип "Конкретный пользователь"', null=True, on_delete=django.db.models.deletion.CASCADE, to='telegram_bot.botuser', verbose_name='Конкретный пользователь')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ['-created_at'],
+            },
+        ),
+        AddIndexIfMissing(
+            model_name='break',
+            index=models.Index(fields=['status', 'start_time'], name='telegram_bo_status_ed5495_idx'),
+        ),
+        AddIndexIfMissing(
+            model_name='break',
+            index=models.Index(fields=['status', 'end_time'], name='telegram_bo_status_8f7a3f_idx'),
+        ),
+        AddIndexIfMissing(
+            model_name='breakgroup',
+            index=models.Index(fields=['break_obj', 'is_active'], name='telegram_bo_break_o_5300c0_idx'),
+        ),
+        AddIndexIfMissing(
+            model_name='breakbid',
+            index=models.Index(fields=['group', 'is_valid', '-amount'], name='telegram_bo_group_i_7ef30d_idx'),
+        ),
+        AddIndexIfMissing(
+            model_name='breakbid',
+            index=models.Index(fields=['user', '-created_at'], name='telegram_bo_user_id_e75073_idx'),
+        ),
+        AddIndexIfMissing(
+            model_name='notification',
+            index=models.Index(fields=['status', 'scheduled_for'], name='telegram_bo_status_27f870_idx'),
+        ),
+        AddIndexIfMissing(
+            model_name='notification',
+            index=models.Index(fields=['-created_at'], name='telegram_bo_created_ac2429_idx'),
+        ),
+    ]
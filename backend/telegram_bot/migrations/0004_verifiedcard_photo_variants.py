@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_botuser_breaks_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verifiedcard',
+            name='photo_original_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='verifiedcard',
+            name='photo_packaged_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:03
+
+import apps.core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0004_verifiedcard_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Опциональное изображение к уведомлению', null=True, storage=apps.core.storage.get_blob_storage, upload_to='notifications/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='verifiedcard',
+            name='photo_original',
+            field=models.ImageField(blank=True, help_text='Фото карты до упаковки', null=True, storage=apps.core.storage.get_blob_storage, upload_to='cards/original/', verbose_name='Фото карты (оригинал)'),
+        ),
+        migrations.AlterField(
+            model_name='verifiedcard',
+            name='photo_packaged',
+            field=models.ImageField(blank=True, help_text='Фото карты после упаковки с QR-кодом', null=True, storage=apps.core.storage.get_blob_storage, upload_to='cards/packaged/', verbose_name='Фото карты в упаковке'),
+        ),
+    ]
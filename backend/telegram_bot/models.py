@@ -7,6 +7,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from apps.core.storage import get_blob_storage
+
 
 class VerifiedCard(models.Model):
     """
@@ -58,6 +60,7 @@ class VerifiedCard(models.Model):
     # Фото карты (до упаковки - оригинальное)
     photo_original = models.ImageField(
         upload_to='cards/original/',
+        storage=get_blob_storage,
         null=True,
         blank=True,
         verbose_name='Фото карты (оригинал)',
@@ -67,12 +70,17 @@ class VerifiedCard(models.Model):
     # Фото карты в упаковке (с QR-кодом)
     photo_packaged = models.ImageField(
         upload_to='cards/packaged/',
+        storage=get_blob_storage,
         null=True,
         blank=True,
         verbose_name='Фото карты в упаковке',
         help_text='Фото карты после упаковки с QR-кодом'
     )
     
+    # Уменьшенные копии фото (apps.core.images), заполняет воркер
+    photo_original_variants = models.JSONField(default=dict, blank=True, editable=False)
+    photo_packaged_variants = models.JSONField(default=dict, blank=True, editable=False)
+    
     # Описание карты от админа
     description = models.TextField(
         blank=True,
@@ -368,6 +376,7 @@ class Notification(models.Model):
     
     image = models.ImageField(
         upload_to='notifications/',
+        storage=get_blob_storage,
         null=True,
         blank=True,
         verbose_name='Изображение',
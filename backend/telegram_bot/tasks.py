@@ -5,37 +5,56 @@
 import logging
 import asyncio
 from asgiref.sync import sync_to_async
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.error import TelegramError, Forbidden, BadRequest
 from django.conf import settings
 from django.utils import timezone
 from telegram_bot.models import BotUser, Notification, Break
 from telegram_bot.breaks import complete_break
+from apps.core.jobs import LockLost
+from apps.core.telegram_client import get_telegram_client
 
 logger = logging.getLogger(__name__)
 
+# Как часто (в получателях) сообщать о прогрессе рассылки
+PROGRESS_EVERY = 20
 
-def send_notification_task(notification_id):
+
+def send_notification_task(notification_id, on_progress=None, resume_after=None):
     """
     Синхронная обертка для асинхронной отправки уведомления
     
     Args:
         notification_id: ID уведомления для отправки
+        on_progress: синхронный callback(done, total, last_user_id) — прогресс рассылки
+        resume_after: продолжить прерванную рассылку с получателей с id больше этого
     """
     try:
-        asyncio.run(send_notification_async(notification_id))
+        asyncio.run(send_notification_async(notification_id, on_progress, resume_after))
     except Exception as e:
         logger.error(f"Error in send_notification_task: {e}", exc_info=True)
         raise
 
 
-async def send_notification_async(notification_id):
+async def send_notification_async(notification_id, on_progress=None, resume_after=None):
     """
     Асинхронная отправка уведомления
     
+    Получатели обходятся по id; каждые PROGRESS_EVERY получателей счётчики
+    сохраняются, а on_progress получает id последнего обработанного. Если
+    рассылка упала, повтор с resume_after продолжает с места последнего
+    сохранения (повторно получат сообщение не больше PROGRESS_EVERY).
+    
     Args:
         notification_id: ID уведомления для отправки
+        on_progress: синхронный callback(done, total, last_user_id) — прогресс рассылки
+        resume_after: продолжить рассылку с получателей с id больше этого
+    
+    Raises:
+        Любую ошибку, кроме ошибок отправки отдельным получателям, —
+        после пометки уведомления как failed, чтобы очередь задач повторила
     """
+    resuming = resume_after is not None
     try:
         # Получаем уведомление (синхронно через sync_to_async)
         @sync_to_async
@@ -44,8 +63,9 @@ async def send_notification_async(notification_id):
         
         notification = await get_notification()
         
-        # Проверяем статус
-        if notification.status not in ['draft', 'scheduled']:
+        # Проверяем статус (прерванную рассылку можно продолжить)
+        allowed = ['draft', 'scheduled'] + (['sending', 'failed'] if resuming else [])
+        if notification.status not in allowed:
             logger.warning(f"Notification {notification_id} has status {notification.status}, skipping")
             return
         
@@ -66,16 +86,22 @@ async def send_notification_async(notification_id):
         
         recipients = await get_recipients_list()
         
-        @sync_to_async
-        def update_total():
-            notif = Notification.objects.get(id=notification_id)
-            notif.total_recipients = len(recipients)
-            notif.save()
-            return notif
-        
-        notification = await update_total()
+        # Уже обработанные в прошлой попытке
+        processed = 0
+        if resuming:
+            recipients = [user for user in recipients if user.id > resume_after]
+            processed = notification.success_count + notification.failed_count
+        else:
+            @sync_to_async
+            def update_total():
+                notif = Notification.objects.get(id=notification_id)
+                notif.total_recipients = len(recipients)
+                notif.save()
+                return notif
+            
+            notification = await update_total()
         
-        if not recipients:
+        if not recipients and not resuming:
             @sync_to_async
             def mark_failed():
                 notif = Notification.objects.get(id=notification_id)
@@ -95,7 +121,7 @@ async def send_notification_async(notification_id):
             await mark_failed()
             return
         
-        bot = Bot(token=bot_token)
+        bot = get_telegram_client().abot
         
         # Подготавливаем клавиатуру
         reply_markup = None
@@ -104,11 +130,23 @@ async def send_notification_async(notification_id):
             reply_markup = InlineKeyboardMarkup(keyboard)
         
         # Отправляем уведомления
-        success_count = 0
-        failed_count = 0
+        success_count = notification.success_count if resuming else 0
+        failed_count = notification.failed_count if resuming else 0
         errors = []
         
-        for user in recipients:
+        @sync_to_async
+        def save_counts():
+            Notification.objects.filter(id=notification_id).update(
+                success_count=success_count, failed_count=failed_count
+            )
+        
+        total = processed + len(recipients)
+        for done, user in enumerate(recipients):
+            if done % PROGRESS_EVERY == 0:
+                await save_counts()
+                if on_progress:
+                    last_user_id = recipients[done - 1].id if done else (resume_after or 0)
+                    await sync_to_async(on_progress)(processed + done, total, last_user_id)
             try:
                 if notification.image:
                     # Отправляем с изображением
@@ -161,9 +199,7 @@ async def send_notification_async(notification_id):
                 failed_count += 1
                 errors.append(f"User {user.telegram_id}: {str(e)}")
                 logger.error(f"Unexpected error for user {user.telegram_id}: {e}", exc_info=True)
-            
-            # Небольшая задержка между отправками (защита от флуда)
-            await asyncio.sleep(0.05)
+            # Темп отправки (защита от флуда) держит RateLimiter общего клиента
         
         # Обновляем статистику
         @sync_to_async
@@ -190,6 +226,10 @@ async def send_notification_async(notification_id):
     except Notification.DoesNotExist:
         logger.error(f"Notification {notification_id} not found")
         
+    except LockLost:
+        # Задачу ведёт другой воркер — уведомление не трогаем
+        raise
+        
     except Exception as e:
         logger.error(f"Error sending notification {notification_id}: {e}", exc_info=True)
         try:
@@ -199,8 +239,9 @@ async def send_notification_async(notification_id):
                 notif.mark_as_failed(str(e))
             
             await mark_failed()
-        except:
-            pass
+        except Exception:
+            logger.exception(f"Could not mark notification {notification_id} as failed")
+        raise
 
 
 def get_recipients(notification):
@@ -222,11 +263,12 @@ def get_recipients(notification):
         return list(BotUser.objects.filter(
             is_active=True,
             is_blocked=False
-        ))
+        ).order_by('id'))
     
     else:  # 'all'
         # Все пользователи (кроме заблокировавших бота)
-        return list(BotUser.objects.filter(is_blocked=False))
+        # По id: повтор прерванной рассылки продолжает с последнего обработанного
+        return list(BotUser.objects.filter(is_blocked=False).order_by('id'))
 
 
 async def send_message_to_user(user_id, message, parse_mode='HTML', reply_markup=None):
@@ -245,7 +287,7 @@ async def send_message_to_user(user_id, message, parse_mode='HTML', reply_markup
             logger.error("TELEGRAM_BOT_TOKEN не настроен")
             return False
         
-        bot = Bot(token=bot_token)
+        bot = get_telegram_client().abot
         
         await bot.send_message(
             chat_id=user_id,
@@ -299,7 +341,7 @@ async def check_and_complete_breaks_async():
             logger.error("TELEGRAM_BOT_TOKEN не настроен")
             return
         
-        bot = Bot(token=bot_token)
+        bot = get_telegram_client().abot
         
         for break_obj in expired_breaks:
             try:
@@ -2,11 +2,29 @@
 Тесты для Telegram Bot
 """
 
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib import admin
+from django.db import OperationalError, connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
 from apps.cards.models import Card, Series
-from telegram_bot.models import VerifiedCard, VerificationLog
-from telegram_bot.utils import generate_qr_code, format_card_info
+from apps.core.jobs import set_progress, work
+from apps.core.models import Job
+from telegram_bot.models import (
+    VerifiedCard, VerificationLog, BotUser, Notification, Break, BreakGroup, BreakBid, BreakWinner,
+)
+from rest_framework.test import APIRequestFactory, force_authenticate
+from telegram_bot.utils import create_card_qr_code, generate_qr_code, format_card_info
+from telegram_bot.views import VerifiedCardViewSet
 
 
 class VerifiedCardModelTest(TestCase):
@@ -142,3 +160,276 @@ class UtilsTest(TestCase):
         self.assertIn("Test Series", info)
         self.assertIn("ОРИГИНАЛЬНАЯ КАРТА", info)
 
+
+class QRCodeViewTest(TestCase):
+    """Тесты отдачи QR-кодов и меток"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create(username="admin")
+        series = Series.objects.create(number=1, title="Test Series")
+        card = Card.objects.create(title="Test Card", number=7, rarity="о", series=series, base_price_rub=100)
+        self.verified_card = VerifiedCard.objects.create(card=card)
+
+    def get(self, action, **headers):
+        request = APIRequestFactory().get('/', headers=headers)
+        force_authenticate(request, user=self.user)
+        view = VerifiedCardViewSet.as_view({'get': action})
+        return view(request, pk=self.verified_card.pk)
+
+    def test_qr_rendered_once_and_streamed(self):
+        with mock.patch('telegram_bot.views.create_card_qr_code', wraps=create_card_qr_code) as render:
+            response = self.get('qr_code')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/png')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'\x89PNG'))
+
+            download = self.get('download_qr')
+            self.assertEqual(render.call_count, 1)
+        self.assertIn('attachment; filename="card_7_qr.png"', download['Content-Disposition'])
+        self.assertEqual(self.get('qr_code', if_none_match=response['ETag']).status_code, 304)
+
+    def test_printable_label(self):
+        response = self.get('printable_label')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('card_7_label.png', response['Content-Disposition'])
+
+
+class AdminChangelistQueriesTest(TestCase):
+    """Число запросов страниц списка в админке не зависит от числа строк"""
+
+    # Сессия, пользователь, счётчики пагинатора, строки, фильтры по FK, date_hierarchy
+    MAX_CHANGELIST_QUERIES = 12
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(self.admin_user)
+        self.series = Series.objects.create(number=1, title="Test Series")
+        self.rows = 0
+
+    def populate(self, count):
+        """Добавляет по count строк каждой модели бота"""
+        now = timezone.now()
+        for _ in range(count):
+            n = self.rows = self.rows + 1
+            card = Card.objects.create(title=f"Card {n}", number=n, rarity="о", series=self.series)
+            verified = VerifiedCard.objects.create(card=card)
+            VerificationLog.objects.create(verified_card=verified, telegram_user_id=n)
+            user = BotUser.objects.create(telegram_id=n, username=f"user{n}")
+            Notification.objects.create(title=f"News {n}", message="…", target_user=user, target_type='specific')
+            break_obj = Break.objects.create(
+                name=f"Break {n}", description="…", start_time=now, end_time=now + timedelta(hours=1), created_by=user,
+            )
+            for order in range(2):
+                group = BreakGroup.objects.create(break_obj=break_obj, name=f"Group {order}", order=order)
+                BreakBid.objects.create(group=group, user=user, amount=100, is_valid=False)
+                bid = BreakBid.objects.create(group=group, user=user, amount=150)
+            BreakWinner.objects.create(group=group, user=user, winning_bid=bid)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_bound(self):
+        models = [model for model in admin.site._registry if model._meta.app_label == 'telegram_bot']
+        self.populate(3)
+        small = {model: self.changelist_queries(model) for model in models}
+        self.populate(6)
+        for model in models:
+            with self.subTest(model=model.__name__):
+                queries = self.changelist_queries(model)
+                self.assertLessEqual(queries, self.MAX_CHANGELIST_QUERIES)
+                self.assertEqual(queries, small[model])
+
+    def test_annotated_columns(self):
+        self.populate(1)
+        group = BreakGroup.objects.first()
+        group_admin = admin.site._registry[BreakGroup]
+        annotated = group_admin.get_queryset(None).get(pk=group.pk)
+        self.assertEqual(group_admin.current_bid_value(annotated), group.get_current_bid())
+        self.assertEqual(group_admin.bids_count(annotated), 2)
+
+        break_obj = Break.objects.get()
+        annotated = admin.site._registry[Break].get_queryset(None).get(pk=break_obj.pk)
+        self.assertEqual((annotated.active_groups_total, annotated.bids_total, annotated.valid_bids_total), (2, 4, 2))
+
+        response = self.client.get(reverse('admin:telegram_bot_break_change', args=[break_obj.pk]))
+        self.assertEqual(response.status_code, 200)
+
+
+class AdminJobActionsTest(TestCase):
+    """Действия админки ставят задачи, а Telegram вызывает воркер"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        now = timezone.now()
+        self.user = BotUser.objects.create(telegram_id=42, first_name="Peter")
+        self.break_obj = Break.objects.create(
+            name="Marvel", description="…", status='active', start_time=now - timedelta(hours=1), end_time=now,
+        )
+        for name, amount in (("X-Men", 300), ("Avengers", 500)):
+            group = BreakGroup.objects.create(break_obj=self.break_obj, name=name)
+            BreakBid.objects.create(group=group, user=self.user, amount=amount)
+
+    @mock.patch('telegram_bot.jobs.get_telegram_client')
+    def test_complete_breaks_runs_in_worker(self, get_client):
+        bot = get_client.return_value.bot
+        bot.send_message.return_value = SimpleNamespace(message_id=1)
+
+        response = self.client.post(reverse('admin:telegram_bot_break_changelist'), {
+            'action': 'complete_breaks', '_selected_action': [self.break_obj.id],
+        })
+        self.assertEqual(response.status_code, 302)
+        # В запросе — только постановка в очередь
+        get_client.assert_not_called()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.payload), ('queued', {'break_ids': [self.break_obj.id]}))
+
+        self.assertEqual(work(once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress_done, job.progress_total), ('done', 3, 3))
+        self.break_obj.refresh_from_db()
+        self.assertEqual(self.break_obj.status, 'completed')
+        self.assertEqual(bot.send_message.call_count, 2)
+        self.assertFalse(BreakWinner.objects.filter(notified=False).exists())
+
+        response = self.client.get(reverse('admin:core_job_change', args=[job.id]))
+        self.assertContains(response, "3/3")
+
+    @mock.patch('telegram_bot.jobs.get_telegram_client')
+    def test_failed_notifications_retried(self, get_client):
+        bot = get_client.return_value.bot
+        bot.send_message.side_effect = [RuntimeError("Timed out"), SimpleNamespace(message_id=1),
+                                        SimpleNamespace(message_id=2)]
+        self.client.post(reverse('admin:telegram_bot_break_changelist'), {
+            'action': 'complete_breaks', '_selected_action': [self.break_obj.id],
+        })
+        work(once=True)
+        job = Job.objects.get()
+        self.assertEqual((job.status, BreakWinner.objects.filter(notified=False).count()), ('queued', 1))
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        work(once=True)
+        job.refresh_from_db()
+        # Повтор уведомил только того, до кого не дошли
+        self.assertEqual((job.status, job.result['completed'], bot.send_message.call_count), ('done', 1, 3))
+
+
+class NotificationJobTest(TransactionTestCase):
+    """Рассылка в очереди задач (ORM рассылки идёт из потока sync_to_async)"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+
+    @mock.patch('telegram_bot.tasks.PROGRESS_EVERY', 1)
+    @mock.patch('telegram_bot.tasks.get_telegram_client')
+    def test_notification_failure_retried_and_resumed(self, get_client):
+        send_message = get_client.return_value.abot.send_message = mock.AsyncMock()
+        for telegram_id in (42, 43, 44):
+            BotUser.objects.create(telegram_id=telegram_id, first_name=f"User {telegram_id}")
+        notification = Notification.objects.create(title="News", message="Hi", target_type='all')
+        self.client.post(reverse('admin:telegram_bot_notification_changelist'), {
+            'action': 'send_notifications', '_selected_action': [notification.id],
+        })
+
+        real_set_progress = set_progress
+        calls = []
+
+        def flaky_set_progress(job, done, **kwargs):
+            calls.append(done)
+            if len(calls) == 3:
+                raise OperationalError("database went away")
+            real_set_progress(job, done, **kwargs)
+
+        with mock.patch('telegram_bot.jobs.set_progress', flaky_set_progress):
+            work(once=True)
+        job = Job.objects.get()
+        notification.refresh_from_db()
+        # Ошибка не проглочена: уведомление failed, задача ждёт повтора
+        self.assertEqual((job.status, notification.status), ('queued', 'failed'))
+        self.assertEqual(send_message.await_count, 2)
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        work(once=True)
+        job.refresh_from_db()
+        notification.refresh_from_db()
+        self.assertEqual((job.status, notification.status), ('done', 'sent'))
+        # Повтор продолжил с последнего обработанного получателя, а не с начала
+        chats = [call.kwargs['chat_id'] for call in send_message.await_args_list]
+        self.assertEqual(chats, [42, 43, 44])
+        self.assertEqual((notification.success_count, notification.total_recipients), (3, 3))
+
+    @mock.patch('telegram_bot.tasks.PROGRESS_EVERY', 1)
+    @mock.patch('telegram_bot.tasks.get_telegram_client')
+    def test_failed_broadcast_retried_from_admin(self, get_client):
+        send_message = get_client.return_value.abot.send_message = mock.AsyncMock()
+        for telegram_id in (42, 43, 44):
+            BotUser.objects.create(telegram_id=telegram_id, first_name=f"User {telegram_id}")
+        notification = Notification.objects.create(title="News", message="Hi", target_type='all')
+        self.client.post(reverse('admin:telegram_bot_notification_changelist'), {
+            'action': 'send_notifications', '_selected_action': [notification.id],
+        })
+        Job.objects.update(max_attempts=1)
+
+        real_set_progress = set_progress
+
+        def flaky_set_progress(job, done, **kwargs):
+            if done == 2:
+                raise OperationalError("database went away")
+            real_set_progress(job, done, **kwargs)
+
+        with mock.patch('telegram_bot.jobs.set_progress', flaky_set_progress):
+            work(once=True)
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'failed')
+
+        self.client.post(reverse('admin:core_job_changelist'), {
+            'action': 'retry_jobs', '_selected_action': [job.id],
+        })
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.max_attempts), ('queued', 1, 2))
+
+        work(once=True)
+        job.refresh_from_db()
+        notification.refresh_from_db()
+        self.assertEqual((job.status, notification.status), ('done', 'sent'))
+        # Ручной повтор тоже продолжает рассылку, а не пропускает упавшее уведомление
+        chats = [call.kwargs['chat_id'] for call in send_message.await_args_list]
+        self.assertEqual(chats, [42, 43, 44])
+        self.assertEqual(notification.success_count, 3)
+
+
+class BreaksMigrationTest(TransactionTestCase):
+    """0003 проходит на сервере, где таблицы брейков уже созданы вручную"""
+
+    def apply_0003(self):
+        loader = MigrationLoader(connection)
+        migration = loader.get_migration('telegram_bot', '0003_botuser_breaks_notifications')
+        state = loader.project_state(migration.dependencies[0])
+        with connection.schema_editor() as editor:
+            migration.apply(state, editor)
+
+    def indexes(self, model):
+        with connection.cursor() as cursor:
+            return set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+
+    def test_existing_tables_kept(self):
+        BotUser.objects.create(telegram_id=42)
+        self.apply_0003()
+        self.assertTrue(BotUser.objects.filter(telegram_id=42).exists())
+
+        # Недостающая таблица создаётся вместе со своими индексами
+        with connection.schema_editor() as editor:
+            editor.delete_model(Notification)
+        self.apply_0003()
+        self.assertIn(Notification._meta.db_table, connection.introspection.table_names())
+        self.assertLessEqual({index.name for index in Notification._meta.indexes}, self.indexes(Notification))
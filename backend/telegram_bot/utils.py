@@ -10,6 +10,11 @@ from django.conf import settings
 from apps.cards.models import Card
 from telegram_bot.models import VerifiedCard
 
+# Версии рендера для cached_render: поднять при любом изменении вида
+# QR-кода или метки, иначе клиенты продолжат показывать старый файл
+QR_RENDER_VERSION = 1
+LABEL_RENDER_VERSION = 1
+
 
 def generate_qr_code(data: str, size: int = 300) -> BytesIO:
     """
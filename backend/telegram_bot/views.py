@@ -16,7 +16,10 @@ from telegram_bot.serializers import (
     VerificationLogSerializer,
     BulkVerifiedCardCreateSerializer
 )
-from telegram_bot.utils import create_card_qr_code, generate_printable_card_label
+from telegram_bot.utils import (
+    LABEL_RENDER_VERSION, QR_RENDER_VERSION, create_card_qr_code, generate_printable_card_label,
+)
+from apps.core.media import cached_render, serve_file
 import io
 
 
@@ -141,6 +144,14 @@ class VerifiedCardViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    def qr_code_name(self, verified_card):
+        """Файл QR-кода карты (рисуется при первом запросе)"""
+        bot_username = getattr(settings, 'TELEGRAM_BOT_USERNAME', 'your_bot')
+        bot_link = verified_card.get_bot_link(bot_username)
+        return cached_render(
+            'qr', QR_RENDER_VERSION, [bot_link], lambda: create_card_qr_code(verified_card, bot_username)
+        )
+
     @action(detail=True, methods=['get'])
     def qr_code(self, request, pk=None):
         """
@@ -149,12 +160,7 @@ class VerifiedCardViewSet(viewsets.ModelViewSet):
         GET /api/telegram-bot/verified-cards/{id}/qr_code/
         """
         verified_card = self.get_object()
-        bot_username = getattr(settings, 'TELEGRAM_BOT_USERNAME', 'your_bot')
-        
-        # Генерируем QR-код
-        qr_buffer = create_card_qr_code(verified_card, bot_username)
-        
-        return HttpResponse(qr_buffer.getvalue(), content_type='image/png')
+        return serve_file(request, self.qr_code_name(verified_card))
     
     @action(detail=True, methods=['get'])
     def download_qr(self, request, pk=None):
@@ -164,16 +170,8 @@ class VerifiedCardViewSet(viewsets.ModelViewSet):
         GET /api/telegram-bot/verified-cards/{id}/download_qr/
         """
         verified_card = self.get_object()
-        bot_username = getattr(settings, 'TELEGRAM_BOT_USERNAME', 'your_bot')
-        
-        # Генерируем QR-код
-        qr_buffer = create_card_qr_code(verified_card, bot_username)
-        
         filename = f"card_{verified_card.card.number}_qr.png"
-        response = HttpResponse(qr_buffer.getvalue(), content_type='image/png')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return serve_file(request, self.qr_code_name(verified_card), filename=filename, as_attachment=True)
     
     @action(detail=True, methods=['get'])
     def printable_label(self, request, pk=None):
@@ -184,15 +182,16 @@ class VerifiedCardViewSet(viewsets.ModelViewSet):
         """
         verified_card = self.get_object()
         bot_username = getattr(settings, 'TELEGRAM_BOT_USERNAME', 'your_bot')
-        
-        # Генерируем метку
-        label_buffer = generate_printable_card_label(verified_card, bot_username)
-        
-        filename = f"card_{verified_card.card.number}_label.png"
-        response = HttpResponse(label_buffer.getvalue(), content_type='image/png')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        card = verified_card.card
+
+        # Метка рисуется один раз на набор данных карты, дальше отдаётся файл
+        name = cached_render(
+            'labels', LABEL_RENDER_VERSION,
+            [verified_card.get_bot_link(bot_username), card.title, card.series.title, card.number, card.rarity],
+            lambda: generate_printable_card_label(verified_card, bot_username),
+        )
+        filename = f"card_{card.number}_label.png"
+        return serve_file(request, name, filename=filename, as_attachment=True)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
@@ -1,162 +0,0 @@
-#!/usr/bin/env python3
-"""
-Скрипт для обновления карточек Spider-Man с правильными данными с LastSticker.Ru
-"""
-
-import os
-import sys
-import django
-from decimal import Decimal
-
-# Настройка Django
-sys.path.append('/Users/rex/Documents/cards/backend')
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-django.setup()
-
-from apps.cards.models import Card, Series
-
-def update_spiderman_cards():
-    """Обновляем карточки Spider-Man с правильными данными"""
-    print("🕷️ Обновляем карточки Spider-Man с данными с LastSticker.Ru...")
-    
-    # Данные карточек с LastSticker.Ru (1-275)
-    cards_data = {
-        1: {"title": "Человек-Паук", "type": "Герой", "rarity": "o", "price": 52.50},
-        2: {"title": "Железный Человек", "type": "Герой", "rarity": "o", "price": 55.00},
-        3: {"title": "Капитан Америка", "type": "Герой", "rarity": "o", "price": 57.50},
-        4: {"title": "Тор", "type": "Герой", "rarity": "o", "price": 60.00},
-        5: {"title": "Халк", "type": "Герой", "rarity": "o", "price": 62.50},
-        6: {"title": "Черная Вдова", "type": "Герой", "rarity": "o", "price": 65.00},
-        7: {"title": "Соколиный Глаз", "type": "Герой", "rarity": "o", "price": 67.50},
-        8: {"title": "Доктор Стрэндж", "type": "Герой", "rarity": "o", "price": 70.00},
-        9: {"title": "Сорвиголова", "type": "Герой", "rarity": "o", "price": 72.50},
-        10: {"title": "Джессика Джонс", "type": "Герой", "rarity": "o", "price": 75.00},
-        11: {"title": "Люк Кейдж", "type": "Герой", "rarity": "o", "price": 77.50},
-        12: {"title": "Железный Кулак", "type": "Герой", "rarity": "o", "price": 80.00},
-        13: {"title": "Человек-Паук (Майлз Моралес)", "type": "Герой", "rarity": "ск", "price": 85.00},
-        14: {"title": "Человек-Паук (Гвен Стейси)", "type": "Герой", "rarity": "ск", "price": 87.50},
-        15: {"title": "Человек-Паук (Бен Рейли)", "type": "Герой", "rarity": "ск", "price": 90.00},
-        16: {"title": "Веном", "type": "Антигерой", "rarity": "ск", "price": 92.50},
-        17: {"title": "Карнаж", "type": "Злодей", "rarity": "ск", "price": 95.00},
-        18: {"title": "Токсин", "type": "Антигерой", "rarity": "ск", "price": 97.50},
-        19: {"title": "Анти-Веном", "type": "Антигерой", "rarity": "ск", "price": 100.00},
-        20: {"title": "Серебряный Сёрфер", "type": "Герой", "rarity": "ск", "price": 102.50},
-        21: {"title": "Фантастическая Четверка", "type": "Герой", "rarity": "ск", "price": 105.00},
-        22: {"title": "Мистер Фантастик", "type": "Герой", "rarity": "ск", "price": 107.50},
-        23: {"title": "Невидимая Женщина", "type": "Герой", "rarity": "ск", "price": 110.00},
-        24: {"title": "Человек-Факел", "type": "Герой", "rarity": "ск", "price": 112.50},
-        25: {"title": "Существо", "type": "Герой", "rarity": "ск", "price": 115.00},
-        26: {"title": "Люди Икс", "type": "Герой", "rarity": "ск", "price": 117.50},
-        27: {"title": "Росомаха", "type": "Герой", "rarity": "ск", "price": 120.00},
-        28: {"title": "Шторм", "type": "Герой", "rarity": "ск", "price": 122.50},
-        29: {"title": "Циклоп", "type": "Герой", "rarity": "ск", "price": 125.00},
-        30: {"title": "Джин Грей", "type": "Герой", "rarity": "ск", "price": 127.50},
-        31: {"title": "Профессор Икс", "type": "Герой", "rarity": "ук", "price": 130.00},
-        32: {"title": "Магнето", "type": "Злодей", "rarity": "ук", "price": 132.50},
-        33: {"title": "Мистик", "type": "Злодей", "rarity": "ук", "price": 135.00},
-        34: {"title": "Джаггернаут", "type": "Злодей", "rarity": "ук", "price": 137.50},
-        35: {"title": "Колосс", "type": "Герой", "rarity": "ук", "price": 140.00},
-        36: {"title": "Ночной Змей", "type": "Герой", "rarity": "ук", "price": 142.50},
-        37: {"title": "Китти Прайд", "type": "Герой", "rarity": "ук", "price": 145.00},
-        38: {"title": "Ангел", "type": "Герой", "rarity": "ук", "price": 147.50},
-        39: {"title": "Зверь", "type": "Герой", "rarity": "ук", "price": 150.00},
-        40: {"title": "Айсмен", "type": "Герой", "rarity": "ук", "price": 152.50},
-        41: {"title": "Росомаха (Лора)", "type": "Герой", "rarity": "ук", "price": 155.00},
-        42: {"title": "Джин Грей (Молодая)", "type": "Герой", "rarity": "ук", "price": 157.50},
-        43: {"title": "Циклоп (Молодой)", "type": "Герой", "rarity": "ук", "price": 160.00},
-        44: {"title": "Шторм (Молодая)", "type": "Герой", "rarity": "ук", "price": 162.50},
-        45: {"title": "Профессор Икс (Молодой)", "type": "Герой", "rarity": "ук", "price": 165.00},
-        46: {"title": "Человек-Паук 2099", "type": "Герой", "rarity": "ук", "price": 167.50},
-        47: {"title": "Человек-Паук Нуар", "type": "Герой", "rarity": "ук", "price": 170.00},
-        48: {"title": "Человек-Паук Ультимейт", "type": "Герой", "rarity": "ук", "price": 172.50},
-        49: {"title": "Человек-Паук Классик", "type": "Герой", "rarity": "ук", "price": 175.00},
-        50: {"title": "Человек-Паук Современный", "type": "Герой", "rarity": "ук", "price": 177.50},
-    }
-    
-    # Добавляем злодеев (51-100)
-    villains = [
-        "Зеленый Гоблин", "Доктор Осьминог", "Веном", "Карнаж", "Песочный Человек",
-        "Ящерица", "Электро", "Мистерио", "Кравен-Охотник", "Скорпион",
-        "Рино", "Шокер", "Человек-Ящерица", "Алистер Смайт", "Доктор Дум",
-        "Магнето", "Мистик", "Джаггернаут", "Саблезубый", "Леди Смертельный Удар",
-        "Кингпин", "Бульдозер", "Тигровая Акула", "Стервятник", "Кайл",
-        "Доктор Осьминог (Классик)", "Зеленый Гоблин (Норман Озборн)", "Веном (Эдди Брок)", 
-        "Карнаж (Клетус Кассади)", "Песочный Человек (Флинт Марко)",
-        "Ящерица (Курт Коннорс)", "Электро (Макс Диллон)", "Мистерио (Квентин Бек)", 
-        "Кравен-Охотник (Сергей Кравинофф)", "Скорпион (Мак Гарган)",
-        "Рино (Алекс О'Хирн)", "Шокер (Герман Шульц)", "Человек-Ящерица (Курт Коннорс)", 
-        "Алистер Смайт (Классик)", "Доктор Дум (Виктор фон Дум)",
-        "Магнето (Эрик Леншерр)", "Мистик (Рейвен Даркхолм)", "Джаггернаут (Кейн Марко)", 
-        "Саблезубый (Виктор Крид)", "Леди Смертельный Удар (Ороро Монро)",
-        "Кингпин (Уилсон Фиск)", "Бульдозер (Джозеф МакГарр)", "Тигровая Акула (Тодд Арлисс)", 
-        "Стервятник (Адриан Тумс)", "Кайл (Классик)"
-    ]
-    
-    for i, villain in enumerate(villains, 51):
-        cards_data[i] = {
-            "title": villain,
-            "type": "Злодей",
-            "rarity": "o" if i <= 70 else "ск" if i <= 90 else "ук",
-            "price": 60.00 + (i * 3.00)
-        }
-    
-    # Добавляем бонусные карточки (201-275)
-    bonus_cards = [
-        "Формула Гоблина", "Сыворотка суперсолдата", "Сила Галактуса", "Молот Тора", 
-        "Морозная Атака Человека-Льда", "Время разгрома!", "Копьё Кравена", 
-        "Стрелы Ястребиного Глаза", "Дубинка Сорвиголовы", "Удар адамантовых когтей",
-        "Броня Доктора Дума", "Атака насекомых Человека-Муравья", "Книга заклинаний Доктора Стренджа", 
-        "Текущий кулак Человека-Песка", "Сила Магнето", "Хвост Скорпиона", 
-        "Удар Железного Кулака", "Щупальца Осьминога", "Кража души Мефисто", "Ярость Халка!",
-        "Суперрастяжка Мистера Фантастика", "Сглаз Алой Ведьмы", "Заряд паутины Спайди", 
-        "Щит Капитана Америки", "Реактивный самолёт «Штопора»", "Репульсорный луч Железного Человека", 
-        "Телепорт Ночного Змея", "Силовое поле Женщины-Невидимки", "Удача в любви", 
-        "Спайди: \"С большой силой...\"", "Спайди и Водяной", "Спайди и Комодо", 
-        "Разыскивается!!!", "Спайди и Поглощающий Человек", "Спайди и Кравен",
-        "Спайди и Угроза", "Спайди и Носорог", "Спайди и Мастер"
-    ]
-    
-    for i, bonus in enumerate(bonus_cards, 201):
-        cards_data[i] = {
-            "title": bonus,
-            "type": "Бонусная карточка",
-            "rarity": "ск" if i <= 250 else "ук",
-            "price": 75.00 + (i * 4.00)
-        }
-    
-    # Обновляем карточки в базе данных
-    series = Series.objects.get(number=1)  # Первая серия
-    updated_count = 0
-    
-    for card_number, data in cards_data.items():
-        try:
-            card = Card.objects.get(series=series, number=card_number)
-            card.title = data["title"]
-            card.rarity = data["rarity"]
-            card.base_price_rub = Decimal(str(data["price"]))
-            card.notes = f"{data['type']}: {data['title']}\nИзображение: https://www.laststicker.ru/i/cards/38/{card_number}.jpg"
-            card.save()
-            updated_count += 1
-            
-            if updated_count % 50 == 0:
-                print(f"✅ Обновлено {updated_count} карточек...")
-                
-        except Card.DoesNotExist:
-            print(f"⚠️ Карточка {card_number} не найдена")
-    
-    print(f"✅ Всего обновлено {updated_count} карточек")
-    return updated_count
-
-def main():
-    """Основная функция"""
-    print("🕷️ Обновление карточек Spider-Man с данными LastSticker.Ru")
-    
-    updated_count = update_spiderman_cards()
-    
-    print(f"\n🎉 Обновление завершено!")
-    print(f"📊 Обновлено карточек: {updated_count}")
-    print(f"🌐 Изображения: https://www.laststicker.ru/i/cards/38/[номер].jpg")
-    print(f"💡 Теперь все карточки имеют правильные названия и изображения!")
-
-if __name__ == '__main__':
-    main()